@@ -1,31 +1,59 @@
 """Authentication backend for accoutns app."""
 from typing import Union
 
+from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from accounts.models import Token, User
+from superlists.cache import MISSING, LRUCache
+
+
+# Users looked up by get_user, keyed by email. Entries are dropped when the
+# user is saved or deleted in this process and expire after TIMEOUT seconds
+# so changes made elsewhere (or by queryset.update()) are picked up.
+user_cache = LRUCache(
+    settings.USER_CACHE["MAX_ENTRIES"], settings.USER_CACHE["TIMEOUT"]
+)
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_cache_save")
+@receiver(post_delete, sender=User, dispatch_uid="user_cache_delete")
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    """Drop a created, changed or deleted user from the cache."""
+    user_cache.delete(instance.pk)
 
 
 class PasswordlessAuthenticationBackend:
     """Backend for passwordless authentication"""
 
     def authenticate(self, uid: str) -> Union[None, models.Model]:
-        """Authenticate user."""
-        try:
-            token = Token.objects.get(uid=uid)
+        """Authenticate user, using up their login token."""
+        email = Token.objects.consume(uid)
 
-            return User.objects.get(email=token.email)
+        if email is None:
+            return None
 
-        except User.DoesNotExist:
-            return User.objects.create(email=token.email)
+        try:
+            return User.objects.get(email=email)
 
-        except Token.DoesNotExist:
-            return None
+        except User.DoesNotExist:
+            return User.objects.create(email=email)
 
     def get_user(self, email: str) -> Union[None, models.Model]:
-        """Retrieve user."""
+        """Retrieve user, from the cache if it was looked up recently."""
+        user = user_cache.get(email)
+
+        if user is not MISSING:
+            return user
+
         try:
-            return User.objects.get(email=email)
+            user = User.objects.get(email=email)
 
         except User.DoesNotExist:
             return None
+
+        user_cache.set(email, user)
+
+        return user
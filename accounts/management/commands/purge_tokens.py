@@ -0,0 +1,33 @@
+"""Management command deleting expired login tokens."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Token
+
+
+class Command(BaseCommand):
+    """Delete expired login tokens a bounded batch at a time."""
+
+    help = "Delete expired login tokens in small batches."
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches, letting writers in.",
+        )
+
+    def handle(self, *args, **options):
+        purged = 0
+
+        for deleted in Token.objects.purge_expired(options["batch_size"]):
+            purged += deleted
+
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(f"Purged {purged} expired login tokens.")
@@ -0,0 +1,27 @@
+"""Management command reporting rate limiter counters."""
+import json
+
+from django.core.management.base import BaseCommand
+
+from accounts.ratelimit import login_email_limiter
+
+
+class Command(BaseCommand):
+    """Print how many requests the login email limiter let through."""
+
+    help = "Print allowed and limited request counts as JSON."
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Clear the buckets and counters after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        counters = login_email_limiter.counters()
+        self.stdout.write(json.dumps(counters, indent=2, sort_keys=True))
+
+        if options["reset"]:
+            login_email_limiter.reset()
@@ -0,0 +1,47 @@
+"""Management command sending queued login emails."""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import send_due_emails
+
+
+class Command(BaseCommand):
+    """Drain the login email outbox, batch by batch."""
+
+    help = (
+        "Send queued login emails over one SMTP connection per batch, "
+        "retrying failures with exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        config = settings.LOGIN_EMAIL_OUTBOX
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once nothing is due instead of polling forever.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=config["BATCH_SIZE"]
+        )
+        parser.add_argument(
+            "--interval", type=float, default=config["POLL_INTERVAL"]
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_due_emails(options["batch_size"])
+
+            if sent or failed:
+                self.stdout.write(
+                    f"Sent {sent} login emails, {failed} failed."
+                )
+
+                continue
+
+            if options["once"]:
+                return
+
+            time.sleep(options["interval"])
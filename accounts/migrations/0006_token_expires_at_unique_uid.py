@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.13 on 2026-10-18 17:26
+from __future__ import unicode_literals
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+
+import accounts.models
+
+
+def delete_duplicate_uids(apps, schema_editor):
+    """Drop tokens whose uid is blank or shared with another token.
+
+    Tokens made before this migration get expires_at = now, so they can no
+    longer be used anyway; this only clears the way for the unique index.
+    """
+    Token = apps.get_model('accounts', 'Token')
+    tokens = Token.objects.using(schema_editor.connection.alias)
+    duplicates = (
+        tokens.values('uid').annotate(count=Count('id')).filter(count__gt=1)
+    )
+    tokens.filter(
+        uid__in=[row['uid'] for row in duplicates] + ['']
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_auto_20210606_2331'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='token',
+            name='expires_at',
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            delete_duplicate_uids,
+            migrations.RunPython.noop,
+            hints={'model_name': 'token'},
+        ),
+        migrations.AlterField(
+            model_name='token',
+            name='uid',
+            field=models.CharField(
+                default=uuid.uuid4, max_length=40, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name='token',
+            name='expires_at',
+            field=models.DateTimeField(
+                db_index=True, default=accounts.models.token_expiry
+            ),
+        ),
+    ]
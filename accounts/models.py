@@ -1,8 +1,12 @@
 """Models for the accoutns app."""
 import uuid
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
 
+from django.conf import settings
 from django.contrib import auth
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
 
 auth.signals.user_logged_in.disconnect(auth.models.update_last_login)
@@ -18,8 +22,109 @@ class User(models.Model):
     is_authenticated = True
 
 
+def token_expiry() -> datetime:
+    """Return when a login token made now stops working."""
+    return timezone.now() + timedelta(seconds=settings.LOGIN_TOKEN_LIFETIME)
+
+
+class TokenManager(models.Manager):
+    """Manager for single-use login tokens."""
+
+    def consume(self, uid: Optional[str]) -> Optional[str]:
+        """Delete the unexpired token with this uid, returning its email.
+
+        Returns None if there is no such token, or if a concurrent request
+        consumed it first.
+        """
+        try:
+            token = self.get(uid=uid, expires_at__gt=timezone.now())
+
+        except self.model.DoesNotExist:
+            return None
+
+        deleted, _ = self.filter(pk=token.pk).delete()
+
+        return token.email if deleted else None
+
+    def purge_expired(self, batch_size: int = 1000) -> Iterator[int]:
+        """Delete expired tokens, yielding the size of each deleted batch.
+
+        Every batch is its own short DELETE, so the write lock is released
+        between batches.
+        """
+        now = timezone.now()
+
+        while True:
+            pks = list(
+                self.filter(expires_at__lte=now).values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+
+            if not pks:
+                return
+
+            deleted, _ = self.filter(pk__in=pks).delete()
+
+            yield deleted
+
+
 class Token(models.Model):
     """The model for authentication tokens."""
 
     email = models.EmailField()
-    uid = models.CharField(default=uuid.uuid4, max_length=40)
+    uid = models.CharField(default=uuid.uuid4, max_length=40, unique=True)
+    expires_at = models.DateTimeField(default=token_expiry, db_index=True)
+
+    objects = TokenManager()
+
+
+class LoginEmailManager(models.Manager):
+    """Manager for the outbox of unsent login emails."""
+
+    def enqueue(self, email: str, subject: str, body: str) -> None:
+        """Queue a login email, replacing any unsent one to the address.
+
+        Repeated requests for the same address coalesce into one row, and
+        so into one email carrying the newest link.
+        """
+        now = timezone.now()
+        fields = {
+            "subject": subject,
+            "body": body,
+            "queued_at": now,
+            "attempts": 0,
+            "next_attempt_at": now,
+        }
+
+        if self.filter(email=email).update(**fields):
+            return
+
+        try:
+            with transaction.atomic(using=self.db):
+                self.create(email=email, **fields)
+
+        except IntegrityError:
+            # Another request queued this address since the update.
+            self.filter(email=email).update(**fields)
+
+    def due(self, limit: int) -> models.QuerySet:
+        """Return up to limit emails that are due, oldest first."""
+        return self.filter(next_attempt_at__lte=timezone.now()).order_by(
+            "next_attempt_at"
+        )[:limit]
+
+
+class LoginEmail(models.Model):
+    """A login email waiting for the send_login_emails worker."""
+
+    email = models.EmailField(unique=True)
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    queued_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, db_index=True
+    )
+
+    objects = LoginEmailManager()
@@ -0,0 +1,129 @@
+"""Sending of queued login emails, for the send_login_emails worker."""
+import logging
+import smtplib
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from accounts.models import LoginEmail
+
+
+FROM_EMAIL = "noreply@superlists"
+
+logger = logging.getLogger(__name__)
+
+SEND_ERRORS = (smtplib.SMTPException, OSError)
+
+
+def backoff(attempts: int) -> timedelta:
+    """Return the delay before retrying an email that failed attempts times."""
+    config = settings.LOGIN_EMAIL_OUTBOX
+    seconds = config["BACKOFF"] * 2 ** (attempts - 1)
+
+    return timedelta(seconds=min(seconds, config["MAX_BACKOFF"]))
+
+
+def _retry_later(login_email: LoginEmail) -> None:
+    """Record a failed attempt, giving up after MAX_ATTEMPTS.
+
+    Rows are matched on queued_at too, so a newer request for the same
+    address is neither delayed nor dropped.
+    """
+    attempts = login_email.attempts + 1
+    row = LoginEmail.objects.filter(
+        pk=login_email.pk, queued_at=login_email.queued_at
+    )
+
+    if attempts >= settings.LOGIN_EMAIL_OUTBOX["MAX_ATTEMPTS"]:
+        logger.error(
+            "Giving up on login email to %s after %d attempts",
+            login_email.email,
+            attempts,
+        )
+        row.delete()
+
+    else:
+        row.update(
+            attempts=attempts,
+            next_attempt_at=timezone.now() + backoff(attempts),
+        )
+
+
+def _reconnect(connection) -> None:
+    """Replace a connection that may have broken with a fresh one."""
+    connection.close()
+
+    try:
+        connection.open()
+
+    except SEND_ERRORS:
+        # The next send retries the connection itself.
+        pass
+
+
+def send_due_emails(
+    batch_size: Optional[int] = None, connection=None
+) -> Tuple[int, int]:
+    """Send one batch of due login emails over a single connection.
+
+    Returns the number of emails sent and the number that failed.
+    """
+    if batch_size is None:
+        batch_size = settings.LOGIN_EMAIL_OUTBOX["BATCH_SIZE"]
+
+    batch = list(LoginEmail.objects.due(batch_size))
+
+    if not batch:
+        return 0, 0
+
+    if connection is None:
+        connection = get_connection()
+
+    try:
+        connection.open()
+
+    except SEND_ERRORS:
+        logger.exception("Could not connect to send login emails")
+
+        for login_email in batch:
+            _retry_later(login_email)
+
+        return 0, len(batch)
+
+    sent = 0
+
+    try:
+        for login_email in batch:
+            message = EmailMessage(
+                login_email.subject,
+                login_email.body,
+                FROM_EMAIL,
+                [login_email.email],
+                connection=connection,
+            )
+
+            try:
+                message.send()
+
+            except SEND_ERRORS:
+                logger.warning(
+                    "Login email to %s failed", login_email.email,
+                    exc_info=True,
+                )
+                _retry_later(login_email)
+                _reconnect(connection)
+
+                continue
+
+            LoginEmail.objects.filter(
+                pk=login_email.pk, queued_at=login_email.queued_at
+            ).delete()
+            sent += 1
+
+    finally:
+        connection.close()
+
+    return sent, len(batch) - sent
@@ -0,0 +1,200 @@
+"""Token-bucket rate limiting shared between worker processes.
+
+Bucket levels and counters live in a small SQLite database of their own,
+outside the Django database, so every gunicorn worker on the host sees the
+same buckets and a limited request never touches the main tables.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple
+
+from django.conf import settings
+from django.http import HttpRequest
+
+
+logger = logging.getLogger(__name__)
+
+# Full buckets are forgotten after every PRUNE_EVERY requests per process.
+PRUNE_EVERY = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    full_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bucket_full_at ON bucket (full_at);
+CREATE TABLE IF NOT EXISTS counter (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class Bucket(NamedTuple):
+    """A token bucket holding up to burst tokens, refilled one per period."""
+
+    key: str
+    burst: int
+    refill_seconds: float
+
+
+class TokenBucketLimiter:
+    """Rate limiter whose buckets are rows of an SQLite database."""
+
+    def __init__(self, database: str):
+        """Initialize a limiter storing its buckets at the database URI."""
+        self.database = database
+        self._local = threading.local()
+        self._takes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, creating tables on first use."""
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(
+                self.database, uri=True, timeout=1, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+
+        return connection
+
+    def take(self, buckets: Iterable[Bucket], scope: str) -> float:
+        """Take a token from every bucket, or from none of them.
+
+        Returns 0 when the tokens were taken, otherwise the seconds until
+        every bucket has a token again. Counters are kept under scope. If
+        the store is unavailable the request is let through.
+        """
+        connection = None
+
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            wait = self._take(connection, list(buckets), scope)
+            self._takes += 1
+
+            if self._takes % PRUNE_EVERY == 0:
+                self.prune(connection)
+
+            connection.execute("COMMIT")
+
+        except sqlite3.Error:
+            logger.exception("Rate limit store unavailable, not limiting")
+
+            if connection is not None and connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+            return 0.0
+
+        return wait
+
+    def _take(
+        self, connection: sqlite3.Connection, buckets: list, scope: str
+    ) -> float:
+        """Refill and draw from the buckets inside an open transaction."""
+        now = time.time()
+        levels = {}
+
+        for bucket in buckets:
+            row = connection.execute(
+                "SELECT tokens, updated FROM bucket WHERE key = ?",
+                (bucket.key,),
+            ).fetchone()
+
+            if row is None:
+                levels[bucket] = bucket.burst
+
+            else:
+                tokens, updated = row
+                refilled = (now - updated) / bucket.refill_seconds
+                levels[bucket] = min(bucket.burst, tokens + refilled)
+
+        wait = max(
+            [
+                (1 - level) * bucket.refill_seconds
+                for bucket, level in levels.items()
+            ]
+            + [0.0]
+        )
+        taken = 1 if wait == 0 else 0
+        rows = []
+
+        for bucket, level in levels.items():
+            missing = bucket.burst - level + taken
+            full_at = now + missing * bucket.refill_seconds
+            rows.append((bucket.key, level - taken, now, full_at))
+
+        connection.executemany(
+            "INSERT OR REPLACE INTO bucket VALUES (?, ?, ?, ?)", rows
+        )
+        self._count(
+            connection, f"{scope}:{'allowed' if taken else 'limited'}"
+        )
+
+        return wait
+
+    def _count(self, connection: sqlite3.Connection, name: str) -> None:
+        """Add one to the named counter."""
+        connection.execute(
+            "INSERT OR IGNORE INTO counter VALUES (?, 0)", (name,)
+        )
+        connection.execute(
+            "UPDATE counter SET value = value + 1 WHERE name = ?", (name,)
+        )
+
+    def prune(self, connection: sqlite3.Connection = None) -> None:
+        """Delete buckets that have refilled, as they hold no state."""
+        connection = connection or self._connection()
+        connection.execute(
+            "DELETE FROM bucket WHERE full_at <= ?", (time.time(),)
+        )
+
+    def counters(self) -> Dict[str, int]:
+        """Return the allowed and limited request counts by scope."""
+        return dict(
+            self._connection().execute("SELECT name, value FROM counter")
+        )
+
+    def reset(self) -> None:
+        """Forget every bucket and counter."""
+        connection = self._connection()
+        connection.execute("DELETE FROM bucket")
+        connection.execute("DELETE FROM counter")
+
+
+login_email_limiter = TokenBucketLimiter(settings.RATE_LIMIT["DATABASE"])
+
+
+def client_ip(request: HttpRequest) -> str:
+    """Return the address of the client that sent the request."""
+    header = settings.RATE_LIMIT["CLIENT_IP_HEADER"]
+
+    if header and header in request.META:
+        return request.META[header]
+
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def login_email_buckets(request: HttpRequest, email: str) -> list:
+    """Return the buckets a login email request for email draws from."""
+    config = settings.RATE_LIMIT
+
+    return [
+        Bucket(
+            f"email:{email.strip().lower()}",
+            config["EMAIL"]["BURST"],
+            config["EMAIL"]["REFILL_SECONDS"],
+        ),
+        Bucket(
+            f"ip:{client_ip(request)}",
+            config["IP"]["BURST"],
+            config["IP"]["REFILL_SECONDS"],
+        ),
+    ]
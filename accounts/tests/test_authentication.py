@@ -1,8 +1,16 @@
 """Test suite for authentication."""
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.db import connections, router
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from accounts.authentication import PasswordlessAuthenticationBackend
+from accounts.authentication import (
+    PasswordlessAuthenticationBackend,
+    user_cache,
+)
 from accounts.models import Token
 
 
@@ -37,10 +45,30 @@ class AuthenticateTest(TestCase):
         user = PasswordlessAuthenticationBackend().authenticate(token.uid)
         self.assertEqual(user, existing_user)
 
+    def test_token_only_works_once(self) -> None:
+        """Test that a second login with the same token is refused."""
+        token = Token.objects.create(email="thewchan.misc@gmail.com")
+        backend = PasswordlessAuthenticationBackend()
+        self.assertIsNotNone(backend.authenticate(token.uid))
+        self.assertIsNone(backend.authenticate(token.uid))
+
+    def test_returns_None_if_token_has_expired(self) -> None:
+        """Test that expired tokens do not authenticate."""
+        token = Token.objects.create(
+            email="thewchan.misc@gmail.com", expires_at=timezone.now()
+        )
+        self.assertIsNone(
+            PasswordlessAuthenticationBackend().authenticate(token.uid)
+        )
+
 
 class GetUserTest(TestCase):
     """Test suite for retrieving user."""
 
+    def setUp(self) -> None:
+        """Start every test with an empty user cache."""
+        user_cache.clear()
+
     def test_gets_user_by_email(self) -> None:
         """Test emails are linked to correct user."""
         User.objects.create(email="mychan@vt.edu")
@@ -57,3 +85,71 @@ class GetUserTest(TestCase):
                 "thewchan.misc@gmail.com"
             )
         )
+
+    def test_repeated_lookups_skip_the_database(self) -> None:
+        """Test that a recently retrieved user is served from the cache."""
+        user = User.objects.create(email="edith@example.com")
+        backend = PasswordlessAuthenticationBackend()
+        backend.get_user("edith@example.com")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.get_user("edith@example.com"), user)
+
+    def test_missing_users_are_not_cached(self) -> None:
+        """Test that a user created after a failed lookup is found."""
+        backend = PasswordlessAuthenticationBackend()
+        backend.get_user("edith@example.com")
+        user = User.objects.create(email="edith@example.com")
+        self.assertEqual(backend.get_user("edith@example.com"), user)
+
+    def test_saving_user_invalidates_cache(self) -> None:
+        """Test that the next lookup after a save hits the database."""
+        user = User.objects.create(email="edith@example.com")
+        backend = PasswordlessAuthenticationBackend()
+        backend.get_user("edith@example.com")
+        user.save()
+
+        with self.assertNumQueries(1):
+            backend.get_user("edith@example.com")
+
+    def test_deleted_user_is_not_returned(self) -> None:
+        """Test that deleting a user drops it from the cache."""
+        user = User.objects.create(email="edith@example.com")
+        backend = PasswordlessAuthenticationBackend()
+        backend.get_user("edith@example.com")
+        user.delete()
+        self.assertIsNone(backend.get_user("edith@example.com"))
+
+    def test_cached_users_expire(self) -> None:
+        """Test that entries older than the TTL are looked up again."""
+        User.objects.create(email="edith@example.com")
+        backend = PasswordlessAuthenticationBackend()
+
+        with patch("superlists.cache.time.monotonic", return_value=0):
+            backend.get_user("edith@example.com")
+
+        with patch(
+            "superlists.cache.time.monotonic",
+            return_value=user_cache.ttl + 1,
+        ):
+            with self.assertNumQueries(1):
+                backend.get_user("edith@example.com")
+
+    def test_logged_in_page_views_skip_users_table(self) -> None:
+        """Test that request.user comes from the cache after one view."""
+        user = User.objects.create(email="edith@example.com")
+        self.client.force_login(user)
+        self.client.get("/")
+        using = router.db_for_read(User)
+
+        with CaptureQueriesContext(connections[using]) as queries:
+            response = self.client.get("/")
+
+        self.assertContains(response, "edith@example.com")
+        self.assertFalse(
+            [
+                query
+                for query in queries.captured_queries
+                if User._meta.db_table in query["sql"]
+            ]
+        )
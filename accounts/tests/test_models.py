@@ -1,6 +1,12 @@
 """Test suite for account app models."""
+from datetime import timedelta
+from io import StringIO
+
 from django.contrib import auth
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils import timezone
 
 from accounts.models import Token
 
@@ -37,3 +43,60 @@ class TokenModelTest(TestCase):
         token1 = Token.objects.create(email="a@b.com")
         token2 = Token.objects.create(email="a@b.com")
         self.assertNotEqual(token1.uid, token2.uid)
+
+    def test_uid_is_unique(self) -> None:
+        """Test that two tokens cannot share a uid."""
+        Token.objects.create(email="a@b.com", uid="abc")
+
+        with self.assertRaises(IntegrityError):
+            Token.objects.create(email="c@d.com", uid="abc")
+
+    def test_expires_after_configured_lifetime(self) -> None:
+        """Test that new tokens expire LOGIN_TOKEN_LIFETIME from now."""
+        with self.settings(LOGIN_TOKEN_LIFETIME=60):
+            token = Token.objects.create(email="a@b.com")
+
+        self.assertAlmostEqual(
+            token.expires_at,
+            timezone.now() + timedelta(seconds=60),
+            delta=timedelta(seconds=5),
+        )
+
+    def test_consume_returns_email_once(self) -> None:
+        """Test that a token can only be used a single time."""
+        token = Token.objects.create(email="a@b.com")
+        self.assertEqual(Token.objects.consume(token.uid), "a@b.com")
+        self.assertIsNone(Token.objects.consume(token.uid))
+        self.assertFalse(Token.objects.exists())
+
+    def test_consume_refuses_expired_token(self) -> None:
+        """Test that an expired token does not log anyone in."""
+        token = Token.objects.create(
+            email="a@b.com", expires_at=timezone.now()
+        )
+        self.assertIsNone(Token.objects.consume(token.uid))
+
+
+class PurgeTokensTest(TestCase):
+    """Test suite for deleting expired tokens."""
+
+    def setUp(self) -> None:
+        """Create five expired tokens and one live one."""
+        expired = timezone.now() - timedelta(minutes=1)
+        Token.objects.bulk_create(
+            Token(email="a@b.com", uid=str(n), expires_at=expired)
+            for n in range(5)
+        )
+        self.live = Token.objects.create(email="a@b.com")
+
+    def test_purges_expired_tokens_in_batches(self) -> None:
+        """Test that expired tokens go in batches of at most batch_size."""
+        self.assertEqual(list(Token.objects.purge_expired(2)), [2, 2, 1])
+        self.assertEqual(list(Token.objects.all()), [self.live])
+
+    def test_purge_tokens_command(self) -> None:
+        """Test that the command reports how many tokens it purged."""
+        out = StringIO()
+        call_command("purge_tokens", batch_size=2, stdout=out)
+        self.assertIn("Purged 5 expired login tokens.", out.getvalue())
+        self.assertEqual(list(Token.objects.all()), [self.live])
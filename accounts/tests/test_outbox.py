@@ -0,0 +1,167 @@
+"""Test suite for the login email outbox and its worker."""
+import smtplib
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import LoginEmail
+from accounts.outbox import backoff, send_due_emails
+from accounts.ratelimit import login_email_limiter
+
+
+class FlakyBackend(EmailBackend):
+    """Locmem email backend failing for some addresses and counting opens."""
+
+    def __init__(self, failing=(), **kwargs):
+        """Initialize a backend that refuses mail to failing addresses."""
+        super().__init__(**kwargs)
+        self.failing = set(failing)
+        self.opened = 0
+
+    def open(self) -> bool:
+        """Count connection attempts."""
+        self.opened += 1
+
+        return False
+
+    def send_messages(self, messages) -> int:
+        """Send messages, raising for addresses in failing."""
+        for message in messages:
+            if self.failing.intersection(message.to):
+                raise smtplib.SMTPRecipientsRefused(message.to)
+
+        return super().send_messages(messages)
+
+
+class LoginEmailQueueTest(TestCase):
+    """Test suite for queueing login emails."""
+
+    def test_enqueue_replaces_unsent_email_to_same_address(self) -> None:
+        """Test that a newer request supersedes the queued email."""
+        LoginEmail.objects.enqueue("a@b.com", "Log in", "old link")
+        LoginEmail.objects.enqueue("a@b.com", "Log in", "new link")
+        self.assertEqual(
+            list(LoginEmail.objects.values_list("email", "body")),
+            [("a@b.com", "new link")],
+        )
+
+    def test_enqueue_resets_retries(self) -> None:
+        """Test that a fresh request is due at once."""
+        LoginEmail.objects.create(
+            email="a@b.com",
+            subject="Log in",
+            body="old link",
+            attempts=3,
+            next_attempt_at=timezone.now() + timedelta(hours=1),
+        )
+        LoginEmail.objects.enqueue("a@b.com", "Log in", "new link")
+        self.assertEqual(len(LoginEmail.objects.due(10)), 1)
+        self.assertEqual(LoginEmail.objects.get().attempts, 0)
+
+
+class SendDueEmailsTest(TestCase):
+    """Test suite for draining the outbox."""
+
+    def test_sends_batch_over_one_connection(self) -> None:
+        """Test that a batch of emails opens a single connection."""
+        for n in range(3):
+            LoginEmail.objects.enqueue(f"user{n}@b.com", "Log in", "link")
+
+        connection = FlakyBackend()
+        self.assertEqual(send_due_emails(connection=connection), (3, 0))
+        self.assertEqual(connection.opened, 1)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["user0@b.com", "user1@b.com", "user2@b.com"],
+        )
+        self.assertFalse(LoginEmail.objects.exists())
+
+    def test_sends_at_most_batch_size(self) -> None:
+        """Test that one call sends no more than batch_size emails."""
+        for n in range(3):
+            LoginEmail.objects.enqueue(f"user{n}@b.com", "Log in", "link")
+
+        self.assertEqual(send_due_emails(batch_size=2), (2, 0))
+        self.assertEqual(LoginEmail.objects.count(), 1)
+
+    def test_failed_email_is_retried_with_backoff(self) -> None:
+        """Test that a failure is kept and pushed back, others are sent."""
+        LoginEmail.objects.enqueue("bad@b.com", "Log in", "link")
+        LoginEmail.objects.enqueue("good@b.com", "Log in", "link")
+        connection = FlakyBackend(failing=["bad@b.com"])
+
+        with self.assertLogs("accounts.outbox", "WARNING"):
+            self.assertEqual(send_due_emails(connection=connection), (1, 1))
+
+        failed = LoginEmail.objects.get()
+        self.assertEqual(failed.email, "bad@b.com")
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        self.assertEqual(send_due_emails(), (0, 0))
+
+    def test_gives_up_after_max_attempts(self) -> None:
+        """Test that an email failing too often is dropped."""
+        LoginEmail.objects.enqueue("bad@b.com", "Log in", "link")
+        LoginEmail.objects.update(attempts=4)
+
+        with self.settings(
+            LOGIN_EMAIL_OUTBOX=dict(BACKOFF=30, MAX_BACKOFF=60, MAX_ATTEMPTS=5)
+        ), self.assertLogs("accounts.outbox", "WARNING"):
+            send_due_emails(1, FlakyBackend(failing=["bad@b.com"]))
+
+        self.assertFalse(LoginEmail.objects.exists())
+
+    def test_unreachable_server_defers_whole_batch(self) -> None:
+        """Test that a connection failure retries every email later."""
+        LoginEmail.objects.enqueue("a@b.com", "Log in", "link")
+        connection = FlakyBackend()
+
+        with patch.object(connection, "open", side_effect=OSError):
+            with self.assertLogs("accounts.outbox", "ERROR"):
+                self.assertEqual(
+                    send_due_emails(connection=connection), (0, 1)
+                )
+
+        self.assertEqual(LoginEmail.objects.get().attempts, 1)
+
+    def test_backoff_doubles_up_to_cap(self) -> None:
+        """Test the retry delays."""
+        with self.settings(
+            LOGIN_EMAIL_OUTBOX=dict(BACKOFF=30, MAX_BACKOFF=100)
+        ):
+            self.assertEqual(
+                [backoff(n).total_seconds() for n in range(1, 5)],
+                [30, 60, 100, 100],
+            )
+
+
+class SendLoginEmailsCommandTest(TestCase):
+    """Test suite for the send_login_emails worker command."""
+
+    def test_once_drains_outbox_and_exits(self) -> None:
+        """Test that --once sends everything due, then returns."""
+        for n in range(3):
+            LoginEmail.objects.enqueue(f"user{n}@b.com", "Log in", "link")
+
+        out = StringIO()
+        call_command("send_login_emails", once=True, batch_size=2, stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn("Sent 2 login emails, 0 failed.", out.getvalue())
+        self.assertIn("Sent 1 login emails, 0 failed.", out.getvalue())
+
+    def test_view_then_worker_delivers_link(self) -> None:
+        """Test the login email end to end with the locmem backend."""
+        login_email_limiter.reset()
+        self.client.post(
+            "/accounts/send_login_email", data={"email": "edith@example.com"}
+        )
+        call_command("send_login_emails", once=True, stdout=StringIO())
+        self.assertEqual(mail.outbox[0].to, ["edith@example.com"])
+        self.assertEqual(mail.outbox[0].from_email, "noreply@superlists")
+        self.assertIn("/accounts/login?token=", mail.outbox[0].body)
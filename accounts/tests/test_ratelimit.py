@@ -0,0 +1,165 @@
+"""Test suite for rate limiting login email requests."""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from accounts.models import LoginEmail, Token
+from accounts.ratelimit import (
+    Bucket,
+    TokenBucketLimiter,
+    login_email_limiter,
+)
+
+
+class TokenBucketLimiterTest(SimpleTestCase):
+    """Test suite for the SQLite-backed token buckets."""
+
+    def setUp(self) -> None:
+        """Create a limiter storing its buckets in a temporary file."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.database = "file:" + os.path.join(directory, "limits.sqlite3")
+        self.limiter = TokenBucketLimiter(self.database)
+        self.bucket = Bucket("ip:1.2.3.4", burst=2, refill_seconds=10)
+
+    def take_at(self, when: float, *buckets: Bucket) -> float:
+        """Take from the buckets as if the time were when."""
+        with patch("accounts.ratelimit.time.time", return_value=when):
+            return self.limiter.take(buckets or [self.bucket], "test")
+
+    def test_allows_burst_then_limits(self) -> None:
+        """Test that only burst requests get through at once."""
+        self.assertEqual(self.take_at(0), 0)
+        self.assertEqual(self.take_at(0), 0)
+        self.assertEqual(self.take_at(0), 10)
+
+    def test_refills_over_time(self) -> None:
+        """Test that a token comes back every refill_seconds."""
+        self.take_at(0)
+        self.take_at(0)
+        self.assertEqual(self.take_at(4), 6)
+        self.assertEqual(self.take_at(10), 0)
+        self.assertEqual(self.take_at(10), 10)
+
+    def test_takes_from_all_buckets_or_none(self) -> None:
+        """Test that a refusal does not drain the other buckets."""
+        email = Bucket("email:a@b.com", burst=1, refill_seconds=60)
+        self.take_at(0, email, self.bucket)
+        self.assertEqual(self.take_at(0, email, self.bucket), 60)
+        self.assertEqual(self.take_at(0), 0)
+
+    def test_buckets_are_shared_between_limiters(self) -> None:
+        """Test that workers using the same database share buckets."""
+        self.take_at(0)
+        self.take_at(0)
+        other = TokenBucketLimiter(self.database)
+
+        with patch("accounts.ratelimit.time.time", return_value=0):
+            self.assertEqual(other.take([self.bucket], "test"), 10)
+
+    def test_counts_allowed_and_limited_requests(self) -> None:
+        """Test the counters kept per scope."""
+        for _ in range(3):
+            self.take_at(0)
+
+        self.assertEqual(
+            self.limiter.counters(), {"test:allowed": 2, "test:limited": 1}
+        )
+
+    def test_prune_forgets_refilled_buckets(self) -> None:
+        """Test that pruning only removes buckets that are full again."""
+        self.take_at(0)
+        self.take_at(0, Bucket("ip:5.6.7.8", burst=2, refill_seconds=100))
+
+        with patch("accounts.ratelimit.time.time", return_value=50):
+            self.limiter.prune()
+
+        keys = self.limiter._connection().execute("SELECT key FROM bucket")
+        self.assertEqual([key for key, in keys], ["ip:5.6.7.8"])
+
+    def test_lets_requests_through_if_store_is_unavailable(self) -> None:
+        """Test that the limiter fails open."""
+        limiter = TokenBucketLimiter("file:/no/such/directory/limits.db")
+
+        with self.assertLogs("accounts.ratelimit", "ERROR"):
+            self.assertEqual(limiter.take([self.bucket], "test"), 0)
+
+
+class SendLoginEmailRateLimitTest(TestCase):
+    """Test suite for the limits on requesting login emails."""
+
+    def setUp(self) -> None:
+        """Start with full buckets."""
+        login_email_limiter.reset()
+
+    def post(self, email: str = "edith@example.com", **extra):
+        """Request a login email."""
+        return self.client.post(
+            "/accounts/send_login_email", data={"email": email}, **extra
+        )
+
+    def test_limits_requests_per_email(self) -> None:
+        """Test that one address can only ask for a few emails at once."""
+        for _ in range(3):
+            self.assertEqual(self.post().status_code, 302)
+
+        response = self.post()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+        self.assertEqual(self.post("other@example.com").status_code, 302)
+
+    def test_limits_requests_per_client_ip(self) -> None:
+        """Test that one client cannot ask for emails to many addresses."""
+        for n in range(20):
+            self.post(f"user{n}@example.com")
+
+        self.assertEqual(self.post("late@example.com").status_code, 429)
+        self.assertEqual(
+            self.post("late@example.com", REMOTE_ADDR="10.0.0.1").status_code,
+            302,
+        )
+
+    def test_reads_client_ip_from_configured_header(self) -> None:
+        """Test that the proxy's X-Real-IP header identifies clients."""
+        config = dict(settings.RATE_LIMIT)
+        config["CLIENT_IP_HEADER"] = "HTTP_X_REAL_IP"
+
+        with self.settings(RATE_LIMIT=config):
+            for n in range(20):
+                self.post(f"user{n}@example.com", HTTP_X_REAL_IP="1.1.1.1")
+
+            response = self.post(
+                "late@example.com", HTTP_X_REAL_IP="2.2.2.2"
+            )
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_limited_requests_skip_database_and_mailer(self) -> None:
+        """Test that a refused request creates no token or email."""
+        for _ in range(3):
+            self.post()
+
+        with self.assertNumQueries(0):
+            self.post()
+
+        self.assertEqual(Token.objects.count(), 3)
+        self.assertEqual(LoginEmail.objects.count(), 1)
+
+    def test_ratelimit_stats_command(self) -> None:
+        """Test that the counters are printed as JSON."""
+        for _ in range(4):
+            self.post()
+
+        out = StringIO()
+        call_command("ratelimit_stats", stdout=out)
+        self.assertEqual(
+            json.loads(out.getvalue()),
+            {"send_login_email:allowed": 3, "send_login_email:limited": 1},
+        )
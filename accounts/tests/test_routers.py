@@ -0,0 +1,91 @@
+"""Test suite for routing login data to its own database."""
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import LoginEmail, Token
+from accounts.ratelimit import login_email_limiter
+from lists.models import Item, List
+from superlists.routers import AuthDataRouter
+
+User = get_user_model()
+
+
+@override_settings(AUTH_DATA_DATABASE="auth")
+class AuthDataRouterTest(SimpleTestCase):
+    """Test suite for the router's decisions."""
+
+    def setUp(self) -> None:
+        """Create the router under test."""
+        self.router = AuthDataRouter()
+
+    def test_routes_login_data_to_auth_database(self) -> None:
+        """Test that tokens, login emails and sessions use the alias."""
+        for model in (Token, LoginEmail, Session):
+            self.assertEqual(self.router.db_for_write(model), "auth")
+            self.assertEqual(self.router.db_for_read(model), "auth")
+
+    def test_leaves_other_models_to_default(self) -> None:
+        """Test that lists, items and users are not routed."""
+        for model in (List, Item, User):
+            self.assertIsNone(self.router.db_for_write(model))
+            self.assertIsNone(self.router.db_for_read(model))
+
+    def test_migrates_login_data_only_in_its_database(self) -> None:
+        """Test that each database gets only its own tables."""
+        allow = self.router.allow_migrate
+        self.assertTrue(allow("auth", "accounts", "token"))
+        self.assertTrue(allow("auth", "sessions", "session"))
+        self.assertFalse(allow("default", "accounts", "token"))
+        self.assertFalse(allow("auth", "accounts", "user"))
+        self.assertFalse(allow("auth", "lists", "item"))
+        self.assertFalse(allow("auth", "lists", None))
+        self.assertIsNone(allow("default", "lists", "item"))
+
+    @override_settings(AUTH_DATA_DATABASE="default")
+    def test_migrates_login_data_in_both_when_not_separated(self) -> None:
+        """Test that the auth alias is ready before it is switched on."""
+        allow = self.router.allow_migrate
+        self.assertTrue(allow("default", "accounts", "token"))
+        self.assertTrue(allow("auth", "accounts", "token"))
+
+
+@override_settings(AUTH_DATA_DATABASE="auth")
+class SeparateAuthDatabaseTest(TestCase):
+    """Test suite for logging in with login data in its own database."""
+
+    multi_db = True
+
+    def setUp(self) -> None:
+        """Start with full rate limit buckets."""
+        login_email_limiter.reset()
+
+    def test_login_email_does_not_touch_lists_database(self) -> None:
+        """Test that requesting a login link writes only auth data."""
+        with self.assertNumQueries(0, using="default"):
+            self.client.post(
+                "/accounts/send_login_email", data={"email": "a@b.com"}
+            )
+
+        self.assertEqual(Token.objects.using("auth").count(), 1)
+        self.assertEqual(LoginEmail.objects.using("auth").count(), 1)
+
+    def test_login_stores_session_in_auth_database(self) -> None:
+        """Test that a login consumes the token and saves the session."""
+        token = Token.objects.create(email="a@b.com")
+        self.assertEqual(token._state.db, "auth")
+
+        with CaptureQueriesContext(connections["default"]) as default:
+            self.client.get(f"/accounts/login?token={token.uid}")
+
+        self.assertFalse(Token.objects.exists())
+        self.assertEqual(Session.objects.using("auth").count(), 1)
+        self.assertFalse(
+            any(
+                "django_session" in query["sql"]
+                for query in default.captured_queries
+            )
+        )
+        self.assertTrue(User.objects.using("default").exists())
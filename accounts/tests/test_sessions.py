@@ -0,0 +1,227 @@
+"""Test suite for the cached, write-behind session engine."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.signals import request_finished
+from django.test import TestCase
+from django.utils import timezone
+
+from superlists import sessions
+from superlists.sessions import SessionStore, flush_pending, session_cache
+
+
+User = auth.get_user_model()
+
+
+class SessionEngineTest(TestCase):
+    """Test suite for reads, writes and sweeps of the session engine."""
+
+    def setUp(self) -> None:
+        """Start every test with empty cache tiers and queue."""
+        session_cache.clear()
+        sessions._pending.clear()
+
+    def stored_data(self, session_key: str) -> dict:
+        """Return the session data currently in the database."""
+        session = Session.objects.get(session_key=session_key)
+
+        return DBStore().decode(session.session_data)
+
+    def test_new_session_is_written_immediately(self) -> None:
+        """Test that creating a session inserts its row at once."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        self.assertEqual(
+            self.stored_data(session.session_key), {"colour": "blue"}
+        )
+
+    def test_reads_sessions_created_by_database_engine(self) -> None:
+        """Test that sessions saved by the plain DB engine are loaded."""
+        session = DBStore()
+        session["colour"] = "blue"
+        session.save()
+        self.assertEqual(
+            SessionStore(session.session_key)["colour"], "blue"
+        )
+
+    def test_cached_session_loads_without_queries(self) -> None:
+        """Test that a second load is served from the process tier."""
+        session = DBStore()
+        session["colour"] = "blue"
+        session.save()
+        SessionStore(session.session_key).load()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                SessionStore(session.session_key)["colour"], "blue"
+            )
+
+    def test_changes_are_written_behind(self) -> None:
+        """Test that updates reach the database only when flushed."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        session["colour"] = "red"
+
+        with self.assertNumQueries(0):
+            session.save()
+
+        self.assertEqual(
+            SessionStore(session.session_key)["colour"], "red"
+        )
+        self.assertEqual(
+            self.stored_data(session.session_key), {"colour": "blue"}
+        )
+        self.assertEqual(flush_pending(), 1)
+        self.assertEqual(
+            self.stored_data(session.session_key), {"colour": "red"}
+        )
+
+    def test_login_is_written_immediately(self) -> None:
+        """Test that a changed login skips the queue, with what it held."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        session["colour"] = "red"
+        session.save()
+        session.cycle_key()
+        session[auth.SESSION_KEY] = "edith@example.com"
+        session.save()
+        self.assertEqual(
+            self.stored_data(session.session_key),
+            {"colour": "red", auth.SESSION_KEY: "edith@example.com"},
+        )
+        self.assertFalse(sessions._pending)
+
+    def test_login_in_existing_session_is_written(self) -> None:
+        """Test that auth keys reach the database without a flush."""
+        session = SessionStore()
+        session.save()
+        session[auth.SESSION_KEY] = "edith@example.com"
+        session[auth.BACKEND_SESSION_KEY] = "backend"
+        session.save()
+        self.assertEqual(
+            self.stored_data(session.session_key)[auth.SESSION_KEY],
+            "edith@example.com",
+        )
+
+    def test_flush_does_not_restore_deleted_session(self) -> None:
+        """Test that a queued change to a deleted session is dropped."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        session["colour"] = "red"
+        session.save()
+        Session.objects.filter(session_key=session.session_key).delete()
+        flush_pending()
+        self.assertFalse(
+            Session.objects.filter(session_key=session.session_key).exists()
+        )
+
+    def test_delete_removes_session_from_every_tier(self) -> None:
+        """Test that a deleted session can no longer be loaded."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        session_key = session.session_key
+        session.delete()
+        self.assertFalse(SessionStore().exists(session_key))
+        self.assertEqual(SessionStore(session_key).load(), {})
+
+    def test_flush_deletes_session_at_once(self) -> None:
+        """Test that flushing drops the row and any queued change."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        session_key = session.session_key
+        session["colour"] = "red"
+        session.save()
+        session.flush()
+        self.assertFalse(
+            Session.objects.filter(session_key=session_key).exists()
+        )
+        self.assertFalse(sessions._pending)
+
+    def test_cycle_key_writes_queued_changes_at_once(self) -> None:
+        """Test that a new key holds the latest data before any flush."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        old_key = session.session_key
+        session["colour"] = "red"
+        session.save()
+        session.cycle_key()
+        self.assertEqual(
+            self.stored_data(session.session_key), {"colour": "red"}
+        )
+        self.assertFalse(Session.objects.filter(session_key=old_key).exists())
+        self.assertFalse(sessions._pending)
+
+    def test_process_tier_lasts_one_request_without_shared_cache(
+        self,
+    ) -> None:
+        """Test that a session deleted by another worker is not served."""
+        session = SessionStore()
+        session["colour"] = "blue"
+        session.save()
+        request_finished.send(sender=None)
+        Session.objects.filter(session_key=session.session_key).delete()
+        self.assertEqual(SessionStore(session.session_key).load(), {})
+
+    def test_process_tier_checks_shared_cache(self) -> None:
+        """Test that a local hit is dropped once the shared tier forgets."""
+        shared = caches["default"]
+        self.addCleanup(shared.clear)
+
+        with patch.object(session_cache, "shared_alias", "default"):
+            session = SessionStore()
+            session["colour"] = "blue"
+            session.save()
+            request_finished.send(sender=None)
+            session_key = session.session_key
+            self.assertEqual(SessionStore(session_key)["colour"], "blue")
+            Session.objects.filter(session_key=session_key).delete()
+            shared.delete(session_cache.make_key(session_key))
+            self.assertEqual(SessionStore(session_key).load(), {})
+
+    def test_login_is_flushed_when_request_finishes(self) -> None:
+        """Test that session changes made by a view reach the database."""
+        user = User.objects.create(email="edith@example.com")
+        self.client.force_login(user)
+        self.client.get("/")
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertEqual(
+            self.stored_data(session_key)[auth.SESSION_KEY], user.pk
+        )
+        self.assertFalse(sessions._pending)
+
+    def test_clear_expired_deletes_in_batches(self) -> None:
+        """Test that expired sessions are swept a batch at a time."""
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(
+                session_key=f"key{n}", session_data="", expire_date=expired
+            )
+            for n in range(5)
+        )
+        live = SessionStore()
+        live.save()
+        config = dict(settings.SESSION_CACHE, CLEAR_EXPIRED_BATCH_SIZE=2)
+
+        with patch.object(sessions, "_config", config):
+            with self.assertNumQueries(
+                3 * 2 + 1, using=settings.AUTH_DATA_DATABASE
+            ):
+                deleted = SessionStore.clear_expired()
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(
+            list(Session.objects.values_list("session_key", flat=True)),
+            [live.session_key],
+        )
@@ -2,9 +2,12 @@
 from unittest.mock import call, MagicMock, patch
 from django.db.models.manager import Manager
 
-from django.test import TestCase
+from django.core import mail
+from django.test import TestCase, override_settings
 
-from accounts.models import Token
+from accounts.models import LoginEmail, Token
+from accounts.ratelimit import login_email_limiter
+from functional_tests.budgets import BudgetTestMixin
 
 
 @patch("accounts.views.auth")
@@ -45,6 +48,10 @@ class LoginViewTest(TestCase):
 class SendLoginEmailViewTest(TestCase):
     """Test suite for testing emails."""
 
+    def setUp(self) -> None:
+        """Start with full rate limit buckets."""
+        login_email_limiter.reset()
+
     def test_redirects_to_home_page(self) -> None:
         """Test after sending email user is redirected to home page."""
         response = self.client.post(
@@ -53,21 +60,36 @@ class SendLoginEmailViewTest(TestCase):
         )
         self.assertRedirects(response, "/")
 
-    @patch("accounts.views.send_mail")
-    def test_sends_mail_to_address_from_post(
-        self, mock_send_mail: MagicMock
-    ) -> None:
-        """Test successfully send email when user logs in."""
+    def test_queues_mail_to_address_from_post(self) -> None:
+        """Test that a login email is queued for the posted address."""
+        self.client.post(
+            "/accounts/send_login_email",
+            data={"email": "thewchan.misc@gmail.com"},
+        )
+
+        login_email = LoginEmail.objects.get()
+        self.assertEqual(login_email.subject, "Your login link for Superlists")
+        self.assertEqual(login_email.email, "thewchan.misc@gmail.com")
+
+    def test_does_not_send_mail_during_request(self) -> None:
+        """Test that the view leaves sending to the worker."""
         self.client.post(
             "/accounts/send_login_email",
             data={"email": "thewchan.misc@gmail.com"},
         )
+        self.assertEqual(mail.outbox, [])
 
-        self.assertEqual(mock_send_mail.called, True)
-        (subject, body, from_email, to_list), kwargs = mock_send_mail.call_args
-        self.assertEqual(subject, "Your login link for Superlists")
-        self.assertEqual(from_email, "noreply@superlists")
-        self.assertEqual(to_list, ["thewchan.misc@gmail.com"])
+    def test_repeated_requests_queue_one_email(self) -> None:
+        """Test that requests for the same address coalesce."""
+        for _ in range(3):
+            self.client.post(
+                "/accounts/send_login_email",
+                data={"email": "thewchan.misc@gmail.com"},
+            )
+
+        login_email = LoginEmail.objects.get()
+        token = Token.objects.order_by("-id").first()
+        self.assertIn(token.uid, login_email.body)
 
     def test_adds_success_message(self) -> None:
         """Test successful messaging."""
@@ -84,10 +106,7 @@ class SendLoginEmailViewTest(TestCase):
         )
         self.assertEqual(message.tags, "success")
 
-    @patch("accounts.views.send_mail")
-    def test_sends_link_to_login_using_token_uid(
-        self, mock_send_mail: MagicMock
-    ) -> None:
+    def test_queues_link_to_login_using_token_uid(self) -> None:
         """Test token works with sending login email."""
         self.client.post(
             "/accounts/send_login_email",
@@ -95,8 +114,7 @@ class SendLoginEmailViewTest(TestCase):
         )
         token = Token.objects.first()
         expected_url = f"http://testserver/accounts/login?token={token.uid}"
-        (subject, body, from_email, to_list), kwargs = mock_send_mail.call_args
-        self.assertIn(expected_url, body)
+        self.assertIn(expected_url, LoginEmail.objects.get().body)
 
     def test_creates_token_associated_with_email(self) -> None:
         """Test successful creation of token."""
@@ -106,3 +124,57 @@ class SendLoginEmailViewTest(TestCase):
         )
         token = Token.objects.first()
         self.assertEqual(token.email, "thewchan.misc@gmail.com")
+
+
+class AccountsViewBudgetTest(BudgetTestMixin, TestCase):
+    """Test suite keeping account views within their budgets."""
+
+    def setUp(self) -> None:
+        """Seed a large list and log in."""
+        login_email_limiter.reset()
+        self.seed_budget_data()
+
+    def test_send_login_email(self) -> None:
+        """Test the budget for requesting a login email."""
+        self.assertWithinBudget(
+            "send_login_email",
+            "post",
+            "/accounts/send_login_email",
+            status_code=302,
+            data={"email": "edith@example.com"},
+        )
+
+    def test_login(self) -> None:
+        """Test the budget for logging in with a token."""
+        token = Token.objects.create(email="edith@example.com")
+
+        self.assertWithinBudget(
+            "login",
+            "get",
+            f"/accounts/login?token={token.uid}",
+            status_code=302,
+        )
+
+
+@override_settings(AUTH_DATA_DATABASE="auth")
+class SeparateAuthBudgetTest(AccountsViewBudgetTest):
+    """Test suite keeping account views within budget, login data apart."""
+
+    multi_db = True
+
+    def test_counts_queries_in_every_database(self) -> None:
+        """Test that queries on the auth database count against budget."""
+        context = self.assertWithinBudget(
+            "send_login_email",
+            "post",
+            "/accounts/send_login_email",
+            status_code=302,
+            data={"email": "edith@example.com"},
+        )
+
+        self.assertTrue(
+            any(
+                "accounts_token" in query["sql"]
+                for query in context.captured_queries
+            )
+        )
@@ -1,27 +1,47 @@
 """The views of the accounts app."""
+import math
+
 from django.contrib import auth, messages
-from django.core.mail import send_mail
 from django.core.urlresolvers import reverse
+from django.db import router, transaction
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect
 
-from accounts.models import Token
+from accounts.models import LoginEmail, Token
+from accounts.ratelimit import login_email_buckets, login_email_limiter
 
 
 def send_login_email(request: HttpRequest) -> HttpResponse:
-    """Send login email for users trying to login."""
+    """Queue a login email for users trying to login.
+
+    The send_login_emails worker delivers it, so the request does not wait
+    on the mail server. Requests over the rate limit get a 429 without
+    touching the database.
+    """
     email = request.POST["email"]
-    token = Token.objects.create(email=email)
-    url = request.build_absolute_uri(
-        reverse("login") + "?token=" + str(token.uid)
-    )
-    message_body = f"Use this link to log in:\n\n{url}"
-    send_mail(
-        "Your login link for Superlists",
-        message_body,
-        "noreply@superlists",
-        [email]
+    wait = login_email_limiter.take(
+        login_email_buckets(request, email), "send_login_email"
     )
+
+    if wait:
+        response = HttpResponse(
+            "Too many login emails requested, please try again later.",
+            content_type="text/plain",
+            status=429,
+        )
+        response["Retry-After"] = str(math.ceil(wait))
+
+        return response
+
+    with transaction.atomic(using=router.db_for_write(Token)):
+        token = Token.objects.create(email=email)
+        url = request.build_absolute_uri(
+            reverse("login") + "?token=" + str(token.uid)
+        )
+        message_body = f"Use this link to log in:\n\n{url}"
+        LoginEmail.objects.enqueue(
+            email, "Your login link for Superlists", message_body
+        )
     messages.success(
         request,
         "Check your email, we've sent you a link you can use to log in."
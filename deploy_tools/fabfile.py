@@ -42,6 +42,8 @@ def _create_or_update_dotenv() -> None:
     """Create or update environment file as needed."""
     append(".env", "DJANGO_DEBUG_FALSE=y")
     append(".env", f"SITENAME={env.host}")
+    append(".env", "DJANGO_DB_PROFILE=production")
+    append(".env", "DJANGO_AUTH_DATABASE=auth")
     current_contents = run("cat .env")
     if "DJANGO_SECRET_KEY" not in current_contents:
         new_secret = "".join(
@@ -53,10 +55,18 @@ def _create_or_update_dotenv() -> None:
 
 
 def _update_static_files() -> None:
-    """Update static files as needed."""
+    """Collect hashed, precompressed static files as needed."""
     run("./virtualenv/bin/python manage.py collectstatic --noinput")
 
 
 def _update_database() -> None:
     """Migrate database as necessary."""
     run("./virtualenv/bin/python manage.py migrate --noinput")
+    run(
+        "./virtualenv/bin/python manage.py migrate --noinput "
+        "--database auth"
+    )
+    run(
+        "./virtualenv/bin/python manage.py migrate --noinput "
+        "--database ids"
+    )
@@ -0,0 +1,115 @@
+"""Helpers shared by the benchmark management commands."""
+import os
+import resource
+import shutil
+import struct
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Sequence
+
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from superlists.replicas import primary_of
+
+
+@contextmanager
+def scratch_database(alias: str = "default"):
+    """Run against freshly migrated, throwaway SQLite files.
+
+    Like the test runner, this points every configured database at a test
+    database and sets up the test environment (locmem email, testserver
+    host), so benchmarks never touch real data. Each primary gets a
+    scratch file of its own, and each replica reads its primary's file.
+    Yields the path of alias's file.
+    """
+    aliases = list(connections.databases)
+
+    for name in aliases:
+        if connections[name].vendor != "sqlite":
+            raise CommandError("Benchmarks need a SQLite database.")
+
+    directory = tempfile.mkdtemp(prefix="superlists-bench-")
+    setup_test_environment()
+    created = []
+    mirrored = []
+
+    try:
+        for name in aliases:
+            if primary_of(name) != name:
+                continue
+
+            connection = connections[name]
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                directory, f"bench-{name}.sqlite3"
+            )
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            created.append((connection, old_name))
+
+        for name in aliases:
+            if primary_of(name) != name:
+                connection = connections[name]
+                mirrored.append((connection, connection.settings_dict["NAME"]))
+                connection.close()
+                connection.creation.set_as_test_mirror(
+                    connections[primary_of(name)].settings_dict
+                )
+
+        yield connections[alias].settings_dict["NAME"]
+
+    finally:
+        for connection, old_name in mirrored:
+            connection.close()
+            connection.settings_dict["NAME"] = old_name
+
+        for connection, old_name in reversed(created):
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        teardown_test_environment()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def sqlite_change_counter(path: str) -> int:
+    """Return the file change counter from a SQLite database header.
+
+    SQLite increments it once per committed write transaction in rollback
+    journal mode, so differences count commits (and their fsyncs).
+    """
+    with open(path, "rb") as database:
+        database.seek(24)
+
+        return struct.unpack(">I", database.read(4))[0]
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of already sorted values."""
+    index = max(0, round(fraction * len(sorted_values)) - 1)
+
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """Return ops/sec and p50/p95/p99 latency in ms of timed operations."""
+    ordered = sorted(latencies)
+
+    return {
+        "ops_per_sec": len(ordered) / sum(ordered),
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+    }
+
+
+def peak_rss_kb() -> int:
+    """Return this process's peak resident set size in kilobytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
@@ -0,0 +1,181 @@
+"""Query-count and latency budgets for the site's views, for use in tests."""
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List as ListType, NamedTuple
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from lists.models import (
+    List,
+    item_ids,
+    list_ids,
+    new_item_id,
+    new_list_id,
+)
+from superlists.sessions import flush_pending
+
+
+class Budget(NamedTuple):
+    """Most SQL queries and wall-clock seconds one request may take."""
+
+    queries: int
+    seconds: float
+
+
+# Measured against the data made by BudgetTestMixin.seed_budget_data with
+# a logged-in user, and named after the bench scenarios. Lower these when a
+# view gets cheaper; raising one should be a deliberate decision in review.
+BUDGETS: Dict[str, Budget] = {
+    "home": Budget(queries=1, seconds=0.2),
+    "view_list_get": Budget(queries=3, seconds=0.3),
+    "view_list_post": Budget(queries=5, seconds=0.2),
+    "new_list": Budget(queries=7, seconds=0.2),
+    "login": Budget(queries=10, seconds=0.2),
+    "send_login_email": Budget(queries=7, seconds=0.2),
+}
+
+# Scales every time ceiling, e.g. BUDGET_TIME_FACTOR=3 on slow CI machines.
+TIME_FACTOR = float(os.environ.get("BUDGET_TIME_FACTOR", "1"))
+
+SEED_ITEMS = 200
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def fingerprint(sql: str) -> str:
+    """Return SQL with literal values replaced, to spot repeated queries."""
+    return _LITERALS.sub("?", sql)
+
+
+def describe_overrun(
+    name: str, budget: Budget, queries: ListType[Dict]
+) -> str:
+    """Return a diff-style report of queries beyond a budget.
+
+    Queries within budget are prefixed with two spaces and those over it
+    with "+ ". Statements that ran more than once, the usual sign of an
+    N+1 pattern, are listed with their counts.
+    """
+    lines = [
+        f"{name} ran {len(queries)} queries, budget is {budget.queries}:"
+    ]
+
+    for number, query in enumerate(queries, 1):
+        marker = "+ " if number > budget.queries else "  "
+        lines.append(f"{marker}{number}. {query['sql']}")
+
+    repeated = Counter(fingerprint(query["sql"]) for query in queries)
+    repeated = [(sql, n) for sql, n in repeated.items() if n > 1]
+
+    if repeated:
+        lines.append("Repeated statements:")
+        lines.extend(f"  {n}x {sql}" for sql, n in repeated)
+
+    return "\n".join(lines)
+
+
+class CaptureAllQueriesContext:
+    """Capture the queries run on every database connection.
+
+    Login data, list shards and replicas may each have their own database,
+    and a request's queries are the sum over all of them.
+    """
+
+    def __init__(self):
+        """Initialize one capture per configured database.
+
+        Aliases sharing a connection, as test mirrors do, are captured once.
+        """
+        unique = {
+            id(connection): connection for connection in connections.all()
+        }
+        self.contexts = [
+            CaptureQueriesContext(connection) for connection in unique.values()
+        ]
+
+    def __enter__(self) -> "CaptureAllQueriesContext":
+        """Start capturing on every connection."""
+        for context in self.contexts:
+            context.__enter__()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop capturing on every connection."""
+        for context in reversed(self.contexts):
+            context.__exit__(*exc_info)
+
+    @property
+    def captured_queries(self) -> ListType[Dict]:
+        """Return the captured queries, database by database."""
+        return [
+            query
+            for context in self.contexts
+            for query in context.captured_queries
+        ]
+
+
+class BudgetTestMixin:
+    """Test case mixin asserting that requests stay within budget."""
+
+    def seed_budget_data(self) -> List:
+        """Log the test client in and create a list with many items.
+
+        Returns the seeded list.
+        """
+        user = User.objects.create(email="budget@example.com")
+        self.client.force_login(user)
+        # Write the login session now, not during the first measured request.
+        flush_pending()
+        list_ = List.objects.create_with_items(
+            f"item {n}" for n in range(SEED_ITEMS)
+        )
+        # While sharded, ids are reserved a block at a time, not by every
+        # request, so start the measured requests with fresh blocks.
+        list_ids.reset()
+        item_ids.reset()
+        new_list_id()
+        new_item_id()
+
+        return list_
+
+    def assertWithinBudget(  # noqa: N802
+        self,
+        budget_name: str,
+        method: str,
+        path: str,
+        status_code: int = 200,
+        **request,
+    ) -> CaptureAllQueriesContext:
+        """Make a request with the test client and fail if it is over budget.
+
+        The response must have status_code first: an error page is often
+        cheaper than the page itself. Returns the captured queries.
+        """
+        budget = BUDGETS[budget_name]
+
+        with CaptureAllQueriesContext() as context:
+            start = time.perf_counter()
+            response = getattr(self.client, method)(path, **request)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, status_code)
+
+        if len(context.captured_queries) > budget.queries:
+            self.fail(
+                describe_overrun(budget_name, budget, context.captured_queries)
+            )
+
+        ceiling = budget.seconds * TIME_FACTOR
+
+        if elapsed > ceiling:
+            self.fail(
+                f"{budget_name} took {elapsed:.3f}s, "
+                f"budget is {ceiling:.3f}s"
+            )
+
+        return context
@@ -0,0 +1,158 @@
+"""Management command benchmarking the lists and accounts views."""
+import itertools
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from accounts.models import Token
+from functional_tests.benchmarking import (
+    latency_summary,
+    peak_rss_kb,
+    scratch_database,
+)
+from functional_tests.budgets import CaptureAllQueriesContext
+from functional_tests.management.commands.create_session import (
+    create_pre_authenticated_session,
+)
+from lists.models import List
+
+
+SCENARIOS = (
+    "home",
+    "view_list_get",
+    "view_list_post",
+    "new_list",
+    "send_login_email",
+    "login",
+)
+
+
+class Command(BaseCommand):
+    """Drive the views through the test client and report as JSON."""
+
+    help = (
+        "Seed a scratch database, then report ops/sec, latency percentiles, "
+        "queries per request and peak RSS for each view."
+    )
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument("--lists", type=int, default=20)
+        parser.add_argument("--items", type=int, default=100)
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=SCENARIOS,
+            help="Scenario to run, repeatable. Defaults to all of them.",
+        )
+
+    def handle(self, *args, **options):
+        if options["lists"] < 1 or options["users"] < 1:
+            raise CommandError("Need at least one list and one user.")
+
+        rng = random.Random(options["seed"])
+        report = {"options": {
+            key: options[key]
+            for key in ("lists", "items", "users", "iterations", "seed")
+        }}
+
+        with scratch_database():
+            list_ids = [
+                List.objects.create_with_items(
+                    f"item {n}" for n in range(options["items"])
+                ).id
+                for _ in range(options["lists"])
+            ]
+            clients = []
+
+            for n in range(options["users"]):
+                client = Client()
+                client.cookies[settings.SESSION_COOKIE_NAME] = (
+                    create_pre_authenticated_session(f"user{n}@example.com")
+                )
+                clients.append(client)
+
+            for scenario in options["scenario"] or SCENARIOS:
+                request = getattr(self, f"request_{scenario}")
+                report[scenario] = self.run_scenario(
+                    request, clients, list_ids, rng, options["iterations"]
+                )
+
+        report["peak_rss_kb"] = peak_rss_kb()
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_scenario(self, request, clients, list_ids, rng, iterations):
+        """Time iterations of one scenario and summarize them."""
+        latencies, queries = [], []
+        counter = itertools.count()
+
+        for _ in range(iterations):
+            client = rng.choice(clients)
+            list_id = rng.choice(list_ids)
+            prepare = request(client, list_id, next(counter))
+
+            with CaptureAllQueriesContext() as context:
+                start = time.perf_counter()
+                response = prepare()
+                latencies.append(time.perf_counter() - start)
+
+            if response.status_code >= 400:
+                raise CommandError(
+                    f"{request.__name__} got HTTP {response.status_code}"
+                )
+
+            queries.append(len(context.captured_queries))
+
+        summary = latency_summary(latencies)
+        summary["queries_per_request"] = sum(queries) / len(queries)
+
+        return summary
+
+    # Each request_* method does any untimed setup and returns a callable
+    # making the timed request.
+
+    def request_home(self, client, list_id, n):
+        """GET the home page."""
+        return lambda: client.get("/")
+
+    def request_view_list_get(self, client, list_id, n):
+        """GET a list page."""
+        return lambda: client.get(f"/lists/{list_id}/")
+
+    def request_view_list_post(self, client, list_id, n):
+        """POST a new item to a list."""
+        return lambda: client.post(
+            f"/lists/{list_id}/", data={"text": f"bench item {n}"}
+        )
+
+    def request_new_list(self, client, list_id, n):
+        """POST a new list."""
+        return lambda: client.post("/lists/new", data={"text": f"new {n}"})
+
+    def request_send_login_email(self, client, list_id, n):
+        """POST a login email request from a client address of its own.
+
+        Each request draws from fresh email and address buckets, so the
+        rate limiter is timed without it refusing the run.
+        """
+        header = settings.RATE_LIMIT["CLIENT_IP_HEADER"] or "REMOTE_ADDR"
+        address = f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"
+
+        return lambda: client.post(
+            "/accounts/send_login_email",
+            data={"email": f"login{n}@example.com"},
+            **{header: address},
+        )
+
+    def request_login(self, client, list_id, n):
+        """GET the login link of a fresh token."""
+        token = Token.objects.create(email=f"login{n}@example.com")
+
+        return lambda: Client().get(f"/accounts/login?token={token.uid}")
@@ -0,0 +1,295 @@
+"""Management command measuring SQLite writes from concurrent workers."""
+import copy
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import (
+    OperationalError,
+    close_old_connections,
+    connections,
+    transaction,
+)
+from django.db.utils import load_backend
+from django.test import override_settings
+
+from functional_tests.benchmarking import latency_summary, scratch_database
+from accounts.models import Token
+from lists.coalescer import ItemWriteCoalescer
+from lists.models import Item, List
+
+
+PROFILES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "CONN_MAX_AGE": 0,
+        "OPTIONS": {},
+    },
+    "production": settings.SQLITE_PRODUCTION_PROFILE,
+}
+
+
+class Command(BaseCommand):
+    """Compare write throughput and lock errors of the database profiles."""
+
+    help = (
+        "Run several worker processes adding items to the same scratch "
+        "SQLite database and report writes/sec and lock-error rate per "
+        "database profile as JSON."
+    )
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--writes", type=int, default=200)
+        parser.add_argument("--lists", type=int, default=10)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Request threads per worker process.",
+        )
+        parser.add_argument(
+            "--coalesce",
+            action="store_true",
+            help="Group the inserts of each process's threads into batches.",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=1,
+            help="Spread the lists over this many SQLite files.",
+        )
+        parser.add_argument(
+            "--login-workers",
+            type=int,
+            default=0,
+            help="Processes creating and using login tokens meanwhile.",
+        )
+        parser.add_argument(
+            "--separate-auth",
+            action="store_true",
+            help="Keep login data in its own SQLite file.",
+        )
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=sorted(PROFILES),
+            help="Profile to run, repeatable. Defaults to all of them.",
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        shards = ["default"] + [
+            f"lists_{n}" for n in range(1, options["shards"])
+        ]
+
+        for alias in shards[1:]:
+            if alias not in connections.databases:
+                connections.databases[alias] = {
+                    "ENGINE": "django.db.backends.sqlite3"
+                }
+                connections.ensure_defaults(alias)
+                connections.prepare_test_settings(alias)
+
+        originals = {alias: connections[alias] for alias in connections}
+        used = shards + (["ids"] if shards[1:] else [])
+        used += ["auth"] if options["separate_auth"] else []
+
+        try:
+            for name in options["profile"] or sorted(PROFILES):
+                with override_settings(
+                    LIST_SHARDS=shards
+                ), scratch_database() as path:
+                    paths = {
+                        alias: connections[alias].settings_dict["NAME"]
+                        for alias in used
+                    }
+                    paths.setdefault("auth", path)
+
+                    with override_settings(AUTH_DATA_DATABASE="auth"):
+                        results[name] = self.run_profile(
+                            name, paths, options
+                        )
+
+        finally:
+            for alias, connection in originals.items():
+                setattr(connections._connections, alias, connection)
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run_profile(self, name: str, paths: dict, options: dict) -> dict:
+        """Seed the database, then time workers writing to it at once."""
+        list_ids = [
+            List.objects.create_with_items(["seed"]).id
+            for _ in range(options["lists"])
+        ]
+        # Switch the journal mode once, before the workers race to do it.
+        for alias, path in paths.items():
+            use_profile(name, path, alias).ensure_connection()
+
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        logins = context.Queue()
+        start = context.Event()
+        stop = context.Event()
+        workers = [
+            context.Process(
+                target=write_items,
+                args=(name, paths, list_ids, options, start, queue),
+            )
+            for _ in range(options["workers"])
+        ]
+        login_workers = [
+            context.Process(
+                target=log_in, args=(name, paths, start, stop, logins)
+            )
+            for _ in range(options["login_workers"])
+        ]
+
+        for worker in workers + login_workers:
+            worker.start()
+
+        began = time.perf_counter()
+        start.set()
+        reports = [queue.get() for _ in workers]
+        elapsed = time.perf_counter() - began
+        stop.set()
+        login_count = sum(logins.get() for _ in login_workers)
+
+        for worker in workers + login_workers:
+            worker.join()
+
+        latencies = [
+            latency for report in reports for latency in report["latencies"]
+        ]
+        lock_errors = sum(report["lock_errors"] for report in reports)
+        attempted = options["workers"] * options["writes"]
+
+        return {
+            "workers": options["workers"],
+            "threads": options["threads"],
+            "coalesce": options["coalesce"],
+            "shards": options["shards"],
+            "login_workers": options["login_workers"],
+            "separate_auth": options["separate_auth"],
+            "logins_per_sec": login_count / elapsed,
+            "writes": len(latencies),
+            "writes_per_sec": len(latencies) / elapsed,
+            "lock_errors": lock_errors,
+            "lock_error_rate": lock_errors / attempted,
+            **latency_summary(latencies or [0.0]),
+        }
+
+
+def use_profile(name: str, path: str, alias: str = "default"):
+    """Point this process's connection to alias at path using a profile."""
+    settings_dict = copy.deepcopy(connections.databases[alias])
+    settings_dict.update(copy.deepcopy(PROFILES[name]))
+    settings_dict["NAME"] = path
+    backend = load_backend(settings_dict["ENGINE"])
+    connection = backend.DatabaseWrapper(settings_dict, alias)
+    setattr(connections._connections, alias, connection)
+
+    return connection
+
+
+def use_profiles(name: str, paths: dict) -> None:
+    """Point this process's connections at their files using a profile."""
+    for alias, path in paths.items():
+        use_profile(name, path, alias)
+
+
+def log_in(name, paths, start, stop, queue) -> None:
+    """Create and use up login tokens until stopped, reporting how many."""
+    use_profiles(name, paths)
+    start.wait()
+    count = 0
+
+    while not stop.is_set():
+        try:
+            token = Token.objects.create(email=f"{os.getpid()}@example.com")
+            Token.objects.consume(token.uid)
+
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+
+        else:
+            count += 1
+
+        close_old_connections()
+
+    queue.put(count)
+
+
+def write_items(name, paths, list_ids, options, start, queue) -> None:
+    """Add items from several request threads of one worker process."""
+    coalescer = ItemWriteCoalescer() if options["coalesce"] else None
+    reports = []
+    per_thread = options["writes"] // options["threads"]
+    threads = [
+        threading.Thread(
+            target=write_from_thread,
+            args=(
+                name, paths, list_ids, per_thread, coalescer, start, reports
+            ),
+        )
+        for _ in range(options["threads"])
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    queue.put({
+        "latencies": [
+            latency for report in reports for latency in report["latencies"]
+        ],
+        "lock_errors": sum(report["lock_errors"] for report in reports),
+    })
+
+
+def write_from_thread(
+    name, paths, list_ids, writes, coalescer, start, reports
+) -> None:
+    """Add items like the list view does, one simulated request each."""
+    use_profiles(name, paths)
+    start.wait()
+    latencies = []
+    lock_errors = 0
+
+    for n in range(writes):
+        began = time.perf_counter()
+        text = f"{os.getpid()} {threading.get_ident()} {n}"
+
+        try:
+            list_ = List.objects.find(list_ids[n % len(list_ids)])
+
+            if coalescer is None:
+                with transaction.atomic(using=list_.database):
+                    Item.objects.create(list=list_, text=text)
+
+            else:
+                coalescer.submit(list_, text)
+
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+
+            lock_errors += 1
+
+        else:
+            latencies.append(time.perf_counter() - began)
+
+        # Close or keep the connection as at the end of a request.
+        close_old_connections()
+
+    reports.append({"latencies": latencies, "lock_errors": lock_errors})
@@ -0,0 +1,67 @@
+"""Management command counting SQLite commits per new list."""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import reverse
+from django.test import Client
+
+from functional_tests.benchmarking import (
+    scratch_database,
+    sqlite_change_counter,
+)
+from lists.forms import ItemForm
+from lists.models import List
+
+
+class Command(BaseCommand):
+    """Compare commits and latency of the ways to create a new list."""
+
+    help = "Report SQLite commits and latency per new list as JSON."
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument("--lists", type=int, default=200)
+        parser.add_argument("--seed-items", type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client()
+        count = options["lists"]
+        seeds = [f"seed item {n}" for n in range(options["seed_items"])]
+        modes = {
+            "autocommit": lambda n: _create_autocommit(f"item {n}"),
+            "new_list_view": lambda n: client.post(
+                reverse("new_list"), data={"text": f"item {n}"}
+            ),
+            "create_with_items": lambda n: List.objects.create_with_items(
+                seeds
+            ),
+        }
+        results = {}
+
+        with scratch_database() as path:
+            for mode, create in modes.items():
+                commits = sqlite_change_counter(path)
+                start = time.perf_counter()
+
+                for n in range(count):
+                    create(n)
+
+                elapsed = time.perf_counter() - start
+                results[mode] = {
+                    "lists": count,
+                    "commits_per_list": (
+                        sqlite_change_counter(path) - commits
+                    ) / count,
+                    "ms_per_list": elapsed * 1000 / count,
+                }
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+
+def _create_autocommit(text: str) -> None:
+    """Create a list the way new_list did before it used a transaction."""
+    list_ = List.objects.create()
+    form = ItemForm(data={"text": text})
+    form.is_valid()
+    form.save(for_list=list_)
@@ -1,16 +1,17 @@
 """Management command for creating django session."""
+from importlib import import_module
+
 from django.conf import settings
 from django.contrib.auth import (
     BACKEND_SESSION_KEY,
     SESSION_KEY,
     get_user_model,
 )
-from django.contrib.sessions.backends.db import SessionStore
-from django.contrib.sessions.models import Session
 from django.core.management.base import BaseCommand
 
 
 User = get_user_model()
+SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
 
 
 class Command(BaseCommand):
@@ -0,0 +1,278 @@
+"""Management command bulk generating synthetic data for capacity tests."""
+import random
+import time
+import uuid
+from datetime import timedelta
+from typing import Iterator, List as ListType
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from accounts.models import Token
+from lists.models import (
+    Item,
+    List,
+    item_text_key,
+    new_item_ids,
+    new_list_ids,
+)
+from lists.sharding import ID_BLOCK_ALIAS, is_sharded, shard_for
+
+
+User = get_user_model()
+
+
+def list_sizes(
+    lists: int, items: int, distribution: str, exponent: float, rng
+) -> ListType[int]:
+    """Split items over lists, evenly or following Zipf's law.
+
+    With "zipf" the list of rank r gets a share of items proportional to
+    1 / r ** exponent, so a few lists are huge and most are small. Ranks
+    are shuffled so list ids do not correlate with size.
+    """
+    if distribution == "uniform":
+        weights = [1.0] * lists
+
+    else:
+        weights = [1 / rank ** exponent for rank in range(1, lists + 1)]
+        rng.shuffle(weights)
+
+    scale = items / sum(weights)
+    sizes = [int(weight * scale) for weight in weights]
+
+    for index in range(items - sum(sizes)):
+        sizes[index % lists] += 1
+
+    return sizes
+
+
+def batched(rows: Iterator, size: int) -> Iterator[ListType]:
+    """Yield lists of up to size rows."""
+    batch = []
+
+    for row in rows:
+        batch.append(row)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    """Populate lists, items, users, tokens and sessions in bulk."""
+
+    help = (
+        "Generate synthetic lists, items, users, tokens and sessions with "
+        "batched bulk_create inside large transactions."
+    )
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument("--lists", type=int, default=10000)
+        parser.add_argument("--items", type=int, default=1000000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--distribution", choices=("uniform", "zipf"), default="zipf"
+        )
+        parser.add_argument("--zipf-exponent", type=float, default=1.1)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--rows-per-transaction", type=int, default=500000
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--fast",
+            action="store_true",
+            help="Turn off SQLite fsyncs for this load. Unsafe on crash.",
+        )
+
+    def handle(self, *args, **options):
+        if options["lists"] < 1:
+            raise CommandError("Need at least one list.")
+
+        written = {
+            *settings.LIST_SHARDS,
+            DEFAULT_DB_ALIAS,
+            router.db_for_write(Token),
+        }
+
+        if is_sharded():
+            written.add(ID_BLOCK_ALIAS)
+
+        for alias in sorted(written):
+            if options["fast"] and connections[alias].vendor == "sqlite":
+                with connections[alias].cursor() as cursor:
+                    cursor.execute("PRAGMA synchronous = OFF")
+                    cursor.execute("PRAGMA journal_mode = MEMORY")
+
+        rng = random.Random(options["seed"])
+        self.options = options
+        start = time.perf_counter()
+        sizes = list_sizes(
+            options["lists"],
+            options["items"],
+            options["distribution"],
+            options["zipf_exponent"],
+            rng,
+        )
+        list_ids = self.create_lists(sizes)
+        self.create_items(list_ids, sizes)
+        self.create_users()
+        elapsed = time.perf_counter() - start
+        rows = options["lists"] + options["items"] + options["users"] * 3
+        self.stdout.write(
+            f"Created {options['lists']} lists, {options['items']} items "
+            f"(largest list {max(sizes)}), {options['users']} users with a "
+            f"token and session each in {elapsed:.1f}s "
+            f"({rows / elapsed:.0f} rows/s)."
+        )
+
+    def create_lists(self, sizes: ListType[int]) -> ListType[int]:
+        """Create one list per size, returning their ids in order.
+
+        While sharded, ids are reserved up front, all in one go, and each
+        list is written to its shard.
+        """
+        now = timezone.now()
+
+        if is_sharded():
+            list_ids = list(new_list_ids(len(sizes)))
+
+            for alias in settings.LIST_SHARDS:
+                self.bulk_insert(
+                    List.objects.using(alias),
+                    (
+                        List(pk=list_id, version=size, updated_at=now)
+                        for list_id, size in zip(list_ids, sizes)
+                        if shard_for(list_id) == alias
+                    ),
+                )
+
+            return list_ids
+
+        with transaction.atomic():
+            last_id = List.objects.order_by("-id").values_list(
+                "id", flat=True
+            ).first() or 0
+
+            for batch in batched(iter(sizes), self.options["batch_size"]):
+                List.objects.bulk_create(
+                    [List(version=size, updated_at=now) for size in batch]
+                )
+
+            return list(
+                List.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+
+    def create_items(
+        self, list_ids: ListType[int], sizes: ListType[int]
+    ) -> None:
+        """Create each list's items in its list's shard.
+
+        While sharded, each batch's ids are reserved in one go.
+        """
+        for alias in settings.LIST_SHARDS:
+            self.bulk_insert(
+                Item.objects.using(alias),
+                (
+                    Item(
+                        list_id=list_id,
+                        text=text,
+                        text_key=item_text_key(text),
+                    )
+                    for list_id, size in zip(list_ids, sizes)
+                    if shard_for(list_id) == alias
+                    for text in (f"item {n}" for n in range(1, size + 1))
+                ),
+                new_ids=new_item_ids,
+            )
+
+    def bulk_insert(self, objects, rows: Iterator, new_ids=None) -> None:
+        """Insert rows in batches, committing every so many rows.
+
+        new_ids, if given, is called with a batch's size and returns ids
+        for its rows, or None to leave them to SQLite.
+        """
+        batch_size = self.options["batch_size"]
+        per_transaction = max(
+            1, self.options["rows_per_transaction"] // batch_size
+        )
+        batches = batched(rows, batch_size)
+
+        while True:
+            with transaction.atomic(using=objects.db):
+                written = 0
+
+                for batch in batches:
+                    ids = new_ids(len(batch)) if new_ids else None
+
+                    for row, pk in zip(batch, ids or ()):
+                        row.pk = pk
+
+                    objects.bulk_create(batch)
+                    written += 1
+
+                    if written == per_transaction:
+                        break
+
+            if written < per_transaction:
+                break
+
+    def create_users(self) -> None:
+        """Create users, each with a login token and a logged-in session.
+
+        Tokens and sessions are committed with the users, in a transaction
+        of their own when AUTH_DATA_DATABASE keeps them apart.
+        """
+        run = uuid.uuid4().hex[:8]
+        emails = [
+            f"user{n}-{run}@example.com" for n in range(self.options["users"])
+        ]
+        backend = settings.AUTHENTICATION_BACKENDS[0]
+        expiry = timezone.now() + timedelta(
+            seconds=settings.SESSION_COOKIE_AGE
+        )
+        store = SessionStore()
+        size = self.options["batch_size"]
+
+        with transaction.atomic(), transaction.atomic(
+            using=router.db_for_write(Token)
+        ):
+            for batch in batched(iter(emails), size):
+                User.objects.bulk_create([User(email=e) for e in batch])
+                Token.objects.bulk_create(
+                    [Token(email=e, uid=str(uuid.uuid4())) for e in batch]
+                )
+                Session.objects.bulk_create(
+                    [
+                        Session(
+                            session_key=get_random_string(32),
+                            session_data=store.encode(
+                                {
+                                    SESSION_KEY: email,
+                                    BACKEND_SESSION_KEY: backend,
+                                    HASH_SESSION_KEY: "",
+                                }
+                            ),
+                            expire_date=expiry,
+                        )
+                        for email in batch
+                    ]
+                )
@@ -0,0 +1,78 @@
+"""Test runner for the database layout the environment sets up."""
+import unittest
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase
+from django.test.runner import DiscoverRunner
+
+from lists.models import item_ids, list_ids
+
+
+def iter_test_cases(suite):
+    """Yield every test in a possibly nested suite."""
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_test_cases(test)
+        else:
+            yield test
+
+
+class FreshIdBlocksResult(unittest.TextTestResult):
+    """Result starting every test without a reserved block of ids.
+
+    Tests roll back the ids database with the shards, so a block this
+    process still holds may be reserved again by the next test.
+    """
+
+    def startTest(self, test):
+        """Drop the blocks held by the id allocators."""
+        list_ids.reset()
+        item_ids.reset()
+        super().startTest(test)
+
+
+class ShardedTestRunner(DiscoverRunner):
+    """Run the suite with whatever databases the settings declare.
+
+    While lists are sharded, or login data kept in the auth database, tests
+    write outside default, so each TestCase wraps all databases in its
+    transaction.
+    Replicas are test mirrors of their primaries sharing the primary's
+    connection, so reads see rows a test has written and not committed.
+    """
+
+    def build_suite(self, *args, **kwargs):
+        """Build the suite, rolling back every database after each test."""
+        suite = super().build_suite(*args, **kwargs)
+
+        if (
+            len(settings.LIST_SHARDS) > 1
+            or settings.AUTH_DATA_DATABASE != DEFAULT_DB_ALIAS
+        ):
+            for test in iter_test_cases(suite):
+                if isinstance(test, TestCase):
+                    type(test).multi_db = True
+
+        return suite
+
+    def setup_databases(self, **kwargs):
+        """Create the test databases, mirroring each replica."""
+        for primary, replicas in settings.DATABASE_REPLICAS.items():
+            for replica in replicas:
+                connections[replica].settings_dict["TEST"]["MIRROR"] = primary
+
+        old_config = super().setup_databases(**kwargs)
+
+        for primary, replicas in settings.DATABASE_REPLICAS.items():
+            for replica in replicas:
+                connections[replica].close()
+                connections[replica] = connections[primary]
+
+        return old_config
+
+    def get_resultclass(self):
+        """Return the result class, reset ids first for each test."""
+        base = super().get_resultclass() or unittest.TextTestResult
+
+        return type("ShardedTestResult", (FreshIdBlocksResult, base), {})
@@ -0,0 +1,66 @@
+"""Test suite for the benchmark helpers."""
+import os
+import subprocess
+import sys
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Every file DJANGO_LIST_SHARDS=3 and DJANGO_REPLICAS=1 declare.
+DATABASE_FILES = [
+    f"{name}.sqlite3"
+    for name in (
+        "db",
+        "auth",
+        "ids",
+        "lists_1",
+        "lists_2",
+        "default_replica",
+        "lists_1_replica",
+        "lists_2_replica",
+    )
+]
+
+
+def file_state(path: str) -> Optional[Tuple[int, int]]:
+    """Return a file's size and modification time, or None if missing."""
+    try:
+        stat = os.stat(path)
+
+    except FileNotFoundError:
+        return None
+
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ScratchDatabaseTest(SimpleTestCase):
+    """Test suite for keeping benchmarks off the real databases."""
+
+    def test_sharded_benchmark_leaves_real_files_alone(self) -> None:
+        """Test that no shard, ids, auth or replica file is written."""
+        paths = [
+            os.path.join(settings.BASE_DIR, name) for name in DATABASE_FILES
+        ]
+        before = [file_state(path) for path in paths]
+        subprocess.run(
+            [
+                sys.executable,
+                "manage.py",
+                "bench_new_list",
+                "--lists",
+                "3",
+                "--seed-items",
+                "2",
+            ],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                "DJANGO_LIST_SHARDS": "3",
+                "DJANGO_REPLICAS": "1",
+                "DJANGO_AUTH_DATABASE": "auth",
+            },
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        self.assertEqual([file_state(path) for path in paths], before)
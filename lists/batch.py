@@ -0,0 +1,177 @@
+"""Batched add, edit and delete operations on to-do list items."""
+from typing import Dict, List as ListType, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import CharField, TextField, Value
+from django.db.models.functions import Cast, Concat
+
+from lists.forms import DUPLICATE_ITEM_ERROR, EMPTY_ITEM_ERROR
+from lists.models import Item, List, item_text_key, new_item_id
+
+
+INVALID_OPERATION_ERROR = "Not a valid operation"
+NO_SUCH_ITEM_ERROR = "That item is not in this list"
+
+OPERATIONS = ("add", "edit", "delete")
+
+
+def _parse_operation(operation) -> Tuple[Optional[str], Optional[int], str]:
+    """Return (kind, item id, text) of an operation, kind None if invalid."""
+    if not isinstance(operation, dict):
+        return None, None, ""
+
+    kind = operation.get("op")
+    item_id = operation.get("id")
+    text = operation.get("text", "")
+
+    if (
+        kind not in OPERATIONS
+        or not isinstance(text, str)
+        or (kind != "add" and not isinstance(item_id, int))
+    ):
+        return None, None, ""
+
+    return kind, item_id, text.strip()
+
+
+def apply_item_operations(list_: List, operations: ListType) -> ListType[Dict]:
+    """Apply operations to a list's items in one transaction.
+
+    Operations take effect in order, as if applied one at a time, but the
+    database sees one set-based query per kind of lookup, a bulk delete,
+    one update per edited item and a bulk insert. When several items are
+    edited they are first moved to placeholder keys in one more update,
+    so that texts may pass between them. Duplicates are compared by
+    normalized text key. Each operation gets a result dict with an "ok"
+    or "error" status. If rebalance_lists moves the list meanwhile, the
+    operations are applied in the shard it went to.
+    """
+    parsed = [_parse_operation(operation) for operation in operations]
+
+    while True:
+        results = _apply_in_database(list_, parsed)
+
+        if results is not None:
+            return results
+
+        list_ = List.objects.relocate(list_.id)
+
+
+def _apply_in_database(
+    list_: List, parsed: ListType[Tuple[Optional[str], Optional[int], str]]
+) -> Optional[ListType[Dict]]:
+    """Apply parsed operations where the list was loaded from.
+
+    Returns None, having written nothing, if the list is no longer there.
+    """
+    item_ids = {item_id for kind, item_id, _ in parsed if kind != "add"}
+    keys = {
+        item_text_key(text)
+        for kind, _, text in parsed
+        if kind in ("add", "edit")
+    }
+    results = []
+    creates, updates, deletes = {}, {}, set()
+    using = list_.database
+    items = Item.objects.using(using)
+
+    with transaction.atomic(using=using):
+        if not List.objects.db_manager(using).lock([list_.id]):
+            return None
+
+        known = dict(
+            items.filter(list=list_, id__in=item_ids).values_list(
+                "id", "text_key"
+            )
+        )
+        taken = set(
+            items.filter(list=list_, text_key__in=keys).values_list(
+                "text_key", flat=True
+            )
+        )
+
+        for kind, item_id, text in parsed:
+            error = None
+            key = item_text_key(text)
+
+            if kind is None:
+                error = INVALID_OPERATION_ERROR
+
+            elif kind != "add" and item_id not in known:
+                error = NO_SUCH_ITEM_ERROR
+
+            elif kind != "delete" and not text:
+                error = EMPTY_ITEM_ERROR
+
+            elif kind == "add":
+                if key in taken:
+                    error = DUPLICATE_ITEM_ERROR
+
+                else:
+                    taken.add(key)
+                    creates[key] = text
+
+            elif kind == "edit":
+                if key != known[item_id] and key in taken:
+                    error = DUPLICATE_ITEM_ERROR
+
+                else:
+                    taken.discard(known[item_id])
+                    taken.add(key)
+                    known[item_id] = key
+                    updates[item_id] = text
+
+            else:
+                taken.discard(known.pop(item_id))
+                updates.pop(item_id, None)
+                deletes.add(item_id)
+
+            if error is None:
+                results.append({"op": kind, "status": "ok", "id": item_id})
+
+            else:
+                results.append({"op": kind, "status": "error", "error": error})
+
+        if deletes:
+            items.filter(list=list_, id__in=deletes).delete()
+
+        if len(updates) > 1:
+            # Edits may swap texts, e.g. a -> b and b -> a, which clash
+            # in any order unless the old keys are out of the way first.
+            items.filter(id__in=updates).update(
+                text_key=Concat(
+                    Value("-"),
+                    Cast("id", TextField()),
+                    output_field=CharField(),
+                )
+            )
+
+        for item_id, text in updates.items():
+            items.filter(id=item_id).update(
+                text=text, text_key=item_text_key(text)
+            )
+
+        if creates:
+            items.bulk_create(
+                [
+                    Item(
+                        pk=new_item_id(), list=list_, text=text, text_key=key
+                    )
+                    for key, text in creates.items()
+                ]
+            )
+            created_ids = dict(
+                items.filter(
+                    list=list_, text_key__in=creates
+                ).values_list("text_key", "id")
+            )
+            created = iter(created_ids[key] for key in creates)
+
+            for (kind, _, __), result in zip(parsed, results):
+                if kind == "add" and result["status"] == "ok":
+                    result["id"] = next(created)
+
+        if creates or updates or deletes:
+            List.objects.db_manager(using).bump_version(list_.id)
+
+    return results
@@ -0,0 +1,30 @@
+"""Caches for rendered pages and fragments of the to-do list app."""
+from django.conf import settings
+
+from superlists.cache import TieredCache
+
+
+_config = settings.LIST_FRAGMENT_CACHE
+
+item_table_cache = TieredCache(
+    "item-table",
+    maxsize=_config["MAX_ENTRIES"],
+    shared_alias=_config["SHARED_CACHE"],
+    timeout=_config["TIMEOUT"],
+)
+
+home_page_cache = TieredCache(
+    "home-page",
+    maxsize=1,
+    shared_alias=settings.HOME_PAGE_CACHE["SHARED_CACHE"],
+    timeout=settings.HOME_PAGE_CACHE["TIMEOUT"],
+)
+
+# Stands in for the CSRF token in cached pages; swapped for a real token
+# per response.
+CSRF_TOKEN_PLACEHOLDER = "__csrf_token_placeholder__"
+
+
+def item_table_key(list_) -> tuple:
+    """Return the cache key of a list's rendered item table."""
+    return ("table", list_.etag)
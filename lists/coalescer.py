@@ -0,0 +1,248 @@
+"""Group commit of item inserts made by concurrent requests.
+
+SQLite lets one transaction write at a time, and every commit is a sync to
+disk. When requests in the same process add items at the same time, the
+first to arrive becomes the leader: it waits up to MAX_WAIT_MS for others
+to queue theirs (or until MAX_BATCH rows are queued), writes the whole
+batch in one transaction and hands every request its own result, so each
+still sees its own duplicate error. The rest simply wait for their result.
+Only threads of one process share a coalescer, so this helps when gunicorn
+runs with --threads.
+"""
+import threading
+import time
+from typing import Callable, List as ListType, NamedTuple, Union
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, models, transaction
+from django.utils import timezone
+
+from lists.models import Item, List, item_text_key, new_item_id
+
+
+class PendingItem(NamedTuple):
+    """An item waiting to be inserted."""
+
+    list_id: int
+    text: str
+    text_key: str
+    database: str = DEFAULT_DB_ALIAS
+
+
+Result = Union[Item, Exception]
+
+
+def _insert_one(pending: PendingItem) -> Result:
+    """Insert a single item the ordinary way, returning it or the error."""
+    item = Item(list_id=pending.list_id, text=pending.text)
+
+    try:
+        item.save(using=pending.database)
+
+    except (IntegrityError, List.DoesNotExist) as error:
+        return error
+
+    return item
+
+
+def insert_items(batch: ListType[PendingItem]) -> ListType[Result]:
+    """Insert a batch of items in one transaction per database.
+
+    Returns, in order, the new Item or the IntegrityError for each entry.
+    Entries repeating an existing item or an earlier entry of the batch
+    fail; the others are inserted together and their lists bumped once.
+    """
+    results = [None] * len(batch)
+    by_database = {}
+
+    for index, pending in enumerate(batch):
+        by_database.setdefault(pending.database, []).append(index)
+
+    for using, indexes in by_database.items():
+        inserted = _insert_into(using, [batch[index] for index in indexes])
+
+        for index, result in zip(indexes, inserted):
+            results[index] = result
+
+    return results
+
+
+def _insert_into(using: str, batch: ListType[PendingItem]) -> ListType[Result]:
+    """Insert a batch of items into one database in one transaction."""
+    results = [None] * len(batch)
+    first = {}
+
+    for index, pending in enumerate(batch):
+        key = (pending.list_id, pending.text_key)
+
+        if key in first:
+            results[index] = IntegrityError("Duplicate item in batch")
+
+        else:
+            first[key] = index
+
+    try:
+        with transaction.atomic(using=using):
+            lists = List.objects.db_manager(using)
+            present = lists.lock({list_id for list_id, _ in first})
+            rows = Item.objects.using(using).filter(
+                list_id__in=present,
+                text_key__in={text_key for _, text_key in first},
+            )
+            existing = set(rows.values_list("list_id", "text_key"))
+            new = [
+                key
+                for key in first
+                if key[0] in present and key not in existing
+            ]
+            Item.objects.using(using).bulk_create(
+                Item(
+                    pk=new_item_id(),
+                    list_id=list_id,
+                    text=batch[first[list_id, text_key]].text,
+                    text_key=text_key,
+                )
+                for list_id, text_key in new
+            )
+            ids = {
+                (list_id, text_key): pk
+                for pk, list_id, text_key in rows.values_list(
+                    "pk", "list_id", "text_key"
+                )
+            }
+            lists.filter(pk__in={key[0] for key in new}).update(
+                version=models.F("version") + 1, updated_at=timezone.now()
+            )
+
+    except IntegrityError:
+        # Another process added one of these rows since we looked.
+        for index in first.values():
+            results[index] = _insert_one(batch[index])
+
+        return results
+
+    for key, index in first.items():
+        if key[0] not in present:
+            # The list has been moved to another shard, follow it there.
+            results[index] = _insert_one(batch[index])
+
+        elif key in existing:
+            results[index] = IntegrityError("Duplicate item")
+
+        else:
+            pending = batch[index]
+            results[index] = Item(
+                pk=ids[key],
+                list_id=pending.list_id,
+                text=pending.text,
+                text_key=pending.text_key,
+            )
+
+    return results
+
+
+class _Request:
+    """One submitted item and, once written, its result."""
+
+    def __init__(self, pending: PendingItem):
+        """Initialize an unfinished request."""
+        self.pending = pending
+        self.result = None
+        self.done = False
+
+
+class ItemWriteCoalescer:
+    """Leader-based group commit of concurrent item inserts."""
+
+    def __init__(
+        self,
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+        flush: Callable[[ListType[PendingItem]], ListType[Result]] = (
+            insert_items
+        ),
+    ):
+        """Initialize a coalescer writing batches with flush."""
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.flush = flush
+        self.batches = 0
+        self.rows = 0
+        self._pending = []
+        self._leading = False
+        self._condition = threading.Condition()
+
+    def submit(self, list_: List, text: str) -> Item:
+        """Queue an item and wait until it is written.
+
+        Returns the new item, or raises IntegrityError if it duplicates
+        one already in the list.
+        """
+        request = _Request(
+            PendingItem(list_.pk, text, item_text_key(text), list_.database)
+        )
+
+        with self._condition:
+            self._pending.append(request)
+            self._condition.notify_all()
+
+            while not request.done:
+                if self._leading:
+                    self._condition.wait()
+
+                else:
+                    self._lead()
+
+        if isinstance(request.result, Exception):
+            raise request.result
+
+        return request.result
+
+    def _lead(self) -> None:
+        """Gather a batch, write it and wake its requests.
+
+        Called with the condition held; releases it while writing.
+        """
+        self._leading = True
+        deadline = time.monotonic() + self.max_wait
+
+        while len(self._pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+
+            if remaining <= 0:
+                break
+
+            self._condition.wait(remaining)
+
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        results = None
+        self._condition.release()
+
+        try:
+            results = self.flush([request.pending for request in batch])
+
+        except Exception as error:
+            results = [error] * len(batch)
+
+        finally:
+            self._condition.acquire()
+
+            if results is None:
+                interrupted = RuntimeError("Item write was interrupted")
+                results = [interrupted] * len(batch)
+
+            for request, result in zip(batch, results):
+                request.result = result
+                request.done = True
+
+            self.batches += 1
+            self.rows += len(batch)
+            self._leading = False
+            self._condition.notify_all()
+
+
+item_write_coalescer = ItemWriteCoalescer(
+    max_batch=settings.ITEM_WRITE_COALESCER["MAX_BATCH"],
+    max_wait=settings.ITEM_WRITE_COALESCER["MAX_WAIT_MS"] / 1000,
+)
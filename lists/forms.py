@@ -1,8 +1,10 @@
 """Forms for to-do list app."""
 from django import forms
-from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.db import IntegrityError
 
-from lists.models import Item
+from lists.coalescer import item_write_coalescer
+from lists.models import Item, item_text_key
 
 
 DUPLICATE_ITEM_ERROR = "You've already got this in your list"
@@ -45,14 +47,42 @@ class ExistingListItemForm(ItemForm):
         self.instance.list = for_list
 
     def validate_unique(self):
-        """Validate form's entries are unique."""
+        """Skip the uniqueness SELECT, the database enforces it on save."""
+
+    def save(self):
+        """Save item in form to existing list.
+
+        The INSERT is attempted straight away; Item.save runs it in a
+        savepoint, so a clash with the (list, text) constraint is rolled back
+        and reported as a duplicate error on the form. Other integrity
+        errors are raised. With the item write coalescer enabled, the
+        INSERT is instead batched with those of concurrent requests.
+        Returns the new item, or None if the list already has it.
+        """
         try:
-            self.instance.validate_unique()
+            if settings.ITEM_WRITE_COALESCER["ENABLED"]:
+                self.instance = item_write_coalescer.submit(
+                    self.instance.list, self.instance.text
+                )
 
-        except ValidationError as error:
-            error.error_dict = {'text': [DUPLICATE_ITEM_ERROR]}
-            self._update_errors(error)
+                return self.instance
 
-    def save(self):
-        """save item in form to existing list."""
-        return forms.models.ModelForm.save(self)
+            return forms.models.ModelForm.save(self)
+
+        except IntegrityError:
+            if not self.is_duplicate():
+                raise
+
+            self.add_error("text", DUPLICATE_ITEM_ERROR)
+
+            return None
+
+    def is_duplicate(self) -> bool:
+        """Return whether the list already has an item with this text."""
+        list_ = self.instance.list
+
+        return (
+            Item.objects.using(list_.database)
+            .filter(list=list_, text_key=item_text_key(self.instance.text))
+            .exists()
+        )
@@ -0,0 +1,81 @@
+"""Management command moving lists into the shards their ids pick."""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lists.models import List
+from lists.sharding import shard_for
+
+
+class Command(BaseCommand):
+    """Move every list stored outside its shard, one list at a time."""
+
+    help = (
+        "Move lists, with their items, to the shard their id picks, e.g. "
+        "after adding shards with DJANGO_LIST_SHARDS. Each list is moved "
+        "in its own transaction and stays readable throughout."
+    )
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches, letting writers in.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the lists that would move.",
+        )
+
+    def handle(self, *args, **options):
+        moves = Counter()
+
+        for source in settings.LIST_SHARDS:
+            for list_ids in self.batches(source, options["batch_size"]):
+                for list_id in list_ids:
+                    target = shard_for(list_id)
+
+                    if target == source:
+                        continue
+
+                    if options["dry_run"] or List.objects.move(
+                        list_id, source, target
+                    ):
+                        moves[source, target] += 1
+
+                if options["pause"]:
+                    time.sleep(options["pause"])
+
+        verb = "Would move" if options["dry_run"] else "Moved"
+
+        for (source, target), count in sorted(moves.items()):
+            self.stdout.write(
+                f"{verb} {count} lists from {source} to {target}."
+            )
+
+        self.stdout.write(f"{verb} {sum(moves.values())} lists in all.")
+
+    def batches(self, alias: str, batch_size: int):
+        """Yield the ids of the lists in a database, a batch at a time."""
+        last_id = 0
+
+        while True:
+            list_ids = list(
+                List.objects.using(alias)
+                .filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+
+            if not list_ids:
+                return
+
+            yield list_ids
+
+            last_id = list_ids[-1]
@@ -0,0 +1,44 @@
+"""Management command copying the list databases into their replicas."""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from superlists.replicas import sync_replicas
+
+
+class Command(BaseCommand):
+    """Refresh every replica in DATABASE_REPLICAS from its primary."""
+
+    help = (
+        "Copy each database into its replicas every REPLICA_SYNC_INTERVAL "
+        "seconds, standing in for replication between SQLite files."
+    )
+
+    def add_arguments(self, parser):
+        """Add argument to current command parser."""
+        parser.add_argument(
+            "--once", action="store_true", help="Sync once and exit."
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Seconds between syncs, REPLICA_SYNC_INTERVAL by default.",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+
+        if interval is None:
+            interval = settings.REPLICA_SYNC_INTERVAL
+
+        while True:
+            copies = sync_replicas()
+
+            if options["once"]:
+                self.stdout.write(f"Synced {copies} replicas.")
+
+                return
+
+            time.sleep(interval)
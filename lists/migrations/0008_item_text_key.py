@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.13 on 2026-10-18 17:16
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def text_key(text):
+    """Digest of trimmed, case-folded item text, as in lists.models."""
+    return hashlib.blake2b(
+        text.strip().casefold().encode(), digest_size=16
+    ).hexdigest()
+
+
+def populate_text_keys(apps, schema_editor):
+    """Fill in text keys a list at a time.
+
+    Rows that only differed from an earlier row of their list by case or
+    surrounding whitespace are renamed with a " (2)", " (3)"... suffix, so
+    that no existing data is lost while new duplicates are refused, and the
+    key saving the item again computes stays the same.
+    """
+    Item = apps.get_model('lists', 'Item')
+    items = Item.objects.using(schema_editor.connection.alias)
+    seen = set()
+    last_list_id = None
+    last_id = 0
+
+    while True:
+        rows = items.order_by('list_id', 'id')
+
+        if last_list_id is not None:
+            rows = rows.filter(
+                models.Q(list_id__gt=last_list_id)
+                | models.Q(list_id=last_list_id, id__gt=last_id)
+            )
+
+        rows = list(rows.values_list('id', 'list_id', 'text')[:BATCH_SIZE])
+
+        if not rows:
+            break
+
+        for item_id, list_id, text in rows:
+            if list_id != last_list_id:
+                seen.clear()
+                last_list_id = list_id
+
+            key = text_key(text)
+            copy = 1
+
+            while key in seen:
+                copy += 1
+                key = text_key('{} ({})'.format(text, copy))
+
+            seen.add(key)
+            changes = {'text_key': key}
+
+            if copy > 1:
+                changes['text'] = '{} ({})'.format(text, copy)
+
+            items.filter(id=item_id).update(**changes)
+            last_id = item_id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0007_list_version_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='text_key',
+            field=models.CharField(default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(populate_text_keys, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='item',
+            unique_together=set([('list', 'text_key')]),
+        ),
+    ]
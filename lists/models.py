@@ -1,28 +1,395 @@
 """Django models to to-do list app."""
+import hashlib
+from typing import Iterable, Optional, Set
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
 from django.core.urlresolvers import reverse
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.utils import timezone
+
+from lists.sharding import (
+    ID_BLOCK_ALIAS,
+    HiLoAllocator,
+    is_sharded,
+    shard_for,
+)
+from superlists.replicas import read_database
+
+
+def normalize_item_text(text: str) -> str:
+    """Return item text as compared for duplicates: trimmed and case-folded."""
+    return text.strip().casefold()
+
+
+def item_text_key(text: str) -> str:
+    """Return the fixed-width digest identifying an item's normalized text."""
+    return hashlib.blake2b(
+        normalize_item_text(text).encode(), digest_size=16
+    ).hexdigest()
+
+
+class IdBlockManager(models.Manager):
+    """Manager for the counters of reserved id blocks."""
+
+    def reserve(self, name: str, block_size: int, count: int = 1) -> int:
+        """Reserve the next count blocks of ids of a lists model by name.
+
+        Returns the first block's number. The first reservation starts
+        above the highest id of the model in any shard. Reservations are
+        committed in the ids database at once, whatever transactions the
+        caller has open on the shards, so a block is never handed out twice.
+        """
+        blocks = self.db_manager(ID_BLOCK_ALIAS)
+
+        while True:
+            with transaction.atomic(using=ID_BLOCK_ALIAS):
+                if blocks.filter(name=name).update(
+                    next_block=models.F("next_block") + count
+                ):
+                    return blocks.get(name=name).next_block - count
+
+            first = highest_id(name) // block_size + 1
+
+            try:
+                with transaction.atomic(using=ID_BLOCK_ALIAS):
+                    blocks.create(name=name, next_block=first + count)
+
+            except IntegrityError:
+                # Another process made the counter first, reserve from it.
+                continue
+
+            return first
+
+
+class IdBlock(models.Model):
+    """Counter of the id blocks reserved for a model while sharded."""
+
+    name = models.CharField(max_length=20, primary_key=True)
+    next_block = models.PositiveIntegerField(default=0)
+
+    objects = IdBlockManager()
+
+
+list_ids = HiLoAllocator(
+    lambda block_size, count: IdBlock.objects.reserve(
+        "list", block_size, count
+    ),
+    settings.SHARD_ID_BLOCK_SIZE,
+)
+
+item_ids = HiLoAllocator(
+    lambda block_size, count: IdBlock.objects.reserve(
+        "item", block_size, count
+    ),
+    settings.SHARD_ID_BLOCK_SIZE,
+)
+
+
+def new_list_id() -> Optional[int]:
+    """Return the id of a new list, or None to leave it to SQLite."""
+    return list_ids.allocate() if is_sharded() else None
+
+
+def new_item_id() -> Optional[int]:
+    """Return the id of a new item, or None to leave it to SQLite."""
+    return item_ids.allocate() if is_sharded() else None
+
+
+def new_list_ids(count: int) -> Optional[range]:
+    """Return ids for count new lists reserved at once, or None."""
+    return list_ids.allocate_many(count) if is_sharded() else None
+
+
+def new_item_ids(count: int) -> Optional[range]:
+    """Return ids for count new items reserved at once, or None."""
+    return item_ids.allocate_many(count) if is_sharded() else None
+
+
+def highest_id(name: str) -> int:
+    """Return the highest id of a lists model in any shard, or 0."""
+    model = apps.get_model("lists", name)
+
+    return max(
+        model.objects.using(alias).aggregate(models.Max("id"))["id__max"]
+        or 0
+        for alias in settings.LIST_SHARDS
+    )
+
+
+class ListManager(models.Manager):
+    """Manager for to-do lists."""
+
+    def new(self, **kwargs) -> "List":
+        """Return an unsaved list whose id, and so shard, is chosen."""
+        return self.model(pk=new_list_id(), **kwargs)
+
+    def create(self, **kwargs) -> "List":
+        """Create a list in its shard."""
+        list_ = self.new(**kwargs)
+        list_.save(force_insert=True, using=self._db)
+
+        return list_
+
+    def create_with_items(self, texts) -> "List":
+        """Create a list seeded with items, committing once.
+
+        Texts must be distinct after normalization, otherwise the unique
+        constraint raises IntegrityError and nothing is created.
+        """
+        texts = list(texts)
+        list_ = self.new(version=len(texts))
+        using = self._db or list_.database
+
+        with transaction.atomic(using=using):
+            list_.save(force_insert=True, using=using)
+            Item.objects.using(using).bulk_create(
+                [
+                    Item(
+                        pk=new_item_id(),
+                        list=list_,
+                        text=text,
+                        text_key=item_text_key(text),
+                    )
+                    for text in texts
+                ]
+            )
+
+        return list_
+
+    def bump_version(self, list_id: int) -> int:
+        """Mark a list's items as changed, returning rows updated."""
+        return self.filter(pk=list_id).update(
+            version=models.F("version") + 1, updated_at=timezone.now()
+        )
+
+    def lock(self, list_ids: Iterable[int]) -> Set[int]:
+        """Return which of the lists are in this database, locking them.
+
+        The no-op update takes the database's write lock until the caller's
+        transaction ends, so move() cannot take these lists away meanwhile.
+        """
+        list_ids = set(list_ids)
+        lists = self.filter(pk__in=list_ids)
+
+        if lists.update(version=models.F("version")) == len(list_ids):
+            return list_ids
+
+        return set(lists.values_list("pk", flat=True))
+
+    def find(self, list_id) -> Optional["List"]:
+        """Return the list with this id, or None if there is none.
+
+        Lists are looked for in their own shard first, then in the others
+        in case rebalance_lists has not moved them yet. Each shard is read
+        from a replica when the request may, and from the primaries when
+        no replica has the list yet.
+        """
+        home = shard_for(list_id)
+        shards = [home] + [
+            alias for alias in settings.LIST_SHARDS if alias != home
+        ]
+        replicas = [read_database(alias) for alias in shards]
+
+        for alias in replicas + [
+            alias for alias in shards if alias not in replicas
+        ]:
+            list_ = self.using(alias).filter(id=list_id).first()
+
+            if list_ is not None:
+                return list_
+
+        return None
+
+    def relocate(self, list_id: int) -> "List":
+        """Return the list read from the primary database it is now in.
+
+        For writes that found the list gone from where it was loaded,
+        because move() took it to another shard meanwhile. Raises
+        DoesNotExist if the list is in no shard.
+        """
+        home = shard_for(list_id)
+        shards = [home] + [
+            alias for alias in settings.LIST_SHARDS if alias != home
+        ]
+
+        for alias in shards:
+            list_ = self.using(alias).filter(id=list_id).first()
+
+            if list_ is not None:
+                return list_
+
+        raise self.model.DoesNotExist(f"List {list_id} is in no shard.")
+
+    def move(self, list_id: int, source: str, target: str) -> bool:
+        """Move a list and its items, keeping their ids, to another shard.
+
+        The list's version is bumped first, which takes the source's write
+        lock until the move commits and changes the list's ETag. Writes
+        to the list's items take the same lock first and, finding the list
+        gone, go to it in target, see Item.save. Returns False if the list
+        is not in source.
+        """
+        with transaction.atomic(using=source):
+            if not self.db_manager(source).bump_version(list_id):
+                return False
+
+            if not self.using(target).filter(pk=list_id).exists():
+                list_ = self.using(source).get(pk=list_id)
+                items = list(Item.objects.using(source).filter(list=list_))
+
+                with transaction.atomic(using=target):
+                    self.using(target).bulk_create([list_])
+                    Item.objects.using(target).bulk_create(items)
+
+            # A copy left in target by an interrupted move is the one
+            # requests have been seeing, so the source's is dropped.
+            Item.objects.using(source).filter(list_id=list_id).delete()
+            self.using(source).filter(pk=list_id).delete()
+
+        return True
 
 
 class List(models.Model):
     """Database object for the to-do list itself."""
 
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ListManager()
+
+    def save(self, *args, **kwargs):
+        """Save the list, picking its id first while lists are sharded.
+
+        A list given its id here is new, so no UPDATE is tried first.
+        """
+        if self.pk is None:
+            self.pk = new_list_id()
+
+            if self.pk is not None:
+                kwargs["force_insert"] = True
+
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
-        """Return aboslute url of view."""
+        """Return aboslute url of view.
+
+        Ids are unique across shards and pick the list's shard, so the URL
+        is the same whichever shard the list is in.
+        """
         return reverse("view_list", args=[self.id])
 
+    @property
+    def database(self) -> str:
+        """Return the alias of the database the list is, or goes, in."""
+        return router.db_for_write(List, instance=self)
+
+    @property
+    def etag(self) -> str:
+        """Return a marker that changes whenever the list's items change."""
+        timestamp = int(self.updated_at.timestamp() * 1000000)
+
+        return f"{self.id}-{self.version}-{timestamp}"
+
+
+class ItemManager(models.Manager):
+    """Manager for to-do list items."""
+
+    def create(self, **kwargs) -> "Item":
+        """Create an item in its list's shard."""
+        item = self.model(**kwargs)
+        item.save(force_insert=True, using=self._db)
+
+        return item
+
 
 class Item(models.Model):
     """Database object for to-do list items."""
 
     text = models.TextField(default="")
     list = models.ForeignKey(List, default=None)  # noqa: VNE003
+    text_key = models.CharField(max_length=32, default="", editable=False)
+
+    objects = ItemManager()
 
     class Meta:
         """Meta information for the item model."""
 
         ordering = ("id",)
-        unique_together = ("list", "text")
+        unique_together = ("list", "text_key")
 
     def __str__(self):
         """Overloads string method."""
         return self.text
+
+    def clean(self):
+        """Derive the uniqueness key before uniqueness is validated."""
+        self.text_key = item_text_key(self.text)
+
+    def validate_unique(self, exclude=None):
+        """Check (list, text_key) in the database the list is in.
+
+        Django's own check reads through the default manager, which only
+        sees the default shard.
+        """
+        exclude = set(exclude or ())
+        super().validate_unique(exclude | {"text_key"})
+
+        if exclude & {"list", "text_key"} or self.list_id is None:
+            return
+
+        duplicates = Item.objects.using(self.list.database).filter(
+            list_id=self.list_id, text_key=self.text_key
+        )
+
+        if self.pk is not None:
+            duplicates = duplicates.exclude(pk=self.pk)
+
+        if duplicates.exists():
+            raise ValidationError(
+                {
+                    NON_FIELD_ERRORS: [
+                        self.unique_error_message(
+                            Item, ("list", "text_key")
+                        )
+                    ]
+                }
+            )
+
+    def save(self, *args, **kwargs):
+        """Save item and bump its list's version in one transaction.
+
+        An item given its id here is new, so no UPDATE is tried first.
+        """
+        self.text_key = item_text_key(self.text)
+
+        if self.pk is None:
+            self.pk = new_item_id()
+
+            if self.pk is not None:
+                kwargs["force_insert"] = True
+
+        self._write_to_list(super().save, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """Delete item and bump its list's version in one transaction."""
+        return self._write_to_list(super().delete, *args, **kwargs)
+
+    def _write_to_list(self, write, *args, **kwargs):
+        """Run write in the list's database after bumping its version.
+
+        The bump comes first and takes the database's write lock. If it
+        finds no list, ListManager.move has taken the list to another shard
+        since it was loaded, so the write is retried in the list's new home.
+        """
+        using = kwargs.pop("using", None) or router.db_for_write(
+            Item, instance=self
+        )
+
+        while True:
+            with transaction.atomic(using=using):
+                if List.objects.db_manager(using).bump_version(self.list_id):
+                    return write(*args, using=using, **kwargs)
+
+            using = List.objects.relocate(self.list_id).database
@@ -0,0 +1,72 @@
+"""Keyset pagination of to-do list items."""
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+
+class ItemPage(NamedTuple):
+    """One page of items following the item with id `after`."""
+
+    items: List
+    after: Optional[int]
+    start: int
+    limit: int
+    next_after: Optional[int]
+
+    @property
+    def next_start(self) -> int:
+        """Return the number of items before the next page."""
+        return self.start + len(self.items)
+
+
+def _non_negative_int(value: Optional[str]) -> Optional[int]:
+    """Parse a query parameter, returning None when absent or invalid."""
+    try:
+        number = int(value)
+
+    except (TypeError, ValueError):
+        return None
+
+    return number if number >= 0 else None
+
+
+def parse_page_params(query: QueryDict) -> tuple:
+    """Return the (after, start, limit) page parameters of a query string."""
+    after = _non_negative_int(query.get("after"))
+    start = _non_negative_int(query.get("start")) or 0
+    limit = _non_negative_int(query.get("limit")) or settings.LIST_PAGE_SIZE
+    limit = min(max(limit, 1), settings.LIST_MAX_PAGE_SIZE)
+
+    if after is None:
+        start = 0
+
+    return after, start, limit
+
+
+def keyset_page(
+    queryset: QuerySet, after: Optional[int], start: int, limit: int
+) -> ItemPage:
+    """Return up to `limit` rows of queryset with ids greater than `after`.
+
+    The query seeks on the primary key instead of using OFFSET, so every
+    page costs the same however deep it is. `start` only numbers the rows
+    and is carried in the page links.
+    """
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+
+    rows = list(queryset.order_by("id")[: limit + 1])
+    next_after = None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = _row_id(rows[-1])
+
+    return ItemPage(rows, after, start, limit, next_after)
+
+
+def _row_id(row) -> int:
+    """Return the id of a model instance or a values_list row."""
+    return row[0] if isinstance(row, tuple) else row.id
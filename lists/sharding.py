@@ -0,0 +1,84 @@
+"""Spreading lists, with their items, over several SQLite files.
+
+A list lives in LIST_SHARDS[id % len(LIST_SHARDS)], so its shard follows
+from the id in its URL. With more than one shard, new list and item ids
+are handed out from blocks reserved in the ids database, so they stay
+unique across shards and lists can move between them. rebalance_lists
+moves lists after LIST_SHARDS changes.
+"""
+import os
+import threading
+from typing import Callable, Optional
+
+from django.conf import settings
+
+# Blocks are reserved in a database of their own: ids are allocated inside
+# transactions on list shards, default included, and a reservation must
+# neither wait on their write locks nor be rolled back with them.
+ID_BLOCK_ALIAS = "ids"
+
+
+def shard_for(list_id: Optional[int]) -> Optional[str]:
+    """Return the alias of the shard a list belongs in."""
+    if list_id is None:
+        return None
+
+    shards = settings.LIST_SHARDS
+
+    return shards[int(list_id) % len(shards)]
+
+
+def is_sharded() -> bool:
+    """Return whether lists are spread over more than one database."""
+    return len(settings.LIST_SHARDS) > 1
+
+
+class HiLoAllocator:
+    """Hand out ids from blocks reserved block_size at a time.
+
+    reserve is called with block_size and a number of blocks, and returns
+    the number of the first of that many consecutive blocks no other
+    process has; only one reservation is made per block_size ids. A forked
+    process drops the block it inherited and reserves its own.
+    """
+
+    def __init__(self, reserve: Callable[[int, int], int], block_size: int):
+        """Initialize an allocator with no block reserved yet."""
+        self.reserve = reserve
+        self.block_size = block_size
+        self._next = self._end = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Drop the current block, so the next id comes from a new one."""
+        with self._lock:
+            self._next = self._end = 0
+
+    def allocate(self) -> int:
+        """Return an id never handed out before."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._next = self._end = 0
+                self._pid = os.getpid()
+
+            if self._next >= self._end:
+                block = self.reserve(self.block_size, 1)
+                self._next = block * self.block_size + 1
+                self._end = self._next + self.block_size
+
+            allocated = self._next
+            self._next += 1
+
+        return allocated
+
+    def allocate_many(self, count: int) -> range:
+        """Return count consecutive ids never handed out before.
+
+        They come from blocks reserved together in one go, apart from the
+        block allocate() is handing out.
+        """
+        blocks = -(-count // self.block_size)
+        first = self.reserve(self.block_size, blocks) * self.block_size + 1
+
+        return range(first, first + count)
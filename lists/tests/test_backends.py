@@ -0,0 +1,71 @@
+"""Test suite for the tuned SQLite database backend."""
+import copy
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from superlists.backends.sqlite3.base import DatabaseWrapper
+
+
+class ProductionSQLiteBackendTest(SimpleTestCase):
+    """Test suite for connections made with the production profile."""
+
+    def setUp(self) -> None:
+        """Open a production-profile connection to a temporary file."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "db.sqlite3")
+        settings_dict = dict(
+            settings.DATABASES["default"],
+            **copy.deepcopy(settings.SQLITE_PRODUCTION_PROFILE),
+            NAME=self.path,
+        )
+        self.connection = DatabaseWrapper(settings_dict, alias="production")
+        self.addCleanup(self.connection.close)
+
+    def pragma(self, name: str):
+        """Return the value of a PRAGMA on the connection."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+
+            return cursor.fetchone()[0]
+
+    def test_runs_init_command_pragmas(self) -> None:
+        """Test that new connections are switched to the tuned settings."""
+        self.assertEqual(self.pragma("journal_mode"), "wal")
+        self.assertEqual(self.pragma("synchronous"), 1)
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
+        self.assertEqual(self.pragma("cache_size"), -16000)
+
+    def test_does_not_pass_own_options_to_sqlite(self) -> None:
+        """Test that the custom OPTIONS are not sqlite3.connect arguments."""
+        params = self.connection.get_connection_params()
+        self.assertNotIn("init_command", params)
+        self.assertNotIn("transaction_mode", params)
+
+    def test_atomic_blocks_take_write_lock_at_once(self) -> None:
+        """Test that other writers are locked out as soon as atomic begins."""
+        self.pragma("journal_mode")
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+
+        # What transaction.atomic() does on entry under autocommit.
+        self.connection._start_transaction_under_autocommit()
+
+        with self.assertRaisesRegex(sqlite3.OperationalError, "locked"):
+            other.execute("BEGIN IMMEDIATE")
+
+        self.connection.rollback()
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("ROLLBACK")
+
+    def test_rejects_unknown_transaction_mode(self) -> None:
+        """Test that a typo in transaction_mode is reported."""
+        self.connection.settings_dict["OPTIONS"]["transaction_mode"] = "NOW"
+
+        with self.assertRaises(ValueError):
+            self.connection.transaction_mode
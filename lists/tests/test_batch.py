@@ -0,0 +1,179 @@
+"""Test suite for batched item operations."""
+import json
+
+from django.test import TestCase
+
+from lists.batch import (
+    INVALID_OPERATION_ERROR,
+    NO_SUCH_ITEM_ERROR,
+    apply_item_operations,
+)
+from lists.forms import DUPLICATE_ITEM_ERROR, EMPTY_ITEM_ERROR
+from lists.models import Item, List, item_text_key
+
+
+class ApplyItemOperationsTest(TestCase):
+    """Test suite for applying item operations."""
+
+    def setUp(self) -> None:
+        """Create a list with two items."""
+        self.list_ = List.objects.create()
+        self.milk = Item.objects.create(list=self.list_, text="milk")
+        self.eggs = Item.objects.create(list=self.list_, text="eggs")
+
+    def texts(self) -> list:
+        """Return texts of the list's items in order."""
+        return list(self.list_.item_set.values_list("text", flat=True))
+
+    def test_adds_edits_and_deletes(self) -> None:
+        """Test that every kind of operation is applied."""
+        results = apply_item_operations(
+            self.list_,
+            [
+                {"op": "add", "text": "bread"},
+                {"op": "edit", "id": self.milk.id, "text": "oat milk"},
+                {"op": "delete", "id": self.eggs.id},
+            ],
+        )
+        self.assertEqual([r["status"] for r in results], ["ok"] * 3)
+        self.assertEqual(self.texts(), ["oat milk", "bread"])
+        self.assertEqual(
+            results[0]["id"], self.list_.item_set.get(text="bread").id
+        )
+
+    def test_reports_duplicates_per_operation(self) -> None:
+        """Test duplicates against stored and batched items."""
+        results = apply_item_operations(
+            self.list_,
+            [
+                {"op": "add", "text": "Milk"},
+                {"op": "add", "text": "bread"},
+                {"op": "add", "text": "bread "},
+                {"op": "edit", "id": self.eggs.id, "text": "milk"},
+            ],
+        )
+        self.assertEqual(
+            [r.get("error") for r in results],
+            [DUPLICATE_ITEM_ERROR, None, DUPLICATE_ITEM_ERROR,
+             DUPLICATE_ITEM_ERROR],
+        )
+        self.assertEqual(self.texts(), ["milk", "eggs", "bread"])
+
+    def test_edit_may_change_case_of_same_item(self) -> None:
+        """Test that an item is not a duplicate of itself."""
+        results = apply_item_operations(
+            self.list_, [{"op": "edit", "id": self.milk.id, "text": "MILK"}]
+        )
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(self.texts(), ["MILK", "eggs"])
+
+    def test_operations_apply_in_order(self) -> None:
+        """Test that texts freed earlier in a batch can be reused."""
+        results = apply_item_operations(
+            self.list_,
+            [
+                {"op": "delete", "id": self.milk.id},
+                {"op": "edit", "id": self.eggs.id, "text": "milk"},
+                {"op": "add", "text": "eggs"},
+            ],
+        )
+        self.assertEqual([r["status"] for r in results], ["ok"] * 3)
+        self.assertEqual(self.texts(), ["milk", "eggs"])
+
+    def test_edits_may_swap_texts(self) -> None:
+        """Test that texts can pass between items within a batch."""
+        results = apply_item_operations(
+            self.list_,
+            [
+                {"op": "edit", "id": self.milk.id, "text": "x"},
+                {"op": "edit", "id": self.eggs.id, "text": "milk"},
+                {"op": "edit", "id": self.milk.id, "text": "eggs"},
+            ],
+        )
+        self.assertEqual([r["status"] for r in results], ["ok"] * 3)
+        self.assertEqual(self.texts(), ["eggs", "milk"])
+        self.assertEqual(
+            set(self.list_.item_set.values_list("text_key", flat=True)),
+            {item_text_key("eggs"), item_text_key("milk")},
+        )
+
+    def test_reports_invalid_operations(self) -> None:
+        """Test errors for bad, empty and foreign operations."""
+        other = Item.objects.create(list=List.objects.create(), text="x")
+        results = apply_item_operations(
+            self.list_,
+            [
+                {"op": "frobnicate"},
+                "add",
+                {"op": "add", "text": "  "},
+                {"op": "delete", "id": other.id},
+            ],
+        )
+        self.assertEqual(
+            [r["error"] for r in results],
+            [INVALID_OPERATION_ERROR, INVALID_OPERATION_ERROR,
+             EMPTY_ITEM_ERROR, NO_SUCH_ITEM_ERROR],
+        )
+        self.assertTrue(other.list.item_set.filter(id=other.id).exists())
+
+    def test_uses_set_based_queries(self) -> None:
+        """Test that query count does not grow with added items."""
+        with self.assertNumQueries(7, using=self.list_.database):
+            apply_item_operations(
+                self.list_,
+                [{"op": "add", "text": f"item {n}"} for n in range(50)],
+            )
+
+    def test_bumps_list_version_once(self) -> None:
+        """Test that a batch changes the list's ETag."""
+        self.list_.refresh_from_db()
+        version = self.list_.version
+        apply_item_operations(
+            self.list_,
+            [{"op": "add", "text": "a"}, {"op": "add", "text": "b"}],
+        )
+        self.list_.refresh_from_db()
+        self.assertEqual(self.list_.version, version + 1)
+
+
+class BatchItemsViewTest(TestCase):
+    """Test suite for the batch endpoint."""
+
+    def post(self, list_, payload) -> object:
+        """POST a JSON payload to the list's batch endpoint."""
+        return self.client.post(
+            f"/lists/{list_.id}/items/batch",
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+    def test_returns_results(self) -> None:
+        """Test that per-operation results are returned."""
+        list_ = List.objects.create()
+        response = self.post(
+            list_, {"operations": [{"op": "add", "text": "a"}]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["status"], "ok")
+        self.assertEqual(list_.item_set.get().text, "a")
+
+    def test_rejects_malformed_body(self) -> None:
+        """Test that a body without operations is a bad request."""
+        list_ = List.objects.create()
+        response = self.post(list_, {"ops": []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_oversized_batches(self) -> None:
+        """Test the cap on operations per batch."""
+        list_ = List.objects.create()
+
+        with self.settings(LIST_MAX_BATCH_OPERATIONS=1):
+            response = self.post(list_, {"operations": [{}, {}]})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_accepts_post(self) -> None:
+        """Test that GET is not allowed."""
+        list_ = List.objects.create()
+        response = self.client.get(f"/lists/{list_.id}/items/batch")
+        self.assertEqual(response.status_code, 405)
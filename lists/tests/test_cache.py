@@ -0,0 +1,121 @@
+"""Test suite for list fragment caching."""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+
+from lists.cache import item_table_cache, item_table_key
+from lists.models import Item, List
+from superlists.cache import MISSING, LRUCache, TieredCache
+
+
+class LRUCacheTest(SimpleTestCase):
+    """Test suite for the in-process LRU tier."""
+
+    def test_evicts_least_recently_used_entry(self) -> None:
+        """Test that the oldest untouched entry is dropped when full."""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIs(cache.get("b"), MISSING)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_counts_hits_and_misses(self) -> None:
+        """Test hit and miss counters."""
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+    @patch("superlists.cache.time.monotonic")
+    def test_expires_entries_after_ttl(self, mock_monotonic) -> None:
+        """Test that entries older than the TTL are treated as misses."""
+        mock_monotonic.return_value = 100.0
+        cache = LRUCache(ttl=10)
+        cache.set("a", 1)
+        mock_monotonic.return_value = 111.0
+        self.assertIs(cache.get("a"), MISSING)
+        self.assertEqual(len(cache), 0)
+
+
+class TieredCacheTest(SimpleTestCase):
+    """Test suite for the two-tier cache."""
+
+    def test_reads_through_to_shared_tier(self) -> None:
+        """Test that local misses are served and promoted by shared tier."""
+        writer = TieredCache("test", shared_alias="default")
+        reader = TieredCache("test", shared_alias="default")
+        writer.set(("k", 1), "value")
+        self.assertEqual(reader.get(("k", 1)), "value")
+        self.assertEqual(reader.get(("k", 1)), "value")
+        self.assertEqual(
+            reader.stats(),
+            {"local_hits": 1, "shared_hits": 1, "misses": 0, "size": 1},
+        )
+        writer.delete(("k", 1))
+
+    def test_verified_local_hit_needs_shared_key(self) -> None:
+        """Test that a key deleted elsewhere is no longer served locally."""
+        writer = TieredCache("test", shared_alias="default")
+        reader = TieredCache("test", shared_alias="default", verify_local=True)
+        writer.set("k", "value")
+        self.assertEqual(reader.get("k"), "value")
+        writer.delete("k")
+        self.assertIsNone(reader.get("k"))
+        self.assertEqual(len(reader.local), 0)
+
+    def test_get_or_set_only_computes_on_miss(self) -> None:
+        """Test that the default callable runs once."""
+        cache = TieredCache("test")
+        calls = []
+        cache.get_or_set("k", lambda: calls.append(1) or "v")
+        self.assertEqual(cache.get_or_set("k", lambda: calls.append(1)), "v")
+        self.assertEqual(len(calls), 1)
+
+
+class ItemTableCacheTest(TestCase):
+    """Test suite for caching of the rendered item table."""
+
+    def test_repeat_views_skip_item_query(self) -> None:
+        """Test that a cached table avoids querying items again."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="itemey 1")
+        self.client.get(f"/lists/{list_.id}/")
+
+        with self.assertNumQueries(1, using=list_.database):
+            response = self.client.get(f"/lists/{list_.id}/")
+
+        self.assertContains(response, "1: itemey 1")
+
+    def test_new_item_changes_version(self) -> None:
+        """Test that saving an item invalidates the cached table."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="itemey 1")
+        key = item_table_key(list_)
+        self.client.get(f"/lists/{list_.id}/")
+        self.client.post(f"/lists/{list_.id}/", data={"text": "itemey 2"})
+        list_.refresh_from_db()
+        self.assertNotEqual(item_table_key(list_), key)
+        response = self.client.get(f"/lists/{list_.id}/")
+        self.assertContains(response, "2: itemey 2")
+
+    def test_deleting_item_changes_version(self) -> None:
+        """Test that deleting an item invalidates the cached table."""
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text="itemey 1")
+        self.client.get(f"/lists/{list_.id}/")
+        item.delete()
+        response = self.client.get(f"/lists/{list_.id}/")
+        self.assertNotContains(response, "itemey 1")
+
+    def test_new_list_does_not_reuse_stale_table(self) -> None:
+        """Test that a recreated list id does not hit an old table."""
+        list_ = List.objects.create()
+        item_table_cache.set(item_table_key(list_), "stale")
+        List.objects.using(list_.database).filter(id=list_.id).delete()
+        reused = List.objects.create(id=list_.id)
+        response = self.client.get(f"/lists/{reused.id}/")
+        self.assertNotContains(response, "stale")
@@ -0,0 +1,209 @@
+"""Test suite for group commit of item inserts."""
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from lists.coalescer import (
+    ItemWriteCoalescer,
+    PendingItem,
+    insert_items,
+    item_write_coalescer,
+)
+from lists.forms import DUPLICATE_ITEM_ERROR, ExistingListItemForm
+from lists.models import Item, List, item_text_key, new_item_id
+
+
+A_LIST = SimpleNamespace(pk=1, database="default")
+
+
+def pending(list_: List, text: str) -> PendingItem:
+    """Return a pending insert of text into list_."""
+    return PendingItem(list_.id, text, item_text_key(text), list_.database)
+
+
+class InsertItemsTest(TestCase):
+    """Test suite for writing one batch of items."""
+
+    def test_inserts_batch_in_one_transaction(self) -> None:
+        """Test that a batch costs a fixed number of queries."""
+        first, second = List.objects.create(), List.objects.create()
+
+        while second.database != first.database:
+            second = List.objects.create()
+
+        # Reserve this process's block of item ids before counting.
+        new_item_id()
+
+        batch = [
+            pending(first, "a"), pending(second, "b"), pending(first, "c")
+        ]
+
+        with self.assertNumQueries(7, using=first.database):
+            results = insert_items(batch)
+
+        self.assertEqual(
+            [(item.list_id, item.text) for item in results],
+            [(first.id, "a"), (second.id, "b"), (first.id, "c")],
+        )
+        self.assertEqual(
+            [item.pk for item in results],
+            list(
+                Item.objects.using(first.database).values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+    def test_bumps_each_list_once(self) -> None:
+        """Test that every list written to gets a new version."""
+        list_ = List.objects.create()
+        insert_items([pending(list_, "a"), pending(list_, "b")])
+        list_.refresh_from_db()
+        self.assertEqual(list_.version, 1)
+
+    def test_reports_duplicates_per_entry(self) -> None:
+        """Test that only the repeated entries fail."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="old")
+        batch = [
+            pending(list_, "OLD "),
+            pending(list_, "new"),
+            pending(list_, "New"),
+        ]
+        results = insert_items(batch)
+        self.assertIsInstance(results[0], IntegrityError)
+        self.assertIsInstance(results[1], Item)
+        self.assertIsInstance(results[2], IntegrityError)
+        self.assertEqual(list_.item_set.count(), 2)
+
+    def test_falls_back_to_single_inserts_on_conflict(self) -> None:
+        """Test that a row added concurrently only fails its own entry."""
+        list_ = List.objects.create()
+
+        with patch.object(
+            Item.objects, "bulk_create", side_effect=IntegrityError
+        ):
+            results = insert_items([pending(list_, "a"), pending(list_, "b")])
+
+        self.assertEqual([item.text for item in results], ["a", "b"])
+        self.assertEqual(list_.item_set.count(), 2)
+
+
+class ItemWriteCoalescerTest(SimpleTestCase):
+    """Test suite for gathering concurrent inserts into batches."""
+
+    def submit_concurrently(self, coalescer, texts):
+        """Submit every text from its own thread, returning the outcomes."""
+        outcomes = {}
+        start = threading.Barrier(len(texts))
+
+        def submit(text):
+            start.wait()
+
+            try:
+                outcomes[text] = coalescer.submit(A_LIST, text)
+
+            except Exception as error:
+                outcomes[text] = error
+
+        threads = [threading.Thread(target=submit, args=(t,)) for t in texts]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        return outcomes
+
+    def test_concurrent_submits_share_batches(self) -> None:
+        """Test that simultaneous inserts are flushed together."""
+        batches = []
+
+        def flush(batch):
+            batches.append(len(batch))
+
+            return [entry.text.upper() for entry in batch]
+
+        coalescer = ItemWriteCoalescer(
+            max_batch=100, max_wait=0.2, flush=flush
+        )
+        texts = [f"item {n}" for n in range(8)]
+        outcomes = self.submit_concurrently(coalescer, texts)
+        self.assertEqual(outcomes, {text: text.upper() for text in texts})
+        self.assertEqual(sum(batches), 8)
+        self.assertLess(len(batches), 8)
+        self.assertEqual(coalescer.rows, 8)
+
+    def test_batches_are_capped_at_max_batch(self) -> None:
+        """Test that no flush gets more than max_batch items."""
+        batches = []
+
+        def flush(batch):
+            batches.append(len(batch))
+
+            return list(batch)
+
+        coalescer = ItemWriteCoalescer(max_batch=3, max_wait=0.2, flush=flush)
+        self.submit_concurrently(coalescer, [str(n) for n in range(7)])
+        self.assertEqual(sum(batches), 7)
+        self.assertLessEqual(max(batches), 3)
+
+    def test_each_request_gets_its_own_error(self) -> None:
+        """Test that a duplicate only fails the request that sent it."""
+        def flush(batch):
+            return [
+                IntegrityError(entry.text) if entry.text == "dup" else "ok"
+                for entry in batch
+            ]
+
+        coalescer = ItemWriteCoalescer(max_wait=0.2, flush=flush)
+        outcomes = self.submit_concurrently(coalescer, ["dup", "fine"])
+        self.assertIsInstance(outcomes["dup"], IntegrityError)
+        self.assertEqual(outcomes["fine"], "ok")
+
+    def test_flush_failure_reaches_every_request(self) -> None:
+        """Test that an error writing the batch is raised to all of it."""
+        def flush(batch):
+            raise RuntimeError("disk full")
+
+        coalescer = ItemWriteCoalescer(max_wait=0.2, flush=flush)
+        outcomes = self.submit_concurrently(coalescer, ["a", "b"])
+        self.assertTrue(
+            all(isinstance(error, RuntimeError) for error in outcomes.values())
+        )
+        self.assertEqual(coalescer.batches, 1)
+
+        # The next request still finds a leader.
+        coalescer.flush = list
+        result = coalescer.submit(A_LIST, "c")
+        self.assertEqual(result.text, "c")
+
+
+@override_settings(
+    ITEM_WRITE_COALESCER={"ENABLED": True, "MAX_BATCH": 64, "MAX_WAIT_MS": 2}
+)
+class CoalescedItemFormTest(TestCase):
+    """Test suite for saving the item form through the coalescer."""
+
+    def test_saves_item_through_coalescer(self) -> None:
+        """Test that the form's item is written by the coalescer."""
+        list_ = List.objects.create()
+        rows = item_write_coalescer.rows
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+        self.assertTrue(form.is_valid())
+        item = form.save()
+        self.assertEqual(item, list_.item_set.get())
+        self.assertEqual(item_write_coalescer.rows, rows + 1)
+
+    def test_reports_duplicate_on_form(self) -> None:
+        """Test that duplicates still show the form error."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="hi")
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+        self.assertTrue(form.is_valid())
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors["text"], [DUPLICATE_ITEM_ERROR])
@@ -1,4 +1,7 @@
 """Unit tests for forms."""
+from unittest.mock import patch
+
+from django.db import IntegrityError
 from django.test import TestCase
 
 from lists.forms import (
@@ -30,7 +33,7 @@ class ItemFormTest(TestCase):
         list_ = List.objects.create()
         form = ItemForm(data={"text": "do me"})
         new_item = form.save(for_list=list_)
-        self.assertEqual(new_item, Item.objects.first())
+        self.assertEqual(new_item, list_.item_set.first())
         self.assertEqual(new_item.text, "do me")
         self.assertEqual(new_item.list, list_)
 
@@ -51,17 +54,48 @@ class ExistingListItemFormTest(TestCase):
         self.assertFalse(form.is_valid())
         self.assertEqual(form.errors["text"], [EMPTY_ITEM_ERROR])
 
-    def test_form_validation_for_duplicate_items(self) -> None:
-        """Test validation for duplication."""
+    def test_form_save_reports_duplicate_items(self) -> None:
+        """Test that saving a duplicate records an error instead."""
         list_ = List.objects.create()
         Item.objects.create(list=list_, text="no twins!")
         form = ExistingListItemForm(for_list=list_, data={"text": "no twins!"})
-        self.assertFalse(form.is_valid())
+        self.assertTrue(form.is_valid())
+        self.assertIsNone(form.save())
         self.assertEqual(form.errors["text"], [DUPLICATE_ITEM_ERROR])
+        self.assertEqual(list_.item_set.count(), 1)
+
+    def test_form_save_reports_differently_cased_duplicates(self) -> None:
+        """Test that duplicates are compared by normalized text."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="Buy milk")
+        form = ExistingListItemForm(for_list=list_, data={"text": "buy MILK "})
+        form.is_valid()
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors["text"], [DUPLICATE_ITEM_ERROR])
+
+    def test_form_save_raises_other_integrity_errors(self) -> None:
+        """Test that only a clash with an existing item is a form error."""
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+        form.is_valid()
+
+        with patch.object(
+            Item, "save", side_effect=IntegrityError("FOREIGN KEY")
+        ):
+            with self.assertRaises(IntegrityError):
+                form.save()
+
+    def test_form_validation_does_not_query_for_duplicates(self) -> None:
+        """Test that validation leaves uniqueness to the INSERT."""
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid())
 
     def test_form_save(self) -> None:
         """Test the saving of forms."""
         list_ = List.objects.create()
         form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
         new_item = form.save()
-        self.assertEqual(new_item, Item.objects.all()[0])
+        self.assertEqual(new_item, list_.item_set.all()[0])
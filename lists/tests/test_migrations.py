@@ -0,0 +1,63 @@
+"""Test suite for data migrations of the lists app."""
+from importlib import import_module
+from unittest.mock import patch
+
+from django.apps import apps
+from django.db import connections
+from django.test import TestCase
+
+from lists.models import Item, List, item_text_key
+
+text_keys = import_module("lists.migrations.0008_item_text_key")
+
+
+class PopulateTextKeysTest(TestCase):
+    """Test suite for filling in text keys of existing items."""
+
+    def create_items(self, list_: List, *texts: str) -> list:
+        """Return items with the given texts, whatever their case or spaces."""
+        items = []
+
+        for n, text in enumerate(texts):
+            item = Item.objects.create(list=list_, text=f"placeholder {n}")
+            Item.objects.using(list_.database).filter(pk=item.pk).update(
+                text=text
+            )
+            items.append(item)
+
+        return items
+
+    def populate(self, *lists: List) -> None:
+        """Run the migration against every database holding the lists."""
+        for using in {list_.database for list_ in lists}:
+            text_keys.populate_text_keys(
+                apps, connections[using].schema_editor()
+            )
+
+    @patch.object(text_keys, "BATCH_SIZE", 2)
+    def test_renames_near_duplicates_within_a_list(self) -> None:
+        """Test that later copies get a suffix and the key save() uses."""
+        first = List.objects.create()
+        second = List.objects.create()
+        items = self.create_items(first, "Milk", " milk", "eggs", "MILK")
+        items += self.create_items(second, "milk")
+        self.populate(first, second)
+
+        for item in items:
+            item.refresh_from_db()
+            self.assertEqual(item.text_key, item_text_key(item.text))
+
+        self.assertEqual(
+            [item.text for item in items],
+            ["Milk", " milk (2)", "eggs", "MILK (3)", "milk"],
+        )
+
+    def test_renamed_items_can_be_saved_again(self) -> None:
+        """Test that saving a renamed copy keeps its key and is accepted."""
+        list_ = List.objects.create()
+        _, copy = self.create_items(list_, "Milk", "milk")
+        self.populate(list_)
+        copy.refresh_from_db()
+        key = copy.text_key
+        copy.save()
+        self.assertEqual(copy.text_key, key)
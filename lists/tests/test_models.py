@@ -1,7 +1,8 @@
 """Test suite for models unit tests."""
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.test import TestCase
-from lists.models import Item, List
+from lists.models import Item, List, item_text_key
 
 
 class ItemModelsTest(TestCase):
@@ -12,6 +13,19 @@ class ItemModelsTest(TestCase):
         item = Item()
         self.assertEqual(item.text, "")
 
+    def test_text_key_is_fixed_width_digest(self) -> None:
+        """Test that saving derives a compact key from the text."""
+        item = Item.objects.create(list=List.objects.create(), text="a" * 5000)
+        self.assertEqual(len(item.text_key), 32)
+        self.assertEqual(item.text_key, item_text_key("a" * 5000))
+
+    def test_text_key_ignores_case_and_surrounding_space(self) -> None:
+        """Test that normalized texts share a key."""
+        self.assertEqual(item_text_key("Buy milk"), item_text_key("buy milk "))
+        self.assertNotEqual(
+            item_text_key("Buy milk"), item_text_key("Buy mlk")
+        )
+
 
 class ListModelsTest(TestCase):
     """Test suite for List model."""
@@ -47,6 +61,14 @@ class ListModelsTest(TestCase):
             item = Item(list=list_, text="bla")
             item.full_clean()
 
+    def test_differently_cased_duplicates_are_invalid(self) -> None:
+        """Test that duplicates are detected on normalized text."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="Buy milk")
+
+        with self.assertRaises(ValidationError):
+            Item(list=list_, text="buy milk ").full_clean()
+
     def test_CAN_save_same_item_to_different_lists(self):
         """Test duplicate items can be saved to separate lists."""
         list1 = List.objects.create()
@@ -61,7 +83,23 @@ class ListModelsTest(TestCase):
         item1 = Item.objects.create(list=list1, text="i1")
         item2 = Item.objects.create(list=list1, text="item 2")
         item3 = Item.objects.create(list=list1, text="3")
-        self.assertEqual(list(Item.objects.all()), [item1, item2, item3])
+        self.assertEqual(list(list1.item_set.all()), [item1, item2, item3])
+
+    def test_create_with_items(self) -> None:
+        """Test creating a list seeded with items."""
+        list_ = List.objects.create_with_items(["a", "b"])
+        self.assertEqual(
+            list(list_.item_set.values_list("text", flat=True)), ["a", "b"]
+        )
+        self.assertEqual(list_.item_set.first().text_key, item_text_key("a"))
+        self.assertEqual(list_.version, 2)
+
+    def test_create_with_duplicate_items_creates_nothing(self) -> None:
+        """Test that a failed seed rolls back the new list."""
+        with self.assertRaises(IntegrityError):
+            List.objects.create_with_items(["a", "A"])
+
+        self.assertEqual(List.objects.count(), 0)
 
     def test_string_representation(self) -> None:
         """Test the string representation of items."""
@@ -0,0 +1,180 @@
+"""Test suite for reading lists from replica databases."""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from lists.cache import item_table_cache
+from lists.models import Item, List
+from superlists.replicas import (
+    PIN_COOKIE_NAME,
+    ReplicaPinMiddleware,
+    is_pinned,
+    primary_of,
+    read_database,
+)
+from superlists.routers import ListShardRouter
+
+REPLICA = "lists_test_replica"
+
+
+@override_settings(DATABASE_REPLICAS={"default": ["replica_a"]})
+class ReadDatabaseTest(SimpleTestCase):
+    """Test suite for choosing where to read from."""
+
+    def test_reads_primary_outside_requests(self) -> None:
+        """Test that commands and shells always read the primaries."""
+        self.assertTrue(is_pinned())
+        self.assertEqual(read_database("default"), "default")
+
+    def test_reads_replica_when_not_pinned(self) -> None:
+        """Test that an unpinned read goes to a replica."""
+        with patch("superlists.replicas.is_pinned", return_value=False):
+            self.assertEqual(read_database("default"), "replica_a")
+            self.assertEqual(read_database("lists_1"), "lists_1")
+
+    def test_primary_of_replica(self) -> None:
+        """Test that a replica maps back to the database it copies."""
+        self.assertEqual(primary_of("replica_a"), "default")
+        self.assertEqual(primary_of("default"), "default")
+
+    def test_replicas_are_never_migrated(self) -> None:
+        """Test that the router keeps migrations off replicas."""
+        allow = ListShardRouter().allow_migrate
+        self.assertFalse(allow("replica_a", "lists", "item"))
+        self.assertFalse(allow("replica_a", "auth", "user"))
+        self.assertTrue(allow("default", "lists", "item"))
+
+
+@override_settings(
+    DATABASE_REPLICAS={"default": ["replica_a"]}, REPLICA_PIN_SECONDS=7
+)
+class ReplicaPinMiddlewareTest(SimpleTestCase):
+    """Test suite for pinning requests to the primaries."""
+
+    def setUp(self) -> None:
+        """Wrap a view recording whether its request was pinned."""
+        self.factory = RequestFactory()
+        self.pinned = []
+
+        def view(request):
+            self.pinned.append(is_pinned())
+
+            return HttpResponse()
+
+        self.middleware = ReplicaPinMiddleware(view)
+
+    def test_get_reads_replicas(self) -> None:
+        """Test that a plain GET is unpinned and sets no cookie."""
+        response = self.middleware(self.factory.get("/"))
+        self.assertEqual(self.pinned, [False])
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+        self.assertTrue(is_pinned())
+
+    def test_post_pins_and_sets_cookie(self) -> None:
+        """Test that a write is pinned, and pins the next requests."""
+        response = self.middleware(self.factory.post("/"))
+        self.assertEqual(self.pinned, [True])
+        cookie = response.cookies[PIN_COOKIE_NAME]
+        self.assertEqual(cookie["max-age"], 7)
+        self.assertTrue(cookie["httponly"])
+
+    def test_cookie_pins_get(self) -> None:
+        """Test that a GET soon after a write reads the primaries."""
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE_NAME] = "1"
+        self.middleware(request)
+        self.assertEqual(self.pinned, [True])
+
+    @override_settings(DATABASE_REPLICAS={})
+    def test_no_cookie_without_replicas(self) -> None:
+        """Test that sites without replicas never set the cookie."""
+        response = self.middleware(self.factory.post("/"))
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+
+class ReplicaReadsTest(TransactionTestCase):
+    """Test suite for list pages served by a separate replica database."""
+
+    multi_db = True
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Add the replica database, filled by each sync."""
+        connections.databases[REPLICA] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        connections[REPLICA].creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Drop the replica again."""
+        super().tearDownClass()
+        connections[REPLICA].creation.destroy_test_db(
+            ":memory:", verbosity=0
+        )
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+
+    def setUp(self) -> None:
+        """Start with a list synced to a replica of its shard."""
+        item_table_cache.clear()
+        self.list_ = List.objects.create()
+        replicas = override_settings(
+            DATABASE_REPLICAS={self.list_.database: [REPLICA]}
+        )
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        Item.objects.create(list=self.list_, text="synced")
+        self.sync()
+
+    def sync(self) -> None:
+        """Copy the list's shard into the replica."""
+        output = StringIO()
+        call_command("sync_replica", "--once", stdout=output)
+        self.assertEqual(output.getvalue(), "Synced 1 replicas.\n")
+
+    def item_texts(self) -> list:
+        """Return the item texts a GET of the list's JSON shows."""
+        json = self.client.get(f"/lists/{self.list_.pk}/items.json").json()
+
+        return [item["text"] for item in json["items"]]
+
+    def test_get_reads_replica_until_synced(self) -> None:
+        """Test that a write outside the site shows after the next sync."""
+        Item.objects.create(list=self.list_, text="unsynced")
+        self.assertEqual(self.item_texts(), ["synced"])
+        self.sync()
+        self.assertEqual(self.item_texts(), ["synced", "unsynced"])
+
+    def test_writer_sees_own_item_before_sync(self) -> None:
+        """Test that the redirect after adding an item reads the primary."""
+        response = self.client.post(
+            self.list_.get_absolute_url(), data={"text": "mine"}, follow=True
+        )
+        self.assertIn(PIN_COOKIE_NAME, self.client.cookies)
+        self.assertContains(response, "mine")
+        self.assertEqual(self.item_texts(), ["synced", "mine"])
+        self.assertFalse(
+            Item.objects.using(REPLICA).filter(text="mine").exists()
+        )
+
+    def test_new_list_found_before_sync(self) -> None:
+        """Test that a list not yet on the replica is read from its shard."""
+        response = self.client.post("/lists/new", data={"text": "first"})
+        self.client.cookies.pop(PIN_COOKIE_NAME)
+        self.assertContains(self.client.get(response["Location"]), "first")
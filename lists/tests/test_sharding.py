@@ -0,0 +1,355 @@
+"""Test suite for spreading lists over several databases."""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from lists.batch import apply_item_operations
+from lists.coalescer import PendingItem, insert_items
+from lists.models import IdBlock, Item, List, item_text_key
+from lists.sharding import HiLoAllocator, shard_for
+
+SHARD = "lists_test_shard"
+
+
+class ShardedTestCase(TestCase):
+    """Test case with lists spread over default and a second database."""
+
+    multi_db = True
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Add the second shard, migrated, before the test transactions."""
+        cls.shards = override_settings(LIST_SHARDS=["default", SHARD])
+        cls.shards.enable()
+        connections.databases[SHARD] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+        connections.ensure_defaults(SHARD)
+        connections.prepare_test_settings(SHARD)
+        connections[SHARD].creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Drop the second shard again."""
+        super().tearDownClass()
+        connections[SHARD].creation.destroy_test_db(":memory:", verbosity=0)
+        del connections[SHARD]
+        del connections.databases[SHARD]
+        cls.shards.disable()
+
+    def create_list_in(self, alias: str, *texts: str) -> List:
+        """Create a list with items in the given shard."""
+        list_ = List.objects.new()
+
+        while shard_for(list_.pk) != alias:
+            list_ = List.objects.new()
+
+        list_.save(force_insert=True)
+
+        for text in texts:
+            list_.item_set.create(text=text)
+
+        return list_
+
+
+@override_settings(LIST_SHARDS=["default", "lists_1", "lists_2"])
+class ShardForTest(SimpleTestCase):
+    """Test suite for picking a list's shard."""
+
+    def test_picks_shard_by_id(self) -> None:
+        """Test that ids go round the shards."""
+        self.assertEqual(
+            [shard_for(list_id) for list_id in (3, 4, 5, "6")],
+            ["default", "lists_1", "lists_2", "default"],
+        )
+
+    def test_unsaved_list_has_no_shard(self) -> None:
+        """Test that there is no shard without an id."""
+        self.assertIsNone(shard_for(None))
+
+
+class HiLoAllocatorTest(SimpleTestCase):
+    """Test suite for handing out ids a block at a time."""
+
+    def test_reserves_one_block_per_block_size_ids(self) -> None:
+        """Test that ids come from consecutive reserved blocks."""
+        blocks = iter([0, 5])
+        allocator = HiLoAllocator(
+            lambda size, count: next(blocks), block_size=2
+        )
+        self.assertEqual(
+            [allocator.allocate() for _ in range(4)], [1, 2, 11, 12]
+        )
+
+    def test_reset_drops_current_block(self) -> None:
+        """Test that the next id after a reset comes from a new block."""
+        blocks = iter([0, 5])
+        allocator = HiLoAllocator(
+            lambda size, count: next(blocks), block_size=10
+        )
+        self.assertEqual(allocator.allocate(), 1)
+        allocator.reset()
+        self.assertEqual(allocator.allocate(), 51)
+
+    def test_allocate_many_reserves_blocks_at_once(self) -> None:
+        """Test that a range of ids costs a single reservation."""
+        calls = []
+        allocator = HiLoAllocator(
+            lambda size, count: calls.append(count) or 3, block_size=10
+        )
+        self.assertEqual(allocator.allocate_many(25), range(31, 56))
+        self.assertEqual(calls, [3])
+
+    def test_forked_process_reserves_its_own_block(self) -> None:
+        """Test that a child process never reuses its parent's block."""
+        blocks = iter([0, 1])
+        allocator = HiLoAllocator(
+            lambda size, count: next(blocks), block_size=10
+        )
+        self.assertEqual(allocator.allocate(), 1)
+
+        with patch("lists.sharding.os.getpid", return_value=-1):
+            self.assertEqual(allocator.allocate(), 11)
+
+
+class IdBlockTest(TestCase):
+    """Test suite for reserving blocks of ids."""
+
+    multi_db = True
+
+    def test_first_block_starts_above_existing_rows(self) -> None:
+        """Test that sharded ids never clash with rows made before."""
+        List.objects.bulk_create([List(pk=250)])
+        self.assertEqual(IdBlock.objects.reserve("list", 100), 3)
+        self.assertEqual(IdBlock.objects.reserve("list", 100), 4)
+        self.assertEqual(IdBlock.objects.reserve("item", 100), 1)
+
+    def test_reserves_several_blocks_together(self) -> None:
+        """Test that a reservation of count blocks moves the counter on."""
+        self.assertEqual(IdBlock.objects.reserve("item", 100, 3), 1)
+        self.assertEqual(IdBlock.objects.reserve("item", 100), 4)
+
+    def test_block_survives_rolled_back_transaction(self) -> None:
+        """Test that a block reserved in a failed write is not reissued."""
+        allocator = HiLoAllocator(
+            lambda size, count: IdBlock.objects.reserve("item", size, count),
+            100,
+        )
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic(using="default"):
+                self.assertEqual(allocator.allocate(), 101)
+                raise IntegrityError
+
+        self.assertEqual(IdBlock.objects.reserve("item", 100), 2)
+
+
+class ShardedListTest(ShardedTestCase):
+    """Test suite for lists and items stored in their shard."""
+
+    def test_new_lists_go_round_the_shards(self) -> None:
+        """Test that consecutive lists land in different shards."""
+        lists = [List.objects.create() for _ in range(4)]
+        self.assertEqual(len({list_.pk for list_ in lists}), 4)
+
+        for list_ in lists:
+            self.assertEqual(list_._state.db, shard_for(list_.pk))
+            self.assertTrue(
+                List.objects.using(list_.database).filter(pk=list_.pk).exists()
+            )
+
+        self.assertEqual(
+            {list_.database for list_ in lists}, {"default", SHARD}
+        )
+
+    def test_items_are_stored_with_their_list(self) -> None:
+        """Test that items, and version bumps, go to the list's shard."""
+        list_ = self.create_list_in(SHARD, "a")
+        Item.objects.using(SHARD).get(list=list_, text="a")
+        self.assertFalse(Item.objects.using("default").exists())
+        self.assertEqual(List.objects.find(list_.pk).version, 1)
+
+    def test_duplicates_in_second_shard_are_invalid(self) -> None:
+        """Test that validation looks for duplicates in the list's shard."""
+        list_ = self.create_list_in(SHARD, "bla")
+
+        with self.assertRaises(ValidationError):
+            Item(list=list_, text="BLA").full_clean()
+
+        Item(list=list_, text="other").full_clean()
+
+    def test_find_looks_in_other_shards(self) -> None:
+        """Test that a list not yet rebalanced is still found."""
+        list_ = List.objects.new()
+
+        while shard_for(list_.pk) != SHARD:
+            list_ = List.objects.new()
+
+        List.objects.using("default").bulk_create([list_])
+        self.assertEqual(List.objects.find(list_.pk)._state.db, "default")
+        self.assertIsNone(List.objects.find(list_.pk + 2))
+
+    def test_coalesced_inserts_go_to_each_lists_shard(self) -> None:
+        """Test that one batch can write to several shards."""
+        first = self.create_list_in("default")
+        second = self.create_list_in(SHARD)
+        insert_items([
+            PendingItem(list_.pk, "x", item_text_key("x"), list_.database)
+            for list_ in (first, second)
+        ])
+        self.assertEqual(Item.objects.using("default").get().list_id, first.pk)
+        self.assertEqual(Item.objects.using(SHARD).get().list_id, second.pk)
+
+
+class ShardedViewsTest(ShardedTestCase):
+    """Test suite for the list views with several shards."""
+
+    def test_new_list_is_saved_in_its_shard(self) -> None:
+        """Test that the new list and its first item share a shard."""
+        response = self.client.post("/lists/new", data={"text": "first"})
+        list_ = List.objects.find(response["Location"].split("/")[-2])
+        self.assertRedirects(response, list_.get_absolute_url())
+        item = Item.objects.using(list_.database).get()
+        self.assertEqual((item.list_id, item.text), (list_.pk, "first"))
+
+    def test_view_and_add_to_list_in_second_shard(self) -> None:
+        """Test that pages and POSTs reach a list outside default."""
+        list_ = self.create_list_in(SHARD, "one")
+        self.client.post(list_.get_absolute_url(), data={"text": "two"})
+        response = self.client.get(list_.get_absolute_url())
+        self.assertContains(response, "one")
+        self.assertContains(response, "two")
+        json = self.client.get(f"/lists/{list_.pk}/items.json").json()
+        self.assertEqual(
+            [item["text"] for item in json["items"]], ["one", "two"]
+        )
+
+    def test_missing_list_is_not_found(self) -> None:
+        """Test that an unknown list id gives a 404."""
+        self.assertEqual(self.client.get("/lists/999/").status_code, 404)
+
+
+class RebalanceListsTest(ShardedTestCase):
+    """Test suite for moving lists between shards."""
+
+    def misplace(self, list_: List, alias: str) -> None:
+        """Move a list out of its shard behind the router's back."""
+        List.objects.move(list_.pk, list_.database, alias)
+
+    def test_move_keeps_ids_and_bumps_version(self) -> None:
+        """Test that a moved list keeps its id and items' ids."""
+        list_ = self.create_list_in("default", "a", "b")
+        version = List.objects.find(list_.pk).version
+        item_ids = list(list_.item_set.values_list("pk", flat=True))
+        self.assertTrue(List.objects.move(list_.pk, "default", SHARD))
+
+        moved = List.objects.using(SHARD).get(pk=list_.pk)
+        self.assertEqual(moved.version, version + 1)
+        self.assertEqual(
+            list(moved.item_set.values_list("pk", flat=True)), item_ids
+        )
+        self.assertFalse(List.objects.using("default").exists())
+        self.assertFalse(Item.objects.using("default").exists())
+
+    def test_move_of_missing_list_does_nothing(self) -> None:
+        """Test that moving a list not in the source reports False."""
+        self.assertFalse(List.objects.move(1, "default", SHARD))
+
+    def moved_list(self, *texts: str) -> List:
+        """Return a list loaded from default, then moved to SHARD."""
+        list_ = self.create_list_in("default", *texts)
+        stale = List.objects.using("default").get(pk=list_.pk)
+        List.objects.move(list_.pk, "default", SHARD)
+
+        return stale
+
+    def shard_texts(self) -> dict:
+        """Return the item texts in each shard."""
+        return {
+            alias: list(
+                Item.objects.using(alias).values_list("text", flat=True)
+            )
+            for alias in ("default", SHARD)
+        }
+
+    def test_new_item_follows_moved_list(self) -> None:
+        """Test that an item added to a list loaded before a move is kept."""
+        stale = self.moved_list("a")
+        Item.objects.create(list=stale, text="b")
+        self.assertEqual(
+            self.shard_texts(), {"default": [], SHARD: ["a", "b"]}
+        )
+        self.assertEqual(List.objects.using(SHARD).get().version, 3)
+
+    def test_edit_and_delete_follow_moved_list(self) -> None:
+        """Test that items loaded before a move are changed where it went."""
+        self.create_list_in("default", "a", "b")
+        edited, deleted = Item.objects.using("default").all()
+        List.objects.move(edited.list_id, "default", SHARD)
+        edited.text = "c"
+        edited.save()
+        deleted.delete()
+        self.assertEqual(self.shard_texts(), {"default": [], SHARD: ["c"]})
+
+    def test_batch_follows_moved_list(self) -> None:
+        """Test that batch operations are applied in the list's new shard."""
+        stale = self.moved_list("a")
+        results = apply_item_operations(stale, [{"op": "add", "text": "b"}])
+        self.assertEqual(results[0]["status"], "ok")
+        self.assertEqual(
+            self.shard_texts(), {"default": [], SHARD: ["a", "b"]}
+        )
+
+    def test_coalesced_insert_follows_moved_list(self) -> None:
+        """Test that a queued item for a moved list is inserted with it."""
+        stale = self.moved_list()
+        [item] = insert_items(
+            [PendingItem(stale.pk, "x", item_text_key("x"), "default")]
+        )
+        self.assertEqual(item._state.db, SHARD)
+        self.assertEqual(self.shard_texts(), {"default": [], SHARD: ["x"]})
+
+    def test_item_of_deleted_list_is_refused(self) -> None:
+        """Test that saving an item for a list in no shard raises."""
+        stale = self.moved_list()
+        List.objects.using(SHARD).filter(pk=stale.pk).delete()
+
+        with self.assertRaises(List.DoesNotExist):
+            Item.objects.create(list=stale, text="lost")
+
+        self.assertEqual(self.shard_texts(), {"default": [], SHARD: []})
+
+    def test_moves_misplaced_lists_home(self) -> None:
+        """Test that rebalance_lists puts every list in its shard."""
+        home = self.create_list_in("default", "stays")
+        away = self.create_list_in(SHARD, "returns")
+        self.misplace(away, "default")
+        output = StringIO()
+        call_command("rebalance_lists", stdout=output)
+
+        self.assertIn(
+            f"Moved 1 lists from default to {SHARD}.", output.getvalue()
+        )
+        self.assertEqual(List.objects.find(home.pk)._state.db, "default")
+        self.assertEqual(List.objects.find(away.pk)._state.db, SHARD)
+        self.assertEqual(
+            Item.objects.using(SHARD).get().text, "returns"
+        )
+
+    def test_dry_run_moves_nothing(self) -> None:
+        """Test that --dry-run only counts."""
+        away = self.create_list_in(SHARD)
+        self.misplace(away, "default")
+        output = StringIO()
+        call_command("rebalance_lists", "--dry-run", stdout=output)
+
+        self.assertIn("Would move 1 lists in all.", output.getvalue())
+        self.assertEqual(List.objects.find(away.pk)._state.db, "default")
@@ -0,0 +1,89 @@
+"""Test suite for the fingerprinted, precompressed static storage."""
+import gzip
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase, override_settings
+
+from superlists import storage
+from superlists.storage import CompressedManifestStaticFilesStorage
+
+
+STORAGE = "superlists.storage.CompressedManifestStaticFilesStorage"
+
+
+class CompressedManifestStorageTest(SimpleTestCase):
+    """Test suite for collectstatic with the compressed manifest storage."""
+
+    def setUp(self) -> None:
+        """Collect the static files into a temporary STATIC_ROOT."""
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root, STATICFILES_STORAGE=STORAGE
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def collect(self) -> CompressedManifestStaticFilesStorage:
+        """Run collectstatic and return the storage it wrote to."""
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+        return CompressedManifestStaticFilesStorage()
+
+    def test_writes_hashed_names_to_manifest(self) -> None:
+        """Test that collected files get content-hashed names."""
+        static = self.collect()
+        hashed = static.stored_name("list.js")
+        self.assertRegex(hashed, r"^list\.[0-9a-f]{12}\.js$")
+        self.assertTrue(static.exists(hashed))
+
+    def test_writes_gzip_sibling_of_hashed_file(self) -> None:
+        """Test that a .gz copy with the same content sits beside the file."""
+        static = self.collect()
+        hashed = static.stored_name("bootstrap/css/bootstrap.min.css")
+
+        with static.open(hashed) as original:
+            content = original.read()
+
+        with gzip.open(static.path(hashed + ".gz")) as compressed:
+            self.assertEqual(compressed.read(), content)
+
+    def test_skips_already_compressed_formats(self) -> None:
+        """Test that woff fonts are not recompressed."""
+        static = self.collect()
+        hashed = static.stored_name(
+            "bootstrap/fonts/glyphicons-halflings-regular.woff"
+        )
+        self.assertFalse(static.exists(hashed + ".gz"))
+
+    def test_skips_siblings_larger_than_original(self) -> None:
+        """Test that tiny files are not given a bigger compressed copy."""
+        static = self.collect()
+        hashed = static.stored_name("base.css")
+        self.assertFalse(static.exists(hashed + ".gz"))
+
+    def test_writes_brotli_sibling_when_available(self) -> None:
+        """Test that a .br copy is written when brotli is installed."""
+        fake_brotli = type(
+            "FakeBrotli", (), {"compress": staticmethod(lambda c, **kw: b"")}
+        )
+
+        with patch.object(storage, "brotli", fake_brotli):
+            static = self.collect()
+
+        hashed = static.stored_name("list.js")
+        self.assertTrue(os.path.exists(static.path(hashed + ".br")))
+
+    def test_base_template_links_hashed_assets(self) -> None:
+        """Test that templates resolve asset URLs through the manifest."""
+        static = self.collect()
+        html = render_to_string("home.html")
+
+        for name in ("bootstrap/css/bootstrap.min.css", "list.js"):
+            self.assertIn(static.url(name), html)
+            self.assertNotIn(f'"/static/{name}"', html)
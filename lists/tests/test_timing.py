@@ -0,0 +1,76 @@
+"""Test suite for the Server-Timing middleware."""
+import re
+
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from lists.models import Item, List
+from superlists.timing import RequestTimer
+
+
+def parse_server_timing(header: str) -> dict:
+    """Return Server-Timing metric durations by name."""
+    return {
+        name: float(duration)
+        for name, duration in re.findall(r"(\w+);dur=([\d.]+)", header)
+    }
+
+
+class RequestTimerTest(TestCase):
+    """Test suite for phase accounting."""
+
+    def test_nested_phases_are_exclusive(self) -> None:
+        """Test that inner phase time is not counted in the outer one."""
+        timer = RequestTimer()
+
+        with timer.phase("template"):
+            with timer.phase("db"):
+                pass
+
+        self.assertEqual(timer.counts, {"template": 1, "db": 1})
+        self.assertIn("db;dur=", timer.header(1.0))
+        self.assertLess(
+            timer.totals["db"] + timer.totals["template"], 1.0
+        )
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    """Test suite for the Server-Timing header."""
+
+    def test_reports_db_and_template_phases(self) -> None:
+        """Test that a list page reports measured phases."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="itemey 1")
+        response = self.client.get(f"/lists/{list_.id}/?limit=5")
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertIn("db", metrics)
+        self.assertIn("template", metrics)
+        self.assertGreaterEqual(metrics["total"], metrics["db"])
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+    def test_reports_session_and_auth_phases(self) -> None:
+        """Test that logged-in pages report session and auth time."""
+        self.client.force_login(User.objects.create(email="a@b.com"))
+        response = self.client.get("/")
+        metrics = parse_server_timing(response["Server-Timing"])
+        self.assertIn("session", metrics)
+        self.assertIn("auth", metrics)
+
+    @override_settings(
+        SERVER_TIMING={"SLOW_REQUEST_MS": 0, "SLOW_REQUEST_SAMPLE_RATE": 1.0}
+    )
+    def test_logs_slow_requests(self) -> None:
+        """Test that requests over the threshold are logged."""
+        with self.assertLogs("superlists.timing", "WARNING") as logs:
+            self.client.get("/")
+
+        self.assertIn("Slow request GET /", logs.output[0])
+
+    @override_settings(
+        SERVER_TIMING={"SLOW_REQUEST_MS": 0, "SLOW_REQUEST_SAMPLE_RATE": 0}
+    )
+    def test_sampling_can_drop_slow_request_logs(self) -> None:
+        """Test that the sample rate limits logging."""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs("superlists.timing", "WARNING"):
+                self.client.get("/")
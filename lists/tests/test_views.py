@@ -1,7 +1,14 @@
 """Test suite for views unit tests."""
+import re
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import IntegrityError
 from django.http import HttpResponse
-from django.test import TestCase
+from django.test import Client, TestCase, override_settings
 from django.utils.html import escape
+from accounts.models import User
+from lists.cache import home_page_cache, item_table_cache
 from lists.forms import (
     DUPLICATE_ITEM_ERROR,
     EMPTY_ITEM_ERROR,
@@ -9,11 +16,29 @@ from lists.forms import (
     ItemForm,
 )
 from lists.models import Item, List
+from functional_tests.budgets import (
+    Budget,
+    BudgetTestMixin,
+    describe_overrun,
+)
+
+
+def in_every_shard(model) -> list:
+    """Return every row of a lists model, whichever shard it is in."""
+    return [
+        row
+        for alias in settings.LIST_SHARDS
+        for row in model.objects.using(alias)
+    ]
 
 
 class HomePageTest(TestCase):
     """Test suite for to-do list homepage."""
 
+    def setUp(self) -> None:
+        """Start without a cached home page."""
+        home_page_cache.clear()
+
     def test_uses_home_template(self) -> None:
         """Test for homepage rendering."""
         response = self.client.get("/")
@@ -25,6 +50,46 @@ class HomePageTest(TestCase):
         self.assertIsInstance(response.context["form"], ItemForm)
 
 
+class HomePageCacheTest(TestCase):
+    """Test suite for the anonymous home page cache."""
+
+    def setUp(self) -> None:
+        """Fill the cache with one anonymous visit."""
+        home_page_cache.clear()
+        self.client.get("/")
+
+    def test_serves_cached_page_without_templates_or_queries(self) -> None:
+        """Test that repeat anonymous visits skip rendering."""
+        with self.assertNumQueries(0):
+            response = self.client.get("/")
+
+        self.assertEqual(response.templates, [])
+        self.assertContains(response, "Start a new To-Do list")
+
+    def test_each_response_gets_a_valid_csrf_token(self) -> None:
+        """Test that the cached page can still be POSTed from."""
+        client = Client(enforce_csrf_checks=True)
+        response = client.get("/")
+        token = re.search(
+            r"name='csrfmiddlewaretoken' value='(\w+)'",
+            response.content.decode(),
+        ).group(1)
+        self.assertNotIn("placeholder__", response.content.decode())
+        self.assertIn("csrftoken", response.cookies)
+        response = client.post(
+            "/lists/new",
+            data={"text": "A new list item", "csrfmiddlewaretoken": token},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_logged_in_users_get_a_rendered_page(self) -> None:
+        """Test that visitors with a session bypass the cache."""
+        self.client.force_login(User.objects.create(email="a@b.com"))
+        response = self.client.get("/")
+        self.assertTemplateUsed(response, "home.html")
+        self.assertContains(response, "Logged in as a@b.com")
+
+
 class ListViewTest(TestCase):
     """Test suit for the to-do list itself."""
 
@@ -67,8 +132,8 @@ class ListViewTest(TestCase):
             data={"text": "A new item for an existing list"},
         )
 
-        self.assertEqual(Item.objects.count(), 1)
-        new_item = Item.objects.first()
+        self.assertEqual(len(in_every_shard(Item)), 1)
+        new_item = in_every_shard(Item)[0]
         self.assertEqual(new_item.text, "A new item for an existing list")
         self.assertEqual(new_item.list, correct_list)
 
@@ -91,7 +156,7 @@ class ListViewTest(TestCase):
     def test_for_invalid_input_nothing_saved_to_db(self) -> None:
         """Test no invalid entries are saved to database."""
         self.post_invalid_input()
-        self.assertEqual(Item.objects.count(), 0)
+        self.assertEqual(len(in_every_shard(Item)), 0)
 
     def test_for_invalid_input_renders_list_template(self) -> None:
         """Test error rending in list template."""
@@ -122,7 +187,7 @@ class ListViewTest(TestCase):
         expected_error = escape(DUPLICATE_ITEM_ERROR)
         self.assertContains(response, expected_error)
         self.assertTemplateUsed(response, "list.html")
-        self.assertEqual(Item.objects.all().count(), 1)
+        self.assertEqual(len(in_every_shard(Item)), 1)
 
     def test_displays_item_form(self) -> None:
         """Test usage of forms for item list."""
@@ -132,14 +197,202 @@ class ListViewTest(TestCase):
         self.assertContains(response, 'name="text"')
 
 
+class ListConditionalGetTest(TestCase):
+    """Test suite for revalidating list pages with ETags."""
+
+    def test_sends_etag_and_last_modified(self) -> None:
+        """Test that list pages carry validators."""
+        list_ = List.objects.create()
+        response = self.client.get(f"/lists/{list_.id}/")
+        self.assertIn(list_.etag, response["ETag"])
+        self.assertIn("Last-Modified", response)
+
+    def test_matching_etag_returns_304_without_loading_items(self) -> None:
+        """Test that an unchanged list is not rendered again."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="itemey 1")
+        etag = self.client.get(f"/lists/{list_.id}/")["ETag"]
+
+        with self.assertNumQueries(1, using=list_.database):
+            response = self.client.get(
+                f"/lists/{list_.id}/", HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_new_item_changes_etag(self) -> None:
+        """Test that adding an item invalidates the old ETag."""
+        list_ = List.objects.create()
+        etag = self.client.get(f"/lists/{list_.id}/")["ETag"]
+        self.client.post(f"/lists/{list_.id}/", data={"text": "itemey 1"})
+        response = self.client.get(
+            f"/lists/{list_.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "itemey 1")
+
+    def test_etag_differs_per_viewer(self) -> None:
+        """Test that a different CSRF cookie gets a different ETag."""
+        list_ = List.objects.create()
+        etag = self.client.get(f"/lists/{list_.id}/")["ETag"]
+        self.client.cookies["csrftoken"] = "another-token"
+        response = self.client.get(
+            f"/lists/{list_.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(LIST_PAGE_SIZE=2)
+class ListPaginationTest(TestCase):
+    """Test suite for keyset pagination of list items."""
+
+    def setUp(self) -> None:
+        """Create a list with five items."""
+        self.list_ = List.objects.create()
+        self.items = [
+            Item.objects.create(list=self.list_, text=f"itemey {n}")
+            for n in range(1, 6)
+        ]
+
+    def test_first_page_links_to_next_page(self) -> None:
+        """Test that only the first page of items is shown."""
+        response = self.client.get(f"/lists/{self.list_.id}/")
+        self.assertContains(response, "2: itemey 2")
+        self.assertNotContains(response, "itemey 3")
+        self.assertContains(
+            response, f"?after={self.items[1].id}&amp;start=2&amp;limit=2"
+        )
+
+    def test_later_pages_keep_numbering(self) -> None:
+        """Test that items are numbered from the start of the list."""
+        response = self.client.get(
+            f"/lists/{self.list_.id}/?after={self.items[1].id}&start=2"
+        )
+        self.assertContains(response, "3: itemey 3")
+        self.assertContains(response, "4: itemey 4")
+        self.assertNotContains(response, "itemey 2")
+
+    def test_last_page_has_no_next_link(self) -> None:
+        """Test that the final page does not link further."""
+        response = self.client.get(
+            f"/lists/{self.list_.id}/?after={self.items[3].id}&start=4"
+        )
+        self.assertContains(response, "5: itemey 5")
+        self.assertNotContains(response, "Next page")
+        self.assertContains(response, "First page")
+
+    def test_limit_is_capped(self) -> None:
+        """Test that clients cannot request unbounded pages."""
+        with self.settings(LIST_MAX_PAGE_SIZE=3):
+            response = self.client.get(f"/lists/{self.list_.id}/?limit=50")
+
+        self.assertContains(response, "3: itemey 3")
+        self.assertNotContains(response, "itemey 4")
+
+    def test_invalid_parameters_show_first_page(self) -> None:
+        """Test that garbage page parameters are ignored."""
+        response = self.client.get(
+            f"/lists/{self.list_.id}/?after=x&start=-1&limit=y"
+        )
+        self.assertContains(response, "1: itemey 1")
+
+
+@override_settings(LIST_PAGE_SIZE=2, LIST_STREAM_CHUNK_SIZE=2)
+class ListStreamingTest(TestCase):
+    """Test suite for streaming whole lists."""
+
+    def test_streams_every_item_in_chunks(self) -> None:
+        """Test that a streamed page holds all items, numbered in order."""
+        list_ = List.objects.create()
+
+        for n in range(1, 6):
+            Item.objects.create(list=list_, text=f"itemey {n}")
+
+        response = self.client.get(f"/lists/{list_.id}/?stream=1")
+        self.assertTrue(response.streaming)
+
+        with self.assertNumQueries(3, using=list_.database):
+            content = b"".join(response.streaming_content).decode()
+
+        for n in range(1, 6):
+            self.assertIn(f"{n}: itemey {n}", content)
+
+        self.assertIn('<table id="id_list_table" class="table">', content)
+        self.assertNotIn("Next page", content)
+        self.assertTrue(content.rstrip().endswith("</html>"))
+
+    def test_escapes_item_text(self) -> None:
+        """Test that streamed rows are HTML escaped."""
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="<b>bold</b>")
+        response = self.client.get(f"/lists/{list_.id}/?stream=1")
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn(escape("<b>bold</b>"), content)
+
+
+class ListItemsJsonTest(TestCase):
+    """Test suite for the JSON read API of list items."""
+
+    def test_returns_items_of_list(self) -> None:
+        """Test that items are returned with their ids."""
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text="itemey 1")
+        Item.objects.create(list=List.objects.create(), text="other")
+        response = self.client.get(f"/lists/{list_.id}/items.json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            response.json(),
+            {
+                "list": list_.id,
+                "version": 1,
+                "items": [{"id": item.id, "text": "itemey 1"}],
+                "next": None,
+            },
+        )
+        self.assertNotIn(b": ", response.content)
+
+    def test_pages_with_cursor(self) -> None:
+        """Test that next links follow the keyset cursor."""
+        list_ = List.objects.create()
+        items = [
+            Item.objects.create(list=list_, text=f"itemey {n}")
+            for n in range(3)
+        ]
+        response = self.client.get(f"/lists/{list_.id}/items.json?limit=2")
+        self.assertEqual(
+            response.json()["next"],
+            f"/lists/{list_.id}/items.json?after={items[1].id}&limit=2",
+        )
+        response = self.client.get(response.json()["next"])
+        self.assertEqual(
+            response.json()["items"], [{"id": items[2].id, "text": "itemey 2"}]
+        )
+        self.assertIsNone(response.json()["next"])
+
+    def test_matching_etag_returns_304(self) -> None:
+        """Test that unchanged lists can be revalidated."""
+        list_ = List.objects.create()
+        etag = self.client.get(f"/lists/{list_.id}/items.json")["ETag"]
+        response = self.client.get(
+            f"/lists/{list_.id}/items.json", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_list_is_404(self) -> None:
+        """Test that unknown lists are not found."""
+        response = self.client.get("/lists/999/items.json")
+        self.assertEqual(response.status_code, 404)
+
+
 class NewListTest(TestCase):
     """Test suite for initializing new to-do lists."""
 
     def test_can_save_a_POST_request(self) -> None:  # noqa: N802
         """Test a POST request is correctly saved."""
         self.client.post("/lists/new", data={"text": "A new list item"})
-        self.assertEqual(Item.objects.count(), 1)
-        new_item = Item.objects.first()
+        self.assertEqual(len(in_every_shard(Item)), 1)
+        new_item = in_every_shard(Item)[0]
         self.assertEqual(new_item.text, "A new list item")
 
     def test_redirects_after_POST(self) -> None:  # noqa: N802
@@ -147,14 +400,22 @@ class NewListTest(TestCase):
         response = self.client.post(
             "/lists/new", data={"text": "A new list item"}
         )
-        new_list = List.objects.first()
+        new_list = in_every_shard(List)[0]
         self.assertRedirects(response, f"/lists/{new_list.id}/")
 
+    @patch("lists.views.ItemForm.save", side_effect=IntegrityError)
+    def test_failed_item_save_leaves_no_empty_list(self, mock_save) -> None:
+        """Test that the list and its first item are created atomically."""
+        with self.assertRaises(IntegrityError):
+            self.client.post("/lists/new", data={"text": "A new list item"})
+
+        self.assertEqual(len(in_every_shard(List)), 0)
+
     def test_invalid_list_items_arent_saved(self) -> None:
         """Test that invalid items are not sent to database."""
         self.client.post("/lists/new", data={"text": ""})
-        self.assertEqual(List.objects.count(), 0)
-        self.assertEqual(Item.objects.count(), 0)
+        self.assertEqual(len(in_every_shard(List)), 0)
+        self.assertEqual(len(in_every_shard(Item)), 0)
 
     def test_for_invalid_input_renders_home_template(self) -> None:
         """Test that invalid entry rerenders the home page."""
@@ -171,3 +432,61 @@ class NewListTest(TestCase):
         """Test that invalid entrys are transfered to template."""
         response = self.client.post("/lists/new", data={"text": ""})
         self.assertIsInstance(response.context["form"], ItemForm)
+
+
+class ViewBudgetTest(BudgetTestMixin, TestCase):
+    """Test suite keeping list views within their query and time budgets."""
+
+    def setUp(self) -> None:
+        """Seed a large list and log in."""
+        self.list_ = self.seed_budget_data()
+
+    def test_home_page(self) -> None:
+        """Test the home page budget."""
+        self.assertWithinBudget("home", "get", "/")
+
+    def test_view_list_uncached(self) -> None:
+        """Test the list page budget when its table must be rendered."""
+        item_table_cache.clear()
+
+        self.assertWithinBudget(
+            "view_list_get", "get", f"/lists/{self.list_.id}/"
+        )
+
+    def test_view_list_post(self) -> None:
+        """Test the list page budget when adding an item."""
+        self.assertWithinBudget(
+            "view_list_post",
+            "post",
+            f"/lists/{self.list_.id}/",
+            status_code=302,
+            data={"text": "one more"},
+        )
+
+    def test_new_list(self) -> None:
+        """Test the new list budget."""
+        self.assertWithinBudget(
+            "new_list",
+            "post",
+            "/lists/new",
+            status_code=302,
+            data={"text": "A new list item"},
+        )
+
+    def test_wrong_status_fails_before_counting(self) -> None:
+        """Test that a cheap error page does not pass as within budget."""
+        with self.assertRaisesRegex(AssertionError, "404 != 200"):
+            self.assertWithinBudget("view_list_get", "get", "/lists/0/")
+
+    def test_overrun_report_marks_extra_and_repeated_queries(self) -> None:
+        """Test the report shown when a budget is exceeded."""
+        queries = [
+            {"sql": "SELECT 1 FROM lists_list"},
+            {"sql": "SELECT * FROM lists_item WHERE id = 1"},
+            {"sql": "SELECT * FROM lists_item WHERE id = 2"},
+        ]
+        report = describe_overrun("view_list", Budget(1, 1.0), queries)
+        self.assertIn("view_list ran 3 queries, budget is 1:", report)
+        self.assertIn("  1. SELECT 1 FROM lists_list", report)
+        self.assertIn("+ 3. SELECT * FROM lists_item WHERE id = 2", report)
+        self.assertIn("2x SELECT * FROM lists_item WHERE id = ?", report)
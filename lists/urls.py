@@ -19,4 +19,10 @@ from lists import views
 urlpatterns = [
     url(r"^new$", views.new_list, name="new_list"),
     url(r"^(\d+)/$", views.view_list, name="view_list"),
+    url(
+        r"^(\d+)/items\.json$",
+        views.list_items_json,
+        name="list_items_json",
+    ),
+    url(r"^(\d+)/items/batch$", views.batch_items, name="batch_items"),
 ]
@@ -1,30 +1,293 @@
 """Django views for to-do list app."""
+import datetime
+import hashlib
+import json
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
 from django.core.exceptions import ValidationError
-from django.http import HttpRequest, HttpResponse
+from django.core.urlresolvers import reverse
+from django.db import IntegrityError, transaction
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.middleware.csrf import get_token
 from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition, require_POST
+from lists.batch import apply_item_operations
+from lists.cache import (
+    CSRF_TOKEN_PLACEHOLDER,
+    home_page_cache,
+    item_table_cache,
+    item_table_key,
+)
 from lists.forms import ExistingListItemForm, ItemForm
-from lists.models import Item, List
+from lists.models import List
+from lists.pagination import keyset_page, parse_page_params
+
+
+ITEM_ROWS_MARKER = "<!-- item rows -->"
 
 
 def home_page(request: HttpRequest) -> HttpResponse:
     """Renders home page."""
-    return render(request, "home.html", {"form": ItemForm()})
+    if not _is_anonymous_visit(request):
+        return render(request, "home.html", {"form": ItemForm()})
+
+    page = home_page_cache.get_or_set(
+        "anonymous",
+        lambda: render_to_string(
+            "home.html",
+            {"form": ItemForm(), "csrf_token": CSRF_TOKEN_PLACEHOLDER},
+            request=request,
+        ),
+    )
+
+    return HttpResponse(
+        page.replace(CSRF_TOKEN_PLACEHOLDER, get_token(request))
+    )
+
+
+def _is_anonymous_visit(request: HttpRequest) -> bool:
+    """Return whether a request can only see the anonymous home page.
+
+    Without session or messages cookies there is no user to greet and no
+    message to show, so the page does not depend on the session at all.
+    """
+    return (
+        request.method == "GET"
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _get_list(request: HttpRequest, list_id: str) -> Optional[List]:
+    """Return the requested list, loading it at most once per request."""
+    if not hasattr(request, "_list"):
+        request._list = List.objects.find(list_id)
+
+    return request._list
+
+
+def _is_conditional(request: HttpRequest) -> bool:
+    """Return whether a list page response may be revalidated with 304."""
+    return (
+        request.method in ("GET", "HEAD")
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def list_page_etag(request: HttpRequest, list_id: str) -> Optional[str]:
+    """Return ETag of a list page for its items and the current viewer."""
+    list_ = _get_list(request, list_id)
 
+    if list_ is None or not _is_conditional(request):
+        return None
 
+    get_token(request)
+    viewer = f"{request.user.pk}:{request.META['CSRF_COOKIE']}"
+    digest = hashlib.md5(viewer.encode()).hexdigest()[:12]
+
+    return f"{list_.etag}-{digest}"
+
+
+def list_page_last_modified(
+    request: HttpRequest, list_id: str
+) -> Optional[datetime.datetime]:
+    """Return when a list's items last changed."""
+    list_ = _get_list(request, list_id)
+
+    if list_ is None or not _is_conditional(request):
+        return None
+
+    return list_.updated_at
+
+
+@condition(
+    etag_func=list_page_etag, last_modified_func=list_page_last_modified
+)
 def view_list(request: HttpRequest, list_id: str) -> HttpResponse:
     """Renders to-do list."""
-    list_ = List.objects.get(id=list_id)
+    list_ = _get_list(request, list_id)
+
+    if list_ is None:
+        raise Http404("No such list.")
+
     form = ExistingListItemForm(for_list=list_)
 
     if request.method == "POST":
         form = ExistingListItemForm(for_list=list_, data=request.POST)
 
-        if form.is_valid():
-            form.save()
-
+        if form.is_valid() and form.save() is not None:
             return redirect(list_)
 
-    return render(request, "list.html", {"list": list_, "form": form})
+    if request.GET.get("stream"):
+        return _stream_list(request, list_, form)
+
+    after, start, limit = parse_page_params(request.GET)
+    item_table = item_table_cache.get_or_set(
+        (*item_table_key(list_), after, start, limit),
+        lambda: render_to_string(
+            "item_table.html",
+            {"page": keyset_page(list_.item_set.all(), after, start, limit)},
+        ),
+    )
+
+    return render(
+        request,
+        "list.html",
+        {"list": list_, "form": form, "item_table": mark_safe(item_table)},
+    )
+
+
+def list_items_etag(request: HttpRequest, list_id: str) -> Optional[str]:
+    """Return ETag of a list's JSON item pages."""
+    list_ = _get_list(request, list_id)
+
+    return None if list_ is None else list_.etag
+
+
+def list_items_last_modified(
+    request: HttpRequest, list_id: str
+) -> Optional[datetime.datetime]:
+    """Return when a list's items last changed."""
+    list_ = _get_list(request, list_id)
+
+    return None if list_ is None else list_.updated_at
+
+
+@condition(
+    etag_func=list_items_etag, last_modified_func=list_items_last_modified
+)
+def list_items_json(request: HttpRequest, list_id: str) -> JsonResponse:
+    """Return a page of a list's items as compact JSON."""
+    list_ = _get_list(request, list_id)
+
+    if list_ is None:
+        raise Http404("No such list.")
+
+    after, start, limit = parse_page_params(request.GET)
+    page = keyset_page(
+        list_.item_set.values_list("id", "text"),
+        after,
+        start,
+        limit,
+    )
+    next_url = None
+
+    if page.next_after is not None:
+        next_url = "{}?after={}&limit={}".format(
+            reverse("list_items_json", args=[list_.id]),
+            page.next_after,
+            limit,
+        )
+
+    return JsonResponse(
+        {
+            "list": list_.id,
+            "version": list_.version,
+            "items": [{"id": id_, "text": text} for id_, text in page.items],
+            "next": next_url,
+        },
+        json_dumps_params={"separators": (",", ":")},
+    )
+
+
+@require_POST
+def batch_items(request: HttpRequest, list_id: str) -> JsonResponse:
+    """Apply a batch of item operations to a list in one transaction."""
+    list_ = _get_list(request, list_id)
+
+    if list_ is None:
+        raise Http404("No such list.")
+
+    try:
+        operations = json.loads(request.body.decode())["operations"]
+
+        if not isinstance(operations, list):
+            raise TypeError("operations must be a list")
+
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse(
+            {"error": 'Expected a JSON object with an "operations" list.'},
+            status=400,
+        )
+
+    if len(operations) > settings.LIST_MAX_BATCH_OPERATIONS:
+        return JsonResponse(
+            {
+                "error": "At most {} operations per batch.".format(
+                    settings.LIST_MAX_BATCH_OPERATIONS
+                )
+            },
+            status=400,
+        )
+
+    try:
+        results = apply_item_operations(list_, operations)
+
+    except IntegrityError:
+        return JsonResponse(
+            {"error": "The list changed during the batch, please retry."},
+            status=409,
+        )
+
+    return JsonResponse(
+        {"list": list_.id, "results": results},
+        json_dumps_params={"separators": (",", ":")},
+    )
+
+
+def _stream_list(
+    request: HttpRequest, list_: List, form: ExistingListItemForm
+) -> StreamingHttpResponse:
+    """Stream a whole list page without holding its items in memory."""
+    page = render_to_string(
+        "list.html",
+        {
+            "list": list_,
+            "form": form,
+            "item_table": mark_safe(
+                '<table id="id_list_table" class="table">'
+                f"{ITEM_ROWS_MARKER}</table>"
+            ),
+        },
+        request=request,
+    )
+    header, footer = page.split(ITEM_ROWS_MARKER, 1)
+
+    return StreamingHttpResponse(_item_row_chunks(list_, header, footer))
+
+
+def _item_row_chunks(list_: List, header: str, footer: str):
+    """Yield header, item table rows in keyset-paged chunks, and footer."""
+    yield header
+    rows = list_.item_set.values_list("id", "text")
+    after, start = None, 0
+
+    while True:
+        page = keyset_page(
+            rows, after, start, settings.LIST_STREAM_CHUNK_SIZE
+        )
+        yield "".join(
+            format_html("<tr><td>{}: {}</td></tr>", number, text)
+            for number, (_, text) in enumerate(page.items, start + 1)
+        )
+
+        if page.next_after is None:
+            break
+
+        after, start = page.next_after, page.next_start
+
+    yield footer
 
 
 def new_list(request: HttpRequest) -> HttpResponse:
@@ -32,8 +295,11 @@ def new_list(request: HttpRequest) -> HttpResponse:
     form = ItemForm(data=request.POST)
 
     if form.is_valid():
-        list_ = List.objects.create()
-        form.save(for_list=list_)
+        list_ = List.objects.new()
+
+        with transaction.atomic(using=list_.database):
+            list_.save(force_insert=True)
+            form.save(for_list=list_)
 
         return redirect(list_)
 
@@ -0,0 +1,52 @@
+"""SQLite database backend tuned for several concurrent worker processes.
+
+Adds two OPTIONS to Django's SQLite backend:
+
+* ``init_command``: SQL run on every new connection, e.g. the PRAGMAs that
+  switch on WAL mode and set the busy timeout.
+* ``transaction_mode``: ``"IMMEDIATE"`` makes atomic blocks take the write
+  lock when they begin. A deferred transaction that reads before writing
+  cannot wait for the lock when another process commits first, and fails
+  with "database is locked" regardless of the busy timeout.
+"""
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite connection running init_command and configurable BEGINs."""
+
+    def get_connection_params(self) -> dict:
+        """Return sqlite3.connect() arguments without our own OPTIONS."""
+        params = super().get_connection_params()
+        params.pop("init_command", None)
+        params.pop("transaction_mode", None)
+
+        return params
+
+    @property
+    def transaction_mode(self) -> str:
+        """Return the BEGIN mode used to start atomic blocks."""
+        mode = self.settings_dict["OPTIONS"].get("transaction_mode")
+        mode = (mode or "DEFERRED").upper()
+
+        if mode not in TRANSACTION_MODES:
+            raise ValueError(f"Unknown SQLite transaction mode {mode!r}")
+
+        return mode
+
+    def get_new_connection(self, conn_params: dict):
+        """Open a connection and run init_command on it."""
+        connection = super().get_new_connection(conn_params)
+        init_command = self.settings_dict["OPTIONS"].get("init_command")
+
+        if init_command:
+            connection.executescript(init_command)
+
+        return connection
+
+    def _start_transaction_under_autocommit(self) -> None:
+        """Begin an atomic block in the configured transaction mode."""
+        self.cursor().execute(f"BEGIN {self.transaction_mode}")
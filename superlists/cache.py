@@ -0,0 +1,187 @@
+"""Process-local and shared caching helpers for superlists."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from django.core.cache import caches
+
+
+MISSING = object()
+
+
+class LRUCache:
+    """Bounded, thread-safe least-recently-used cache with an optional TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """Initialize an empty cache holding at most `maxsize` entries."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of entries currently held."""
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Return cached value for key, or default if absent or expired."""
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+
+            except KeyError:
+                self.misses += 1
+
+                return default
+
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry."""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
+
+
+class TieredCache:
+    """An in-process LRU tier in front of an optional shared Django cache.
+
+    Reads check the local tier first, then the shared tier (promoting hits
+    into the local tier). Writes go to both tiers. With `verify_local`, a
+    local hit is only served while the shared tier still holds the key, so
+    a delete made by another process is seen at once.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        maxsize: int = 1024,
+        shared_alias: Optional[str] = None,
+        timeout: Optional[int] = None,
+        local_ttl: Optional[float] = None,
+        verify_local: bool = False,
+    ):
+        """Initialize cache namespaced under prefix."""
+        self.prefix = prefix
+        self.local = LRUCache(maxsize, local_ttl)
+        self.shared_alias = shared_alias
+        self.timeout = timeout
+        self.verify_local = verify_local
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        """Return the shared cache backend, or None if not configured."""
+        if self.shared_alias is None:
+            return None
+
+        return caches[self.shared_alias]
+
+    def make_key(self, key: Hashable) -> str:
+        """Return the namespaced key used in the shared tier."""
+        parts = key if isinstance(key, tuple) else (key,)
+
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key from the nearest tier."""
+        value = self.local.get(key)
+        shared = self.shared
+
+        if value is not MISSING and (shared is None or not self.verify_local):
+            return value
+
+        if shared is not None:
+            value = shared.get(self.make_key(key), MISSING)
+
+            if value is not MISSING:
+                self.shared_hits += 1
+                self.local.set(key, value)
+
+                return value
+
+            self.local.delete(key)
+
+        self.misses += 1
+
+        return default
+
+    def set(
+        self, key: Hashable, value: Any, timeout: Optional[int] = None
+    ) -> None:
+        """Store value in every tier, overriding the shared timeout."""
+        self.local.set(key, value)
+        shared = self.shared
+
+        if shared is not None:
+            if timeout is None:
+                timeout = self.timeout
+
+            shared.set(self.make_key(key), value, timeout)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove key from every tier."""
+        self.local.delete(key)
+        shared = self.shared
+
+        if shared is not None:
+            shared.delete(self.make_key(key))
+
+    def get_or_set(self, key: Hashable, default: Callable[[], Any]) -> Any:
+        """Return cached value for key, computing and storing it on a miss."""
+        value = self.get(key, MISSING)
+
+        if value is MISSING:
+            value = default()
+            self.set(key, value)
+
+        return value
+
+    def clear(self) -> None:
+        """Empty the local tier and reset the counters."""
+        self.local.clear()
+        self.shared_hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for both tiers."""
+        return {
+            "local_hits": self.local.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "size": len(self.local),
+        }
@@ -0,0 +1,97 @@
+"""Reading lists from replica databases without losing your own writes.
+
+DATABASE_REPLICAS maps a database alias to aliases holding copies of it,
+refreshed by the sync_replica worker. List and item reads made by a request
+go to a replica unless the request is pinned to the primaries:
+ReplicaPinMiddleware pins requests that write (any unsafe method), and sets
+a cookie pinning the browser for REPLICA_PIN_SECONDS more, so the redirect
+after a write, and whatever follows it before the replica catches up, shows
+the change. Reads outside requests, e.g. in commands, use the primaries.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+
+PIN_COOKIE_NAME = "pin_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+_local = threading.local()
+
+
+def is_pinned() -> bool:
+    """Return whether this thread must read from the primaries."""
+    return getattr(_local, "pinned", True)
+
+
+def read_database(alias: str) -> str:
+    """Return the alias to read a database's data from."""
+    replicas = settings.DATABASE_REPLICAS.get(alias)
+
+    if not replicas or is_pinned():
+        return alias
+
+    return random.choice(replicas)
+
+
+def primary_of(alias: str) -> str:
+    """Return the database a replica copies, or alias if it is none."""
+    for primary, replicas in settings.DATABASE_REPLICAS.items():
+        if alias in replicas:
+            return primary
+
+    return alias
+
+
+def sync_replicas() -> int:
+    """Copy every primary into its replicas, returning how many copies.
+
+    Uses SQLite's online backup, so the primary keeps taking writes; each
+    replica is replaced in one step.
+    """
+    copies = 0
+
+    for primary, replicas in settings.DATABASE_REPLICAS.items():
+        source = connections[primary]
+        source.ensure_connection()
+
+        for replica in replicas:
+            target = connections[replica]
+            target.ensure_connection()
+            source.connection.backup(target.connection)
+            copies += 1
+
+    return copies
+
+
+class ReplicaPinMiddleware:
+    """Pin writing requests, and the browser's next ones, to the primaries."""
+
+    def __init__(self, get_response):
+        """Initialize middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Choose where the request reads from, pinning after writes."""
+        writes = request.method not in SAFE_METHODS
+        _local.pinned = writes or PIN_COOKIE_NAME in request.COOKIES
+
+        try:
+            response = self.get_response(request)
+
+        finally:
+            del _local.pinned
+
+        if writes and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+
+        return response
@@ -0,0 +1,143 @@
+"""Database routers keeping login data and list shards apart.
+
+Login tokens, queued login emails and sessions are written on every login
+attempt. With AUTH_DATA_DATABASE set to a second SQLite file they take that
+file's write lock instead of the one item inserts wait on. Users stay in
+the default database.
+
+Lists and their items are spread over LIST_SHARDS by list id, see
+lists.sharding, and read from replicas, see superlists.replicas.
+"""
+from typing import Optional
+
+from django.conf import settings
+
+from lists.sharding import ID_BLOCK_ALIAS, shard_for
+from superlists.replicas import primary_of, read_database
+
+
+AUTH_DATA_ALIAS = "auth"
+
+AUTH_DATA_MODELS = {
+    ("accounts", "token"),
+    ("accounts", "loginemail"),
+    ("sessions", "session"),
+}
+
+
+def is_auth_data(app_label: str, model_name: Optional[str]) -> bool:
+    """Return whether a model holds churning login data."""
+    return (app_label, model_name) in AUTH_DATA_MODELS
+
+
+class AuthDataRouter:
+    """Send tokens, login emails and sessions to AUTH_DATA_DATABASE.
+
+    Reads and writes go to the same alias, so a request always reads back
+    the token or session it has just written.
+    """
+
+    def _route(self, model) -> Optional[str]:
+        """Return the alias of a login data model, None for the rest."""
+        if is_auth_data(model._meta.app_label, model._meta.model_name):
+            return settings.AUTH_DATA_DATABASE
+
+        return None
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        """Read login data where it is written."""
+        return self._route(model)
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        """Write login data to AUTH_DATA_DATABASE."""
+        return self._route(model)
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name: str = None, **hints
+    ) -> Optional[bool]:
+        """Keep login data tables in their database, and only those in it.
+
+        The auth alias always gets the login data tables, so switching
+        AUTH_DATA_DATABASE to it needs no other schema changes.
+        """
+        if db == AUTH_DATA_ALIAS:
+            return is_auth_data(app_label, model_name)
+
+        if is_auth_data(app_label, model_name):
+            return db == settings.AUTH_DATA_DATABASE
+
+        return None
+
+
+class ListShardRouter:
+    """Send each list, and its items, to the shard its id picks.
+
+    Lists and items already loaded stay with the database they came from,
+    so a list found outside its shard (not yet moved by rebalance_lists)
+    is written where it is, and one read from a replica is written to its
+    primary. Queries without a list to go by use default. Reads may be
+    served by replicas, see superlists.replicas.
+    """
+
+    def _route(self, model, instance, read: bool) -> Optional[str]:
+        """Return the alias for a lists model, None for other models."""
+        label = model._meta.label_lower
+
+        if label == "lists.idblock":
+            return ID_BLOCK_ALIAS
+
+        if label not in ("lists.list", "lists.item"):
+            return None
+
+        if instance is not None and instance._state.db:
+            if read:
+                return instance._state.db
+
+            return primary_of(instance._state.db)
+
+        if instance is None:
+            alias = "default"
+
+        elif instance._meta.label_lower == "lists.item":
+            alias = shard_for(instance.list_id)
+
+        else:
+            alias = shard_for(instance.pk)
+
+        if alias is not None and read:
+            return read_database(alias)
+
+        return alias
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        """Read a list or item from its list's database, or a replica."""
+        return self._route(model, hints.get("instance"), read=True)
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        """Write a list or item to its list's primary database."""
+        return self._route(model, hints.get("instance"), read=False)
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name: str = None, **hints
+    ) -> Optional[bool]:
+        """Put the lists tables in every shard, and nothing else in them.
+
+        Blocks of ids are reserved in the ids database, which holds
+        nothing else. Replicas are copies, never migrated themselves.
+        """
+        if primary_of(db) != db:
+            return False
+
+        if db == ID_BLOCK_ALIAS:
+            return app_label == "lists" and model_name == "idblock"
+
+        if app_label == "lists":
+            if model_name == "idblock":
+                return False
+
+            return db in settings.LIST_SHARDS
+
+        if db != "default" and db in settings.LIST_SHARDS:
+            return False
+
+        return None
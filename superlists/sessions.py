@@ -0,0 +1,233 @@
+"""Database session engine with cache tiers and write-behind saves.
+
+Sessions are still stored in the `django_session` table, so sessions made
+by the plain database engine (e.g. `create_pre_authenticated_session`) are
+picked up on a miss. Reads go through the write-behind queue, a bounded
+per-process LRU and an optional shared cache before the database. Changes
+to existing sessions are queued and written in one transaction when the
+request has finished; new and deleted sessions, and changes to who is
+logged in, hit the database at once, so the next request sees them in any
+worker and a crash cannot lose a login.
+
+Other workers cannot empty this process's LRU, so its entries are never
+trusted on their own: with a shared cache a local hit is served only while
+the shared cache still holds the session, and without one the LRU is
+emptied when each request finishes.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.contrib.sessions.backends import db
+from django.core.exceptions import SuspiciousOperation
+from django.core.signals import request_finished
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.encoding import force_text
+
+from superlists.cache import MISSING, TieredCache
+
+
+_config = settings.SESSION_CACHE
+
+session_cache = TieredCache(
+    "session",
+    maxsize=_config["MAX_ENTRIES"],
+    shared_alias=_config["SHARED_CACHE"],
+    verify_local=True,
+)
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+AUTH_SESSION_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+def _lookup(session_key: str) -> Any:
+    """Return the queued or cached (data, expire_date) of a session."""
+    with _pending_lock:
+        entry = _pending.get(session_key, MISSING)
+
+    if entry is MISSING:
+        entry = session_cache.get(session_key, MISSING)
+
+    return entry
+
+
+def _changes_login(session_key: str, data: Dict) -> bool:
+    """Return whether saving data changes who a session is logged in as."""
+    entry = _lookup(session_key)
+
+    if entry is MISSING:
+        return True
+
+    previous, _ = entry
+
+    return any(previous.get(key) != data.get(key) for key in AUTH_SESSION_KEYS)
+
+
+def _remember(session_key: str, data: Dict, expire_date: datetime) -> None:
+    """Store a session in the cache tiers until it expires."""
+    timeout = (expire_date - timezone.now()).total_seconds()
+
+    if timeout > 0:
+        session_cache.set(session_key, (data, expire_date), int(timeout))
+
+
+def _forget(session_key: str) -> None:
+    """Drop a session from the write-behind queue and the cache tiers."""
+    with _pending_lock:
+        _pending.pop(session_key, None)
+
+    session_cache.delete(session_key)
+
+
+def flush_pending(**kwargs) -> int:
+    """Write queued session changes to the database, returning the count.
+
+    Only existing rows are updated, so a session deleted after its change
+    was queued is not brought back.
+    """
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+
+    if not pending:
+        return 0
+
+    store = SessionStore()
+    using = router.db_for_write(store.model)
+
+    sessions = store.model.objects.using(using)
+
+    with transaction.atomic(using=using):
+        for session_key, (data, expire_date) in pending.items():
+            sessions.filter(session_key=session_key).update(
+                session_data=store.encode(data), expire_date=expire_date
+            )
+
+    return len(pending)
+
+
+def finish_request(**kwargs) -> None:
+    """Write queued changes, forgetting sessions no other worker can evict."""
+    flush_pending()
+
+    if session_cache.shared is None:
+        session_cache.local.clear()
+
+
+request_finished.connect(finish_request, dispatch_uid="superlists.sessions")
+
+
+class SessionStore(db.SessionStore):
+    """Session store reading through cache tiers, writing behind."""
+
+    def load(self) -> Dict:
+        """Return the session data from the nearest tier that has it."""
+        entry = _lookup(self.session_key)
+
+        if entry is not MISSING:
+            data, expire_date = entry
+
+            if expire_date > timezone.now():
+                return dict(data)
+
+        return self._load_from_database()
+
+    def _load_from_database(self) -> Dict:
+        """Return the session data stored in the database, caching it."""
+        try:
+            session = self.model.objects.get(
+                session_key=self.session_key, expire_date__gt=timezone.now()
+            )
+            data = self.decode(session.session_data)
+
+        except (self.model.DoesNotExist, SuspiciousOperation) as error:
+            if isinstance(error, SuspiciousOperation):
+                logger = logging.getLogger(
+                    f"django.security.{error.__class__.__name__}"
+                )
+                logger.warning(force_text(error))
+
+            self._session_key = None
+
+            return {}
+
+        _remember(self.session_key, data, session.expire_date)
+
+        return dict(data)
+
+    def exists(self, session_key: Optional[str]) -> bool:
+        """Return whether a session with the given key is stored."""
+        if session_key is not None and _lookup(session_key) is not MISSING:
+            return True
+
+        return super().exists(session_key)
+
+    def save(self, must_create: bool = False) -> None:
+        """Save the session, queueing changes that keep the same login."""
+        if self.session_key is None:
+            return self.create()
+
+        data = self._get_session(no_load=must_create)
+        expire_date = self.get_expiry_date()
+
+        if (
+            must_create
+            or not _config["WRITE_BEHIND"]
+            or _changes_login(self.session_key, data)
+        ):
+            with _pending_lock:
+                _pending.pop(self.session_key, None)
+
+            super().save(must_create=must_create)
+
+        else:
+            with _pending_lock:
+                _pending[self.session_key] = (dict(data), expire_date)
+
+        _remember(self.session_key, dict(data), expire_date)
+
+    def delete(self, session_key: Optional[str] = None) -> None:
+        """Delete the session from every tier and the database."""
+        if session_key is None:
+            if self.session_key is None:
+                return
+
+            session_key = self.session_key
+
+        _forget(session_key)
+        super().delete(session_key)
+
+    @classmethod
+    def clear_expired(cls) -> int:
+        """Delete expired sessions in batches, returning how many went."""
+        model = cls.get_model_class()
+        batch_size = _config["CLEAR_EXPIRED_BATCH_SIZE"]
+        now = timezone.now()
+        deleted = 0
+
+        while True:
+            session_keys = list(
+                model.objects.filter(expire_date__lt=now).values_list(
+                    "session_key", flat=True
+                )[:batch_size]
+            )
+
+            if not session_keys:
+                return deleted
+
+            model.objects.filter(session_key__in=session_keys).delete()
+
+            for session_key in session_keys:
+                _forget(session_key)
+
+            deleted += len(session_keys)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/1.11/ref/settings/
 """
 
+import copy
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -52,7 +53,49 @@ AUTHENTICATION_BACKENDS = [
     "accounts.authentication.PasswordlessAuthenticationBackend",
 ]
 
+# Seconds a login link stays valid. Each link works once; expired tokens
+# are deleted by the purge_tokens command.
+
+LOGIN_TOKEN_LIFETIME = 60 * 60
+
+# Login emails are queued by the view and sent by the send_login_emails
+# worker, BATCH_SIZE per SMTP connection. Failed sends are retried after
+# BACKOFF seconds, doubling up to MAX_BACKOFF, at most MAX_ATTEMPTS times.
+
+LOGIN_EMAIL_OUTBOX = {
+    "BATCH_SIZE": 50,
+    "POLL_INTERVAL": 1.0,
+    "BACKOFF": 30,
+    "MAX_BACKOFF": 60 * 60,
+    "MAX_ATTEMPTS": 5,
+}
+
+# Token buckets limiting login email requests per address and per client
+# IP: BURST requests at once, then one more every REFILL_SECONDS. Deployed
+# sites keep the buckets in a file shared by all workers and take the
+# client IP from the X-Real-IP header set by nginx.
+
+RATE_LIMIT = {
+    "DATABASE": (
+        "file:superlists-ratelimit?mode=memory&cache=shared"
+        if DEBUG
+        else "file:" + os.path.join(BASE_DIR, "ratelimit.sqlite3")
+    ),
+    "CLIENT_IP_HEADER": None if DEBUG else "HTTP_X_REAL_IP",
+    "EMAIL": {"BURST": 3, "REFILL_SECONDS": 60},
+    "IP": {"BURST": 20, "REFILL_SECONDS": 6},
+}
+
+# Users loaded for request.user are kept per process for TIMEOUT seconds.
+
+USER_CACHE = {
+    "MAX_ENTRIES": 1024,
+    "TIMEOUT": 60,
+}
+
 MIDDLEWARE = [
+    "superlists.timing.ServerTimingMiddleware",
+    "superlists.replicas.ReplicaPinMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -66,7 +109,7 @@ ROOT_URLCONF = "superlists.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "superlists.timing.TimedDjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -82,6 +125,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "superlists.wsgi.application"
 
+# ServerTimingMiddleware logs requests slower than SLOW_REQUEST_MS, keeping
+# the given fraction of them.
+
+SERVER_TIMING = {
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_REQUEST_SAMPLE_RATE": 1.0,
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/1.11/ref/settings/#databases
@@ -90,9 +141,153 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+    },
+    "auth": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "auth.sqlite3"),
+    },
+    "ids": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "ids.sqlite3"),
+    },
+}
+
+# Login tokens, queued login emails and sessions are stored in this alias.
+# Set DJANGO_AUTH_DATABASE=auth to move them out of the lists database, so
+# login traffic does not hold up item writes, then migrate --database auth.
+
+AUTH_DATA_DATABASE = os.environ.get("DJANGO_AUTH_DATABASE", "default")
+
+# Lists and their items are spread over these aliases by list id. Set
+# DJANGO_LIST_SHARDS=N to add lists_1.sqlite3 ... lists_<N-1>.sqlite3,
+# migrate each with migrate --database lists_<n> and run rebalance_lists.
+# While sharded, list and item ids are reserved SHARD_ID_BLOCK_SIZE at a
+# time in the ids database, so they are unique across shards; migrate it
+# with migrate --database ids. manage.py test runs against the same shards,
+# see functional_tests.runner.
+
+LIST_SHARDS = ["default"] + [
+    f"lists_{n}"
+    for n in range(1, int(os.environ.get("DJANGO_LIST_SHARDS", 1)))
+]
+
+for alias in LIST_SHARDS[1:]:
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, f"{alias}.sqlite3"),
     }
+
+SHARD_ID_BLOCK_SIZE = 100
+
+# List pages and JSON are read from the replicas of each list shard, mapped
+# here. Set DJANGO_REPLICAS=1 to give every shard a <alias>_replica.sqlite3
+# copy, refreshed every REPLICA_SYNC_INTERVAL seconds by sync_replica.
+# Browsers that have just written read from the primaries for
+# REPLICA_PIN_SECONDS, which must outlast a sync. Under manage.py test each
+# replica is the same connection as its primary, see functional_tests.runner.
+
+DATABASE_REPLICAS = {}
+
+if os.environ.get("DJANGO_REPLICAS") == "1":
+    for alias in LIST_SHARDS:
+        DATABASES[f"{alias}_replica"] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.path.join(BASE_DIR, f"{alias}_replica.sqlite3"),
+        }
+        DATABASE_REPLICAS[alias] = [f"{alias}_replica"]
+
+REPLICA_PIN_SECONDS = 5
+
+REPLICA_SYNC_INTERVAL = 1.0
+
+TEST_RUNNER = "functional_tests.runner.ShardedTestRunner"
+
+DATABASE_ROUTERS = [
+    "superlists.routers.AuthDataRouter",
+    "superlists.routers.ListShardRouter",
+]
+
+# Settings merged into every database when DJANGO_DB_PROFILE is
+# "production": WAL so readers never block the writer, fsync only at
+# checkpoints, a 16MB page cache and 128MB of memory-mapped reads, a 5s wait
+# for the write lock taken at the start of every atomic block, and
+# connections kept open across requests.
+
+SQLITE_PRODUCTION_PROFILE = {
+    "ENGINE": "superlists.backends.sqlite3",
+    "CONN_MAX_AGE": 10 * 60,
+    "OPTIONS": {
+        "init_command": (
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA cache_size=-16000;"
+            "PRAGMA mmap_size=134217728;"
+            "PRAGMA busy_timeout=5000;"
+            "PRAGMA temp_store=MEMORY;"
+        ),
+        "transaction_mode": "IMMEDIATE",
+    },
+}
+
+if os.environ.get("DJANGO_DB_PROFILE") == "production":
+    for database in DATABASES.values():
+        database.update(copy.deepcopy(SQLITE_PRODUCTION_PROFILE))
+
+# Rendered item tables are cached per list in a bounded in-process LRU. Set
+# SHARED_CACHE to a CACHES alias to add a tier shared between workers.
+
+LIST_FRAGMENT_CACHE = {
+    "MAX_ENTRIES": 512,
+    "SHARED_CACHE": None,
+    "TIMEOUT": 60 * 60,
+}
+
+# The home page seen by anonymous visitors is cached whole, in process and
+# optionally in a shared CACHES alias for TIMEOUT seconds.
+
+HOME_PAGE_CACHE = {
+    "SHARED_CACHE": None,
+    "TIMEOUT": 5 * 60,
 }
 
+# Sessions live in the database but are read through a per-process LRU
+# and an optional shared CACHES alias. Without SHARED_CACHE, the LRU only
+# lasts for one request, as workers cannot evict each other's entries.
+# With WRITE_BEHIND, changes to existing sessions are written once the
+# request has finished. clearsessions deletes expired rows
+# CLEAR_EXPIRED_BATCH_SIZE at a time.
+
+SESSION_ENGINE = "superlists.sessions"
+
+SESSION_CACHE = {
+    "MAX_ENTRIES": 1024,
+    "SHARED_CACHE": None,
+    "WRITE_BEHIND": True,
+    "CLEAR_EXPIRED_BATCH_SIZE": 1000,
+}
+
+# Items per page of a to-do list, the most a client may ask for, and rows
+# fetched per query when a whole list is streamed with ?stream=1.
+
+LIST_PAGE_SIZE = 100
+LIST_MAX_PAGE_SIZE = 1000
+LIST_STREAM_CHUNK_SIZE = 500
+
+# With ENABLED, items added to existing lists by concurrent requests in one
+# process are written together: a batch is flushed after MAX_WAIT_MS or
+# once MAX_BATCH items are queued. Only useful with threaded workers.
+
+ITEM_WRITE_COALESCER = {
+    "ENABLED": False,
+    "MAX_BATCH": 64,
+    "MAX_WAIT_MS": 2,
+}
+
+# Most operations accepted by one POST to /lists/<id>/items/batch. Keeps the
+# set-based lookups under SQLite's limit on query parameters.
+
+LIST_MAX_BATCH_OPERATIONS = 500
+
 
 # Password validation
 # https://docs.djangoproject.com/en/1.11/ref/settings/#auth-password-validators
@@ -133,6 +328,13 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
+# Deployed sites serve hashed, precompressed copies built by collectstatic
+# so they can be cached forever; development keeps the plain file names.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        "superlists.storage.CompressedManifestStaticFilesStorage"
+    )
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -146,6 +348,9 @@ LOGGING = {
         "django": {
             "handlers": ["console"],
         },
+        "superlists": {
+            "handlers": ["console"],
+        },
     },
     "root": {"level": "INFO"},
 }
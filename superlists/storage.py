@@ -0,0 +1,106 @@
+"""Static file storage with hashed names and precompressed siblings."""
+import gzip
+import io
+import os
+from typing import Dict, Iterator, Tuple
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".eot",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".ttf",
+    ".txt",
+}
+
+
+def gzip_compress(content: bytes) -> bytes:
+    """Return content gzipped at the highest level with a fixed mtime."""
+    buffer = io.BytesIO()
+
+    with gzip.GzipFile(
+        fileobj=buffer, mode="wb", compresslevel=9, mtime=0
+    ) as compressed:
+        compressed.write(content)
+
+    return buffer.getvalue()
+
+
+def brotli_compress(content: bytes) -> bytes:
+    """Return content compressed with brotli at the highest quality."""
+    return brotli.compress(content, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz and .br copies of its files.
+
+    The siblings are written next to each hashed file at collectstatic
+    time, so a front-end server can send them as-is instead of compressing
+    on every request. A sibling is only kept when it is smaller than the
+    original, and .br files are skipped when brotli is not installed.
+    """
+
+    def post_process(
+        self, paths: Dict[str, Tuple], dry_run: bool = False, **options
+    ) -> Iterator[Tuple]:
+        """Hash the collected files, then compress the hashed copies."""
+        hashed_names = set()
+
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+
+        for hashed_name in sorted(hashed_names):
+            for compressed_name in self.compress(hashed_name):
+                yield hashed_name, compressed_name, True
+
+    def compressors(self) -> Dict[str, callable]:
+        """Return the compression functions keyed by file suffix."""
+        compressors = {".gz": gzip_compress}
+
+        if brotli is not None:
+            compressors[".br"] = brotli_compress
+
+        return compressors
+
+    def compress(self, name: str) -> Iterator[str]:
+        """Write compressed siblings of name, yielding each one written."""
+        if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return
+
+        with self.open(name) as original:
+            content = original.read()
+
+        for suffix, compressor in self.compressors().items():
+            compressed = compressor(content)
+            compressed_name = name + suffix
+
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+
+            if len(compressed) >= len(content):
+                continue
+
+            self._save(compressed_name, ContentFile(compressed))
+
+            yield compressed_name
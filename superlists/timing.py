@@ -0,0 +1,255 @@
+"""Per-request timing of database, template, session and auth work.
+
+ServerTimingMiddleware starts a RequestTimer for each request. Database
+cursors and templates report into the current thread's timer, and the
+phases are sent back in a Server-Timing header.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.middleware import get_user
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.functional import SimpleLazyObject
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RequestTimer:
+    """Accumulates exclusive time spent in named phases of a request.
+
+    Phases nest: time spent in an inner phase (e.g. db queries made while
+    rendering a template) is not counted again in the outer one.
+    """
+
+    def __init__(self):
+        """Initialize a timer with no recorded phases."""
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """Attribute the time spent in the block to phase name."""
+        now = time.perf_counter()
+
+        if self._stack:
+            outer = self._stack[-1]
+            self.totals[outer[0]] += now - outer[1]
+
+        self._stack.append([name, now])
+        self.counts[name] += 1
+
+        try:
+            yield
+
+        finally:
+            now = time.perf_counter()
+            name, start = self._stack.pop()
+            self.totals[name] += now - start
+
+            if self._stack:
+                self._stack[-1][1] = now
+
+    def header(self, total: float) -> str:
+        """Return a Server-Timing header value, durations in milliseconds."""
+        metrics = []
+
+        for name in ("db", "template", "session", "auth"):
+            if name in self.totals:
+                metric = f"{name};dur={self.totals[name] * 1000:.2f}"
+
+                if name == "db":
+                    metric += f';desc="{self.counts[name]} queries"'
+
+                metrics.append(metric)
+
+        app = total - sum(self.totals.values())
+        metrics.append(f"app;dur={app * 1000:.2f}")
+        metrics.append(f"total;dur={total * 1000:.2f}")
+
+        return ", ".join(metrics)
+
+
+def current_timer() -> Optional[RequestTimer]:
+    """Return the timer of the request running in this thread, if any."""
+    return getattr(_local, "timer", None)
+
+
+@contextmanager
+def timed(name: str):
+    """Attribute the block to a phase of the current request, if any."""
+    timer = current_timer()
+
+    if timer is None:
+        yield
+
+    else:
+        with timer.phase(name):
+            yield
+
+
+class TimedCursor:
+    """Cursor wrapper recording execute calls in the "db" phase."""
+
+    def __init__(self, cursor):
+        """Wrap a Django cursor wrapper."""
+        self.cursor = cursor
+
+    def __getattr__(self, attr):
+        """Delegate everything else to the wrapped cursor."""
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        """Iterate over the wrapped cursor's rows."""
+        return iter(self.cursor)
+
+    def __enter__(self):
+        """Support use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the wrapped cursor."""
+        return self.cursor.__exit__(*exc_info)
+
+    def execute(self, sql, params=None):
+        """Execute a query, timing it."""
+        with timed("db"):
+            return self.cursor.execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        """Execute a query for each set of params, timing it."""
+        with timed("db"):
+            return self.cursor.executemany(sql, param_list)
+
+
+def instrument_connection(connection) -> None:
+    """Make a database connection's cursors report their queries."""
+    if getattr(connection, "server_timing_instrumented", False):
+        return
+
+    make_cursor = connection.make_cursor
+    make_debug_cursor = connection.make_debug_cursor
+    connection.make_cursor = lambda cursor: TimedCursor(make_cursor(cursor))
+    connection.make_debug_cursor = lambda cursor: TimedCursor(
+        make_debug_cursor(cursor)
+    )
+    connection.server_timing_instrumented = True
+
+
+class TimedTemplate(Template):
+    """Django template recording its rendering in the "template" phase."""
+
+    def render(self, context=None, request=None):
+        """Render the template, timing it."""
+        with timed("template"):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose templates report rendering time."""
+
+    def from_string(self, template_code):
+        """Compile a template from a string."""
+        template = super().from_string(template_code)
+
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        """Load a template by name."""
+        template = super().get_template(template_name)
+
+        return TimedTemplate(template.template, self)
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header and logs a sample of slow requests.
+
+    Belongs first in MIDDLEWARE so the total includes every other
+    middleware, including the session save on the way out.
+    """
+
+    def __init__(self, get_response):
+        """Initialize middleware."""
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        """Time the request and report its phases."""
+        for connection in connections.all():
+            instrument_connection(connection)
+
+        _local.timer = timer = RequestTimer()
+        start = time.perf_counter()
+
+        try:
+            response = self.get_response(request)
+
+        finally:
+            _local.timer = None
+
+        total = time.perf_counter() - start
+        response["Server-Timing"] = timer.header(total)
+        self.log_if_slow(request, timer, total)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Time session loads and saves and the lazy user lookup."""
+        timer = current_timer()
+        session = getattr(request, "session", None)
+
+        if timer is None:
+            return None
+
+        if session is not None:
+            load, save = session.load, session.save
+
+            def timed_load():
+                with timer.phase("session"):
+                    return load()
+
+            def timed_save(*args, **kwargs):
+                with timer.phase("session"):
+                    return save(*args, **kwargs)
+
+            session.load, session.save = timed_load, timed_save
+
+        if hasattr(request, "user"):
+
+            def timed_get_user():
+                with timer.phase("auth"):
+                    return get_user(request)
+
+            request.user = SimpleLazyObject(timed_get_user)
+
+        return None
+
+    def log_if_slow(
+        self, request: HttpRequest, timer: RequestTimer, total: float
+    ) -> None:
+        """Log a sampled line for requests slower than the threshold."""
+        config = settings.SERVER_TIMING
+
+        if total * 1000 < config["SLOW_REQUEST_MS"]:
+            return
+
+        if random.random() >= config["SLOW_REQUEST_SAMPLE_RATE"]:
+            return
+
+        logger.warning(
+            "Slow request %s %s %.1fms (%s)",
+            request.method,
+            request.get_full_path(),
+            total * 1000,
+            timer.header(total),
+        )